@@ -0,0 +1,9 @@
+"""성능 측정용 도구: 가상 데이터 생성(seed)과 엔드포인트 벤치마크(run/compare), 비밀번호 해시 속도(hashing),
+응답 압축 수준별 크기/CPU(compression).
+
+    flask bench seed --users 2000 --questions 50000
+    flask bench run --requests 200
+    flask bench compare bench_results/a.json bench_results/b.json
+    flask bench hashing --workers 4
+    flask bench compression
+"""
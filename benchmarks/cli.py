@@ -0,0 +1,138 @@
+import json
+import os
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from benchmarks import compression, hashing, runner, seed as seeding
+
+
+@click.group('bench')
+def bench_command():
+    """Generate synthetic data and benchmark the main endpoints."""
+
+
+@bench_command.command('seed')
+@click.option('--users', type=click.IntRange(1), default=1000, show_default=True)
+@click.option('--questions', type=click.IntRange(1), default=10000, show_default=True)
+@click.option('--answers', type=click.IntRange(0), default=30000, show_default=True)
+@click.option('--likes', type=click.IntRange(0), default=50000, show_default=True)
+@click.option('--bookmarks', type=click.IntRange(0), default=20000, show_default=True)
+@click.option('--views', type=click.IntRange(0), default=100000, show_default=True)
+@click.option('--skew', type=float, default=1.1, show_default=True,
+              help='Zipf exponent for question popularity (higher = a few very hot questions).')
+@click.option('--seed', 'seed_value', type=int, default=42, show_default=True, help='Random seed.')
+@click.option('--clear/--no-clear', default=True, show_default=True,
+              help='Delete previously generated benchmark data first.')
+@with_appcontext
+def seed_command(users, questions, answers, likes, bookmarks, views, skew, seed_value, clear):
+    """Bulk-insert synthetic users, questions, answers, reactions and views."""
+    if clear:
+        seeding.clear()
+    counts = seeding.seed(users=users, questions=questions, answers=answers, likes=likes, bookmarks=bookmarks,
+                          views=views, skew=skew, seed_value=seed_value, echo=click.echo)
+    current_app.extensions['page_cache'].backend.clear()
+    click.echo(f'Seeded {counts["question"]} questions for {counts["user"]} users '
+               f'(log in as {seeding.USERNAME_PREFIX}000000 / {seeding.PASSWORD}).')
+
+
+@bench_command.command('run')
+@click.option('--requests', 'requests_', type=click.IntRange(1), default=100, show_default=True,
+              help='Measured requests per scenario.')
+@click.option('--warmup', type=click.IntRange(0), default=5, show_default=True)
+@click.option('--concurrency', type=click.IntRange(1), default=1, show_default=True,
+              help='Parallel clients (server mode only).')
+@click.option('--url', default=None, help='Benchmark a running server instead of the in-process test client.')
+@click.option('--cache/--no-cache', default=True, show_default=True,
+              help='Keep the page cache between requests (test client mode only).')
+@click.option('--only', multiple=True, help='Run only scenarios whose name starts with this (repeatable).')
+@click.option('--accept-encoding', default=runner.ACCEPT_ENCODING, show_default=True,
+              help='Accept-Encoding request header ("identity" measures uncompressed responses).')
+@click.option('--output', type=click.Path(dir_okay=False), default=None,
+              help='Result file (default: bench_results/<timestamp>-<commit>.json).')
+@with_appcontext
+def run_command(requests_, warmup, concurrency, url, cache, only, accept_encoding, output):
+    """Measure p50/p95/p99 latency, throughput, queries, bytes on the wire and CPU ms per scenario."""
+    hot_ids, cold_ids, user, total = runner.pick_targets()
+    if user is None or not hot_ids:
+        raise click.ClickException('No benchmark data. Run "flask bench seed" first.')
+
+    if url:
+        transport = runner.HTTPTransport(url, user, accept_encoding=accept_encoding)
+    else:
+        if concurrency > 1:
+            # 쿼리 수를 엔진 이벤트로 세므로 같은 프로세스에서는 요청을 겹치지 않는다
+            raise click.BadParameter('only supported together with --url', param_hint='--concurrency')
+        transport = runner.TestClientTransport(current_app._get_current_object(), user, use_cache=cache,
+                                               accept_encoding=accept_encoding)
+
+    deep_page = max(1, total // 10)
+    scenarios = runner.build_scenarios(hot_ids, cold_ids, deep_page)
+    click.echo(runner.HEADER)
+    results = runner.run(transport, scenarios, requests=requests_, concurrency=concurrency, warmup=warmup,
+                         only=only, echo=click.echo)
+
+    options = {'requests': requests_, 'warmup': warmup, 'concurrency': concurrency, 'url': url,
+               'cache': cache, 'accept_encoding': accept_encoding, 'questions': total}
+    data = runner.report(results, transport, options)
+    if output is None:
+        directory = os.path.join(os.path.dirname(current_app.root_path), 'bench_results')
+        os.makedirs(directory, exist_ok=True)
+        stamp = data['timestamp'].replace(':', '').replace('-', '')[:15]
+        output = os.path.join(directory, f'{stamp}-{data["commit"] or "unknown"}.json')
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    click.echo(f'Saved {output}')
+
+
+@bench_command.command('compare')
+@click.argument('base', type=click.Path(exists=True, dir_okay=False))
+@click.argument('head', type=click.Path(exists=True, dir_okay=False))
+@click.option('--metric', default='p95_ms', show_default=True,
+              type=click.Choice(['p50_ms', 'p95_ms', 'p99_ms', 'mean_ms', 'throughput_rps', 'queries_per_request',
+                                 'avg_bytes', 'cpu_ms']))
+def compare_command(base, head, metric):
+    """Compare two saved benchmark results scenario by scenario."""
+    base_data, head_data = runner.load(base), runner.load(head)
+    click.echo(f'{metric}: {base_data.get("commit")} -> {head_data.get("commit")}')
+    for name, before, after, change in runner.compare(base_data, head_data, metric):
+        change_text = f'{change:+.1f}%' if change is not None else '-'
+        click.echo(f'{name:<22} {before if before is not None else "-":>10} '
+                   f'{after if after is not None else "-":>10} {change_text:>9}')
+
+
+@bench_command.command('hashing')
+@click.option('--method', default=None, help='Hash method (default: PASSWORD_HASH_METHOD).')
+@click.option('--seconds', type=float, default=2.0, show_default=True, help='Duration of each measurement.')
+@click.option('--workers', type=click.IntRange(1), multiple=True,
+              help='Pool sizes to measure (repeatable, default: 1, PASSWORD_HASH_WORKERS and the CPU count).')
+@with_appcontext
+def hashing_command(method, seconds, workers):
+    """Measure password hashes per second per core and for process pools, to size PASSWORD_HASH_WORKERS."""
+    method = method or current_app.config['PASSWORD_HASH_METHOD']
+    salt_length = current_app.config['PASSWORD_SALT_LENGTH']
+    result = hashing.single_core(method, salt_length, seconds)
+    click.echo(f'{method}: {result["hashes_per_sec"]} hashes/s on one core ({result["latency_ms"]} ms per hash)')
+    sizes = workers or sorted({1, max(1, current_app.config['PASSWORD_HASH_WORKERS']), hashing.cpu_count()})
+    for size in sizes:
+        result = hashing.pool(method, size, salt_length, seconds)
+        click.echo(f'{size:>3} workers: {result["hashes_per_sec"]:>9} hashes/s ({result["per_worker"]} per worker)')
+
+
+@bench_command.command('compression')
+@click.option('--seconds', type=float, default=0.5, show_default=True, help='Duration of each measurement.')
+@with_appcontext
+def compression_command(seconds):
+    """Measure response size and CPU ms per response for each gzip/brotli level on rendered pages."""
+    hot_ids, cold_ids, user, total = runner.pick_targets()
+    if user is None:
+        raise click.ClickException('No benchmark data. Run "flask bench seed" first.')
+    config = current_app.config
+    current = {('gzip', config['COMPRESS_GZIP_LEVEL']), ('br', config['COMPRESS_BR_LEVEL'])}
+    for name, data in compression.sample_pages(current_app._get_current_object(), user).items():
+        click.echo(f'{name}: {len(data)} bytes uncompressed')
+        for encoding, level in compression.levels():
+            size, cpu_ms = compression.measure(encoding, level, data, seconds)
+            marker = ' *' if (encoding, level) in current else ''
+            click.echo(f'  {encoding:<5} {level:>2} {size:>9} bytes {size / len(data):>7.1%} {cpu_ms:>8.3f} ms{marker}')
@@ -0,0 +1,43 @@
+import time
+
+from sqlalchemy import select
+
+from pybo import db, compression
+from pybo.models import Question
+
+GZIP_LEVELS = range(1, 10)
+BR_LEVELS = range(0, 12)
+
+
+def sample_pages(app, user):
+    """압축 전 본문: 질문 목록(100개씩)과 답변이 가장 많은 질문의 상세 화면"""
+    question_id = db.session.scalar(select(Question.id).order_by(Question.answer_count.desc()).limit(1))
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user.id
+        session['username'] = user.username
+    pages = {}
+    for name, url in (('list:per_page=100', '/question/list/?per_page=100'),
+                      ('detail:most_answers', f'/question/detail/{question_id}/')):
+        pages[name] = client.get(url, headers={'Accept-Encoding': 'identity'}).get_data()
+    return pages
+
+
+def measure(encoding, level, data, seconds=0.5):
+    """(압축한 크기, 응답 하나를 압축하는 CPU ms)"""
+    count, size = 0, 0
+    started = time.process_time()
+    while True:
+        size = len(compression.compress(encoding, level, data))
+        count += 1
+        elapsed = time.process_time() - started
+        if elapsed >= seconds:
+            return size, elapsed / count * 1000
+
+
+def levels():
+    """[(인코딩, 수준)] - brotli 가 없으면 gzip 만"""
+    result = [('gzip', level) for level in GZIP_LEVELS]
+    if compression.brotli is not None:
+        result += [('br', level) for level in BR_LEVELS]
+    return result
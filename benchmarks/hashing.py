@@ -0,0 +1,41 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import generate_password_hash
+
+PASSWORD = 'correct horse battery staple'
+
+
+def _hash_for(method, salt_length, seconds):
+    """seconds 동안 해시를 반복해 (횟수, 걸린 시간) 을 반환한다 (작업 프로세스에서도 실행)"""
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while True:
+        generate_password_hash(PASSWORD, method=method, salt_length=salt_length)
+        count += 1
+        now = time.perf_counter()
+        if now >= deadline:
+            return count, now - started
+
+
+def single_core(method, salt_length=16, seconds=2.0):
+    """한 코어(현재 프로세스)의 초당 해시 수와 해시 하나의 지연(ms)"""
+    count, elapsed = _hash_for(method, salt_length, seconds)
+    return {'hashes_per_sec': round(count / elapsed, 2), 'latency_ms': round(elapsed / count * 1000, 2)}
+
+
+def pool(method, workers, salt_length=16, seconds=2.0):
+    """workers 개 프로세스가 동시에 해시할 때의 전체/프로세스당 초당 해시 수"""
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        # 프로세스 시작 비용은 빼고 잰다
+        list(executor.map(_hash_for, [method] * workers, [salt_length] * workers, [0.0] * workers))
+        results = list(executor.map(_hash_for, [method] * workers, [salt_length] * workers, [seconds] * workers))
+    total = sum(count / elapsed for count, elapsed in results)
+    return {'workers': workers, 'hashes_per_sec': round(total, 2), 'per_worker': round(total / workers, 2)}
+
+
+def cpu_count():
+    return os.cpu_count() or 1
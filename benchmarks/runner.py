@@ -0,0 +1,277 @@
+import http.cookiejar
+import json
+import math
+import random
+import re
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from pybo import db
+from pybo.models import User, Question, QuestionLike
+from pybo.testing import count_queries
+
+from benchmarks.seed import PASSWORD, USERNAME_PREFIX, WORDS
+
+LIST_SORTS = ('recent', 'oldest', 'likes_desc', 'likes_asc', 'bookmarks_desc', 'bookmarks_asc',
+              'views_desc', 'views_asc', 'hot')
+
+_SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+_SERVER_TIMING_CPU = re.compile(r'cpu;dur=([\d.]+)')
+
+# 브라우저가 보내는 것과 같은 기본값. 압축 전과 비교하려면 identity 로 실행한다
+ACCEPT_ENCODING = 'gzip, deflate, br'
+
+
+class Scenario:
+    """측정 단위 하나. make_request(rng) -> (method, url) 로 매 요청의 대상을 고른다."""
+
+    def __init__(self, name, endpoint, make_request):
+        self.name = name
+        self.endpoint = endpoint
+        self.make_request = make_request
+
+
+def build_scenarios(hot_ids, cold_ids, deep_page):
+    """엔드포인트/정렬 방식별 시나리오 목록"""
+    scenarios = [
+        Scenario(f'list:{sort}', 'question._list', lambda rng, sort=sort: ('GET', f'/question/list/?sort={sort}'))
+        for sort in LIST_SORTS
+    ]
+    scenarios += [
+        Scenario('list:search', 'question._list',
+                 lambda rng: ('GET', '/question/list/?' + urllib.parse.urlencode({'keyword': rng.choice(WORDS)}))),
+        Scenario('list:deep_page', 'question._list',
+                 lambda rng: ('GET', f'/question/list/?page={rng.randint(deep_page // 2, deep_page)}')),
+        Scenario('detail:hot', 'question.detail',
+                 lambda rng: ('GET', f'/question/detail/{rng.choice(hot_ids)}/')),
+        Scenario('detail:cold', 'question.detail',
+                 lambda rng: ('GET', f'/question/detail/{rng.choice(cold_ids)}/')),
+        # 토글은 데이터를 바꾸므로 같은 질문을 짝수 번 눌러 원래 상태로 돌아오게 한다 (run 참고)
+        Scenario('toggle:like', 'question.like_question',
+                 lambda rng: ('POST', f'/question/like/{hot_ids[0]}/')),
+        Scenario('toggle:bookmark', 'question.bookmark_question',
+                 lambda rng: ('POST', f'/question/bookmark/{hot_ids[0]}/')),
+        Scenario('auth:liked_items', 'auth.liked_items', lambda rng: ('GET', '/auth/liked/')),
+    ]
+    return scenarios
+
+
+def percentile(sorted_values, q):
+    """nearest-rank 방식 분위수"""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(q * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    """[(지연 ms, 쿼리 수 또는 None, 전송된 응답 바이트, 성공 여부, CPU ms 또는 None)] -> 통계"""
+    latencies = sorted(sample[0] for sample in samples)
+    queries = [sample[1] for sample in samples if sample[1] is not None]
+    cpu = [sample[4] for sample in samples if sample[4] is not None]
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if not sample[3]),
+        'p50_ms': _round(percentile(latencies, 0.50)),
+        'p95_ms': _round(percentile(latencies, 0.95)),
+        'p99_ms': _round(percentile(latencies, 0.99)),
+        'mean_ms': _round(sum(latencies) / len(latencies)) if latencies else None,
+        'max_ms': _round(latencies[-1]) if latencies else None,
+        'throughput_rps': _round(len(samples) / elapsed) if elapsed > 0 else None,
+        'queries_per_request': _round(sum(queries) / len(queries)) if queries else None,
+        'avg_bytes': int(sum(sample[2] for sample in samples) / len(samples)) if samples else 0,
+        'cpu_ms': _round(sum(cpu) / len(cpu)) if cpu else None,
+    }
+
+
+def _round(value):
+    return round(value, 3) if value is not None else None
+
+
+class TestClientTransport:
+    """같은 프로세스에서 Flask 테스트 클라이언트로 요청한다. 쿼리 수는 엔진 이벤트로 센다.
+
+    CPU 시간은 프로세스 CPU 시간이라 테스트 클라이언트 자체의 비용도 조금 들어간다.
+    """
+
+    mode = 'test-client'
+
+    def __init__(self, app, user, use_cache=True, accept_encoding=ACCEPT_ENCODING):
+        self.app = app
+        self.user = user
+        self.use_cache = use_cache
+        self.accept_encoding = accept_encoding
+
+    def client(self):
+        client = self.app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = self.user.id
+            session['username'] = self.user.username
+        return client
+
+    def request(self, client, method, url):
+        if not self.use_cache:
+            self.app.extensions['page_cache'].backend.clear()
+        with count_queries() as statements:
+            started, cpu_started = time.perf_counter(), time.process_time()
+            response = client.open(url, method=method, headers={'Accept-Encoding': self.accept_encoding})
+            data = response.get_data()
+            elapsed = (time.perf_counter() - started) * 1000
+            cpu = (time.process_time() - cpu_started) * 1000
+        return elapsed, len(statements), len(data), response.status_code < 400, cpu
+
+
+class HTTPTransport:
+    """실행 중인 서버(flask run, gunicorn 등)에 HTTP 로 요청한다.
+
+    쿼리 수와 서버 CPU 시간은 서버가 SQL_INSTRUMENTATION 으로 Server-Timing 헤더를 보낼 때만 알 수 있다.
+    응답은 풀지 않으므로 바이트 수는 실제로 전송된 크기다.
+    """
+
+    mode = 'http'
+
+    def __init__(self, base_url, user, accept_encoding=ACCEPT_ENCODING):
+        self.base_url = base_url.rstrip('/')
+        self.user = user
+        self.accept_encoding = accept_encoding
+
+    def client(self):
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        form = urllib.parse.urlencode({'username': self.user.username, 'password': PASSWORD}).encode()
+        opener.open(self.base_url + '/auth/login/', data=form).read()
+        return opener
+
+    def request(self, opener, method, url):
+        request = urllib.request.Request(self.base_url + url, method=method, data=b'' if method == 'POST' else None,
+                                         headers={'Accept-Encoding': self.accept_encoding})
+        started = time.perf_counter()
+        try:
+            with opener.open(request) as response:
+                data = response.read()
+                status = response.status
+                server_timing = response.headers.get('Server-Timing', '')
+        except urllib.error.HTTPError as e:
+            data, status, server_timing = e.read(), e.code, e.headers.get('Server-Timing', '')
+        elapsed = (time.perf_counter() - started) * 1000
+        queries = _SERVER_TIMING_QUERIES.search(server_timing)
+        cpu = _SERVER_TIMING_CPU.search(server_timing)
+        return (elapsed, int(queries.group(1)) if queries else None, len(data), status < 400,
+                float(cpu.group(1)) if cpu else None)
+
+
+def pick_targets(hot=10, cold=100):
+    """벤치마크 대상: 조회수 상위(hot)/하위(cold) 질문과 좋아요를 가장 많이 누른 벤치마크 사용자"""
+    hot_ids = db.session.scalars(select(Question.id).order_by(Question.view_count.desc()).limit(hot)).all()
+    cold_ids = db.session.scalars(select(Question.id).order_by(Question.view_count).limit(cold)).all()
+    user = db.session.execute(
+        select(User).join(QuestionLike, QuestionLike.user_id == User.id)
+        .where(User.username.like(f'{USERNAME_PREFIX}%'))
+        .group_by(User.id).order_by(func.count(QuestionLike.id).desc()).limit(1)
+    ).scalar()
+    if user is None:
+        user = db.session.scalars(select(User).where(User.username.like(f'{USERNAME_PREFIX}%')).limit(1)).first()
+    total = db.session.scalar(select(func.count(Question.id)))
+    return hot_ids, cold_ids, user, total
+
+
+def run(transport, scenarios, requests=100, concurrency=1, warmup=5, seed_value=42, only=None, echo=print):
+    """시나리오별로 warmup 후 requests 번 요청해 통계를 반환한다.
+
+    only 가 있으면 이름이 그 접두어 중 하나로 시작하는 시나리오만 실행한다.
+    """
+    results = {}
+    workers = max(1, concurrency)
+    for scenario in scenarios:
+        if only and not any(scenario.name.startswith(prefix) for prefix in only):
+            continue
+        rng = random.Random(seed_value)
+        shares = [requests // workers + (1 if i < requests % workers else 0) for i in range(workers)]
+        if scenario.name.startswith('toggle:'):
+            # 토글은 워커마다 (warmup + 측정) 횟수가 짝수여야 원래 상태로 돌아온다
+            shares = [share + (share + warmup) % 2 for share in shares]
+        samples = []
+        lock = threading.Lock()
+
+        def worker(n, worker_rng):
+            client = transport.client()
+            for _ in range(warmup):
+                transport.request(client, *scenario.make_request(worker_rng))
+            local = [transport.request(client, *scenario.make_request(worker_rng)) for _ in range(n)]
+            with lock:
+                samples.extend(local)
+
+        started = time.perf_counter()
+        if workers == 1:
+            worker(shares[0], rng)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(worker, share, random.Random(rng.random())) for share in shares]
+                for future in futures:
+                    future.result()
+        elapsed = time.perf_counter() - started
+
+        stats = summarize(samples, elapsed)
+        stats['endpoint'] = scenario.endpoint
+        results[scenario.name] = stats
+        echo(format_row(scenario.name, stats))
+    return results
+
+
+HEADER = (f'{"scenario":<22} {"reqs":>6} {"err":>4} {"p50":>9} {"p95":>9} {"p99":>9} {"rps":>9} {"queries":>8} '
+          f'{"bytes":>8} {"cpu":>7}')
+
+
+def format_row(name, stats):
+    def ms(value):
+        return f'{value:.2f}' if value is not None else '-'
+
+    queries = stats['queries_per_request']
+    return (f'{name:<22} {stats["requests"]:>6} {stats["errors"]:>4} {ms(stats["p50_ms"]):>9} '
+            f'{ms(stats["p95_ms"]):>9} {ms(stats["p99_ms"]):>9} {ms(stats["throughput_rps"]):>9} '
+            f'{queries if queries is not None else "-":>8} {stats["avg_bytes"]:>8} {ms(stats.get("cpu_ms")):>7}')
+
+
+def git_revision():
+    try:
+        output = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=current_app.root_path, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def report(results, transport, options):
+    """JSON 으로 저장할 실행 결과"""
+    return {
+        'commit': git_revision(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'mode': transport.mode,
+        'database': db.engine.dialect.name,
+        'options': options,
+        'scenarios': results,
+    }
+
+
+def compare(base, head, metric='p95_ms'):
+    """두 실행 결과의 시나리오별 metric 변화 -> [(이름, 기준값, 비교값, 변화율 %)]"""
+    rows = []
+    for name in sorted(set(base['scenarios']) | set(head['scenarios'])):
+        before = base['scenarios'].get(name, {}).get(metric)
+        after = head['scenarios'].get(name, {}).get(metric)
+        change = (after - before) / before * 100 if before and after is not None else None
+        rows.append((name, before, after, change))
+    return rows
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
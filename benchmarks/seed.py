@@ -0,0 +1,173 @@
+import bisect
+import itertools
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select, func
+from werkzeug.security import generate_password_hash
+
+from pybo import db, ranking, search
+from pybo.cli import recount_counters
+from pybo.models import (User, Question, Answer, QuestionLike, QuestionBookmark, AnswerLike, AnswerBookmark,
+                         QuestionView)
+
+# 생성된 사용자는 모두 이 비밀번호로 로그인할 수 있다 (bench_000001 / benchmark)
+PASSWORD = 'benchmark'
+USERNAME_PREFIX = 'bench_'
+
+WORDS = ('파이썬', 'flask', 'sqlalchemy', '질문', '답변', '오류', '설치', '배포', '데이터베이스', '템플릿',
+         'python', 'jinja', 'session', 'login', 'query', 'index', '성능', '캐시', '페이지', '검색')
+
+
+class ZipfSampler:
+    """순위 k 가 1/k^s 에 비례하는 확률로 뽑힌다 (앞쪽 몇 개가 매우 자주 뽑힘)."""
+
+    def __init__(self, n, s, rng):
+        self.rng = rng
+        self.cumulative = list(itertools.accumulate(1.0 / (k ** s) for k in range(1, n + 1)))
+
+    def sample(self):
+        return bisect.bisect_left(self.cumulative, self.rng.random() * self.cumulative[-1])
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def _insert(model, rows, batch_size):
+    for i in range(0, len(rows), batch_size):
+        db.session.execute(insert(model), rows[i:i + batch_size])
+
+
+def _pairs(rng, count, pick_target, n_users):
+    """(대상 인덱스, 사용자 인덱스) 쌍을 중복 없이 count 개 가까이 만든다."""
+    pairs = set()
+    for _ in range(count):
+        pairs.add((pick_target(), rng.randrange(n_users)))
+    return pairs
+
+
+def _bench_user_ids():
+    return select(User.id).where(User.username.like(f'{USERNAME_PREFIX}%')).scalar_subquery()
+
+
+def clear():
+    """이전에 생성한 벤치마크 사용자와 그 데이터를 지운다."""
+    user_ids = _bench_user_ids()
+    question_ids = select(Question.id).where(Question.user_id.in_(user_ids)).scalar_subquery()
+    answer_ids = select(Answer.id).where(Answer.question_id.in_(question_ids) | Answer.user_id.in_(user_ids)) \
+        .scalar_subquery()
+    # SQLite 는 기본적으로 FK ON DELETE CASCADE 를 적용하지 않으므로 자식 테이블부터 직접 지운다
+    for model in (AnswerLike, AnswerBookmark):
+        db.session.execute(delete(model).where(model.answer_id.in_(answer_ids) | model.user_id.in_(user_ids)))
+    for model in (QuestionLike, QuestionBookmark, QuestionView):
+        db.session.execute(delete(model).where(model.question_id.in_(question_ids) | model.user_id.in_(user_ids)))
+    db.session.execute(delete(Answer).where(Answer.id.in_(answer_ids)))
+    db.session.execute(delete(Question).where(Question.id.in_(question_ids)))
+    db.session.execute(delete(User).where(User.id.in_(user_ids)))
+    db.session.commit()
+
+
+def seed(users=1000, questions=10000, answers=30000, likes=50000, bookmarks=20000, views=100000,
+         skew=1.1, seed_value=42, batch_size=5000, echo=print):
+    """가상 데이터를 한꺼번에 넣는다. 같은 seed_value 면 같은 데이터가 만들어진다.
+
+    질문/답변의 인기도는 지프 분포(skew)를 따르므로 소수의 질문에 반응이 몰린다.
+    반환값은 종류별 생성 개수.
+    """
+    rng = random.Random(seed_value)
+    now = datetime.now().replace(microsecond=0)
+    # 해시 계산이 가장 느리므로 모든 사용자가 같은 해시를 쓴다
+    password = generate_password_hash(PASSWORD)
+
+    user_rows = [{
+        'username': f'{USERNAME_PREFIX}{i:06d}',
+        'password': password,
+        'email': f'{USERNAME_PREFIX}{i:06d}@example.com',
+        'create_date': now - timedelta(days=365),
+        'email_verified': True,
+        'verified_at': now - timedelta(days=365),
+    } for i in range(users)]
+    _insert(User, user_rows, batch_size)
+    user_ids = db.session.scalars(select(User.id).where(User.id.in_(_bench_user_ids())).order_by(User.id)).all()
+    echo(f'users: {len(user_ids)}')
+
+    # 작성자도 일부 사용자에게 몰리도록 한다
+    authors = ZipfSampler(len(user_ids), 0.8, rng)
+    question_rows = [{
+        'subject': _sentence(rng, rng.randint(3, 8)),
+        'content': _sentence(rng, rng.randint(20, 120)),
+        'create_date': now - timedelta(seconds=rng.randrange(365 * 24 * 3600)),
+        'user_id': user_ids[authors.sample()],
+        'view_count': 0,
+    } for _ in range(questions)]
+    _insert(Question, question_rows, batch_size)
+    question_ids = db.session.scalars(
+        select(Question.id).where(Question.user_id.in_(_bench_user_ids())).order_by(Question.id)
+    ).all()
+    # 인기 순위는 생성 순서와 무관하게 섞는다 (최신 질문만 인기 있는 것을 막기 위해)
+    hot_order = list(question_ids)
+    rng.shuffle(hot_order)
+    hot_questions = ZipfSampler(len(hot_order), skew, rng)
+    echo(f'questions: {len(question_ids)}')
+
+    answer_rows = [{
+        'question_id': hot_order[hot_questions.sample()],
+        'content': _sentence(rng, rng.randint(10, 60)),
+        'create_date': now - timedelta(seconds=rng.randrange(180 * 24 * 3600)),
+        'user_id': user_ids[rng.randrange(len(user_ids))],
+    } for _ in range(answers)]
+    _insert(Answer, answer_rows, batch_size)
+    answer_ids = db.session.scalars(
+        select(Answer.id).where(Answer.user_id.in_(_bench_user_ids())).order_by(Answer.id)
+    ).all()
+    hot_answers = ZipfSampler(len(answer_ids), skew, rng)
+    echo(f'answers: {len(answer_ids)}')
+
+    def reaction_rows(pairs, targets, column):
+        return [{
+            column: targets[target],
+            'user_id': user_ids[user],
+            'create_date': now - timedelta(seconds=rng.randrange(90 * 24 * 3600)),
+        } for target, user in pairs]
+
+    # 좋아요/즐겨찾기는 질문 3 : 답변 1 비율
+    pick_question = lambda: hot_questions.sample()
+    pick_answer = lambda: hot_answers.sample() if answer_ids else 0
+    counts = {}
+    for model, column, targets, picker, total in (
+        (QuestionLike, 'question_id', hot_order, pick_question, likes * 3 // 4),
+        (AnswerLike, 'answer_id', answer_ids, pick_answer, likes // 4),
+        (QuestionBookmark, 'question_id', hot_order, pick_question, bookmarks * 3 // 4),
+        (AnswerBookmark, 'answer_id', answer_ids, pick_answer, bookmarks // 4),
+    ):
+        if not targets:
+            continue
+        rows = reaction_rows(_pairs(rng, total, picker, len(user_ids)), targets, column)
+        _insert(model, rows, batch_size)
+        counts[model.__tablename__] = len(rows)
+        echo(f'{model.__tablename__}: {len(rows)}')
+
+    # 조회 기록과 조회수 (조회수는 기록 수와 맞춘다)
+    view_rows = [{
+        'question_id': hot_order[hot_questions.sample()],
+        'user_id': user_ids[rng.randrange(len(user_ids))],
+        'created_at': now - timedelta(seconds=rng.randrange(30 * 24 * 3600)),
+    } for _ in range(views)]
+    _insert(QuestionView, view_rows, batch_size)
+    view_count = select(func.count(QuestionView.id)).where(QuestionView.question_id == Question.id) \
+        .scalar_subquery()
+    db.session.execute(
+        Question.__table__.update().where(Question.user_id.in_(_bench_user_ids())).values(view_count=view_count)
+    )
+    echo(f'question_view: {len(view_rows)}')
+    db.session.commit()
+
+    recount_counters()
+    ranking.refresh()
+    if db.engine.dialect.name == 'sqlite':
+        search.rebuild_index()
+
+    counts.update({'user': len(user_ids), 'question': len(question_ids), 'answer': len(answer_ids),
+                   'question_view': len(view_rows)})
+    return counts
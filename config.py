@@ -2,10 +2,128 @@ import os
 
 BASE_DIR = os.path.dirname(__file__)
 
-SQLALCHEMY_DATABASE_URI = 'sqlite:///{}'.format(os.path.join(BASE_DIR, 'pybo.db'))
+# DATABASE_URL 로 PostgreSQL 등 서버 DB 를 지정할 수 있다 (예: postgresql+psycopg://user:pw@host/pybo)
+SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///{}'.format(os.path.join(BASE_DIR, 'pybo.db'))
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 SECRET_KEY = "dev"
 
+# Database engine profile (pybo.database)
+# 'auto' 는 DB 종류에 맞는 프로필을 고르고, 'default' 는 SQLAlchemy 기본값을 그대로 쓴다
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'auto')
+# SQLite: 연결마다 적용하는 PRAGMA (WAL 로 읽기와 쓰기가 서로 막지 않고, 잠겨 있으면 busy_timeout ms 동안 기다린다)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'foreign_keys': 'ON',
+}
+# 서버 DB 커넥션 풀 (워커 프로세스마다 최대 DB_POOL_SIZE + DB_MAX_OVERFLOW 개 연결)
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = 30
+# 서버/방화벽이 유휴 연결을 끊기 전에 다시 연결하도록 (초)
+DB_POOL_RECYCLE = 1800
+DB_POOL_PRE_PING = True
+# Read replica (pybo.routing): @read_only 화면의 조회는 이 DB 로 보낸다 (없으면 모두 기본 DB)
+# 로컬 확인용 읽기 전용 연결: sqlite:///file:/path/to/pybo.db?mode=ro&uri=true
+DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+# 사용자가 쓴 뒤 이 시간(초) 동안은 그 사용자의 조회도 기본 DB 에서 (복제 지연 대비)
+DB_REPLICA_STICKY_SECONDS = 5
+# 레플리카 오류 후 이 시간(초) 동안은 기본 DB 만 사용
+DB_REPLICA_RETRY_SECONDS = 30
+
+# Question list pagination
+# 이 페이지를 넘어가는 "다음" 링크는 OFFSET 대신 커서(after/before) 방식으로 이동
+QUESTION_LIST_CURSOR_AFTER_PAGE = 10
+# 전체 개수는 이 값까지만 센다 (넘으면 "1000+" 로 표시, 페이지 번호도 여기까지). 0 이면 정확히 센다.
+# 센 값은 검색어별로 렌더링 캐시에 두고 질문 등록/수정/삭제 시 무효화한다
+QUESTION_LIST_COUNT_CAP = 1000
+
+# Logged-in user cache (pybo.identity): 요청 사이에 사용자 정보를 재사용하는 시간(초), 0 이면 사용 안 함
+IDENTITY_CACHE_TTL = 30
+IDENTITY_CACHE_MAX_ENTRIES = 10000
+
+# "hot" question sort (pybo.ranking): 기여분이 절반이 되는 시간과 이벤트별 가중치.
+# 바꾸면 flask hot-refresh 로 점수를 다시 계산한다
+HOT_HALF_LIFE_HOURS = 24
+HOT_WEIGHTS = {'question': 5.0, 'view': 1.0, 'like': 5.0, 'bookmark': 4.0, 'answer': 10.0}
+
+# Bulk reaction toggles (POST /reaction/toggle/): 한 요청에 보낼 수 있는 최대 토글 수
+REACTION_BULK_MAX = 100
+# Reaction state reads (GET /reaction/state/): 한 요청에 조회할 수 있는 최대 질문+답변 수
+REACTION_STATE_MAX = 200
+# 목록/상세 화면이 보이는 동안 반응 수를 다시 확인하는 주기(초), 0 이면 화면으로 돌아올 때만
+REACTION_STATE_POLL_INTERVAL = 30
+
+# Password hashing (pybo.passwords): werkzeug 해시 방식과 비용 ('scrypt:N:r:p' 또는 'pbkdf2:sha256:반복 수').
+# 바꾸면 기존 사용자는 다음 로그인 때 새 설정으로 다시 해시된다. 크기는 flask bench hashing 결과로 정한다
+PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
+PASSWORD_SALT_LENGTH = 16
+# 해시 작업 프로세스 수 (0 이면 요청 스레드에서 계산), 처리 중+대기 작업 상한, 자리를 기다리는 시간(초, 넘으면 503)
+PASSWORD_HASH_WORKERS = 2
+PASSWORD_HASH_MAX_PENDING = 16
+PASSWORD_HASH_WAIT = 5
+
+# Static assets (pybo.assets): flask assets-build 가 해시 이름 파일/.gz/.br/manifest.json 을 쓰는 곳과
+# /assets/ 응답의 캐시 시간(초). 빌드하지 않았으면 기존 /static/ 주소를 쓴다
+STATIC_ASSETS_DIR = os.path.join(BASE_DIR, 'pybo', 'static', 'dist')
+STATIC_ASSETS_MAX_AGE = 365 * 24 * 3600
+
+# Response compression (pybo.compression): Accept-Encoding 에 맞춰 br(pip install brotli 가 있을 때)/gzip 으로 압축
+# 수준은 flask bench compression 으로 정한다. gzip 6 이후로는 바이트가 거의 줄지 않고 CPU 만 늘었다
+COMPRESS_ENABLED = True
+COMPRESS_ALGORITHMS = ('br', 'gzip')
+COMPRESS_GZIP_LEVEL = 6
+COMPRESS_BR_LEVEL = 4
+# 이보다 작은 응답은 압축하지 않는다 (바이트). 스트리밍 응답은 크기를 모르므로 항상 압축
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_MIMETYPES = ('text/html', 'text/css', 'text/plain', 'text/javascript', 'application/javascript',
+                      'application/json', 'image/svg+xml')
+
+# Email verification: 인증 링크 유효 시간(초). 지난 가입은 flask sweep-signups 로 정리한다
+SIGNUP_TOKEN_MAX_AGE = 86400
+
+# Username/email availability index (pybo.availability): 블룸 필터 용량, 오탐률, 다른 워커의 가입을 반영하는 주기(초)
+AVAILABILITY_CAPACITY = 100000
+AVAILABILITY_ERROR_RATE = 0.01
+AVAILABILITY_REFRESH_INTERVAL = 10
+
+# Per-request SQL instrumentation (pybo.instrumentation)
+# 켜면 Server-Timing 헤더, 느린 쿼리 로그, METRICS_URL 의 엔드포인트별 지연 시간 히스토그램을 제공
+# (METRICS_URL 은 인증 없이 열리므로 외부에 노출하지 말 것)
+SQL_INSTRUMENTATION = os.environ.get('SQL_INSTRUMENTATION', '').lower() in ('1', 'true', 'yes')
+SQL_SLOW_QUERY_MS = 100
+METRICS_URL = '/metrics/'
+
+# Query budget per endpoint (pybo.testing.assert_query_budget) - 캐시되지 않은 첫 요청 기준
+QUERY_BUDGETS = {
+    'question._list': 6,
+    'question.detail': 8,
+}
+
+# Question view counting (pybo.view_tracker)
+# 같은 사용자의 재조회를 조회수에서 제외하는 기간(초)과 메모리에 유지할 최대 항목 수
+VIEW_DEDUP_WINDOW = 3600
+VIEW_DEDUP_MAX_ENTRIES = 100000
+# 조회수는 이 주기(초)마다, 또는 이 개수만큼 쌓이면 DB에 일괄 반영 (비정상 종료 시 최대 유실 개수)
+VIEW_FLUSH_INTERVAL = 5
+VIEW_FLUSH_MAX_PENDING = 100
+# 반영에 실패하면 이 간격(초)부터 두 배씩, 최대 VIEW_FLUSH_RETRY_MAX 초까지 기다렸다가 다시 시도
+VIEW_FLUSH_RETRY_BACKOFF = 1.0
+VIEW_FLUSH_RETRY_MAX = 60.0
+# DB 에 반영하지 못한 조회를 메모리에 쌓아 둘 최대 개수 (넘치면 오래된 조회부터 버린다)
+VIEW_BUFFER_MAX_ROWS = 10000
+
+# Rendered page cache (pybo.cache)
+# 'lru' (프로세스 내), 'null' (사용 안 함) 또는 app 을 받아 백엔드를 만드는 'module:factory'
+# (백엔드는 get/set/delete/clear 를, 있으면 get_many 로 목록 화면의 태그 버전을 한 번에 읽는다)
+PAGE_CACHE_BACKEND = 'lru'
+PAGE_CACHE_MAX_ENTRIES = 1000
+PAGE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+# 다른 워커에서의 변경, 조회수 등은 이 시간(초) 이후 반영
+PAGE_CACHE_TIMEOUT = 60
+
 # Google OAuth2 settings (set these as environment variables in production)
 GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
 GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
@@ -21,3 +139,13 @@ MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
 MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
 MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'True').lower() in ('1', 'true', 'yes')
 MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER')
+# Delivery queue (pybo.email_utils.mail_queue): worker threads each keep one SMTP connection.
+# MAIL_QUEUE_WORKERS = 0 sends synchronously in the request, once (useful for tests; retry with flask mail-requeue)
+MAIL_QUEUE_WORKERS = 2
+MAIL_BATCH_SIZE = 20
+MAIL_MAX_RETRIES = 5
+MAIL_RETRY_BACKOFF = 2.0
+MAIL_TIMEOUT = 10
+MAIL_CONNECTION_IDLE = 60
+# Emails stuck in 'sending' longer than this (seconds) are resent by flask mail-requeue / the startup resume
+MAIL_CLAIM_TIMEOUT = 600
@@ -4,20 +4,60 @@ from flask_sqlalchemy import SQLAlchemy
 from authlib.integrations.flask_client import OAuth
 
 import config
+from .routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 oauth = OAuth()
 
 
-def create_app():
+def create_app(test_config=None):
     app = Flask(__name__)
     app.config.from_object(config)
+    if test_config:
+        app.config.update(test_config)
 
-    # ORM
+    # ORM (DB 종류별 엔진 설정: SQLite PRAGMA / 서버 DB 커넥션 풀, 읽기 전용 화면은 레플리카로)
+    from . import database
+    from .routing import routing
+    database.configure(app)
     db.init_app(app)
-    migrate.init_app(app, db)
-    from . import models
+    routing.init_app(app)
+    database.init_app(app)
+    from . import models, search
+    migrate.init_app(app, db, include_object=search.include_object)
+
+    # SQL 계측 (SQL_INSTRUMENTATION = True 일 때만)
+    from .instrumentation import instrumentation
+    instrumentation.init_app(app)
+
+    # 응답 압축 (gzip/brotli) - 계측의 after_request 보다 먼저 실행되도록 그 다음에 등록한다
+    from .compression import compression
+    compression.init_app(app)
+
+    # 조회수 집계
+    from .view_tracker import view_tracker
+    view_tracker.init_app(app)
+
+    # 렌더링 결과 캐시
+    from .cache import page_cache
+    page_cache.init_app(app)
+
+    # 메일 발송 대기열
+    from .email_utils import mail_queue
+    mail_queue.init_app(app)
+
+    # 비밀번호 해시 (프로세스 풀)
+    from .passwords import passwords
+    passwords.init_app(app)
+
+    # 정적 파일 (flask assets-build 로 만든 해시 이름 + 미리 압축한 파일)
+    from .assets import static_assets
+    static_assets.init_app(app)
+
+    # 사용자ID/이메일 중복 확인용 메모리 인덱스
+    from .availability import availability
+    availability.init_app(app)
 
     # OAuth
     oauth.init_app(app)
@@ -32,20 +72,29 @@ def create_app():
         )
 
     # 블루프린트
-    from .views import main_views, question_views, answer_views, auth_views
+    from .views import main_views, question_views, answer_views, auth_views, reaction_views, asset_views
     app.register_blueprint(main_views.bp)
     app.register_blueprint(question_views.bp)
     app.register_blueprint(answer_views.bp)
     app.register_blueprint(auth_views.bp)
+    app.register_blueprint(reaction_views.bp)
+    app.register_blueprint(asset_views.bp)
+
+    # CLI 명령
+    from . import cli
+    cli.init_app(app)
+
+    # 현재 사용자 정보를 g 객체에 저장 (요청마다 한 번만 조회, 짧은 시간 캐시)
+    from .identity import identity_cache
+    identity_cache.init_app(app)
 
-    # 현재 사용자 정보를 g 객체에 저장
     @app.before_request
     def load_logged_in_user():
         user_id = session.get('user_id')
         if user_id is None:
             g.user = None
         else:
-            g.user = models.User.query.get(user_id)
+            g.user = identity_cache.load_user(user_id)
 
     return app
     
\ No newline at end of file
@@ -0,0 +1,271 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+
+from flask import url_for
+
+try:
+    import brotli
+except ImportError:  # pip install brotli 가 없으면 .br 은 만들지 않는다
+    brotli = None
+
+MANIFEST = 'manifest.json'
+
+# 미리 압축해 둘 파일 (이미 압축된 이미지/폰트는 제외)
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.map')
+
+# 사용 중인 클래스를 찾을 때 읽는 파일
+_CLASS_SOURCES = ('.html', '.js', '.py')
+_WORD = re.compile(r'[A-Za-z0-9_-]+')
+_CLASS = re.compile(r'\.(-?[A-Za-z_][A-Za-z0-9_-]*)')
+# 그룹 규칙 - 안쪽 규칙을 하나씩 거른다 (@font-face, @keyframes 등은 그대로 둔다)
+_GROUP_RULES = ('@media', '@supports', '@layer', '@container')
+
+
+# fingerprinted() 가 만든 이름 (확장자 앞의 12자리 해시, 뒤에 .gz/.br 이 붙을 수 있다)
+_FINGERPRINT = re.compile(r'\.[0-9a-f]{12}(\.[^./]+)?(\.gz|\.br)?$')
+
+
+def fingerprinted(filename, content):
+    """내용 해시를 넣은 파일 이름 (css/bootstrap.min.css -> css/bootstrap.min.3f9a1c2b4d5e.css)"""
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    stem, ext = os.path.splitext(filename)
+    return f'{stem}.{digest}{ext}'
+
+
+def is_fingerprinted(filename):
+    """내용 해시가 들어간 이름인지 (manifest.json 처럼 내용이 바뀌어도 이름이 같은 파일은 False)"""
+    return _FINGERPRINT.search(os.path.basename(filename)) is not None
+
+
+def _strip_not(selector):
+    # :not(.x) 안의 클래스는 없어도 선택자가 (오히려 더 넓게) 맞으므로 판단에서 뺀다
+    out, depth, i = [], 0, 0
+    while i < len(selector):
+        if selector.startswith(':not(', i) and depth == 0:
+            depth, i = 1, i + 5
+            continue
+        char = selector[i]
+        if depth:
+            depth += {'(': 1, ')': -1}.get(char, 0)
+        else:
+            out.append(char)
+        i += 1
+    return ''.join(out)
+
+
+def _selector_used(selector, words):
+    return all(name in words for name in _CLASS.findall(_strip_not(selector)))
+
+
+def _split_top(text, sep):
+    """괄호/문자열 밖의 sep 로 나눈다 (a:not(.b,.c),d -> ['a:not(.b,.c)', 'd'])"""
+    parts, depth, quote, start = [], 0, None, 0
+    for i, char in enumerate(text):
+        if quote:
+            if char == quote and text[i - 1] != '\\':
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == sep and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _block_end(css, start):
+    """css[start] 가 '{' 일 때 짝이 되는 '}' 의 위치"""
+    depth, quote, i = 0, None, start
+    while i < len(css):
+        char = css[i]
+        if quote:
+            if char == '\\':
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    raise ValueError('Unbalanced braces in CSS')
+
+
+def _strip_comments(css):
+    # /*! 라이선스 */ 주석은 남긴다
+    return re.sub(r'/\*(?!!).*?\*/', '', css, flags=re.S)
+
+
+def purge_css(css, words):
+    """words 에 없는 클래스를 쓰는 선택자를 지운 CSS (선택자가 모두 지워진 규칙은 통째로 뺀다).
+
+    클래스 이름을 템플릿/JS 의 "단어" 와 비교하므로 JS 가 문자열로 붙이는 클래스(show, collapsing 등)는 남는다.
+    """
+    css = _strip_comments(css)
+    out, i = [], 0
+    while i < len(css):
+        start = len(css) - len(css[i:].lstrip())
+        if css.startswith('/*!', start):
+            end = css.index('*/', start) + 2
+            out.append(css[i:end])
+            i = end
+            continue
+        brace = css.find('{', i)
+        if brace < 0:
+            out.append(css[i:])
+            break
+        # { 앞의 ; 로 끝나는 @charset/@import 문은 그대로 둔다
+        statement_end = css.rfind(';', i, brace)
+        if statement_end >= 0 and css[i:statement_end].lstrip().startswith('@'):
+            out.append(css[i:statement_end + 1])
+            i = statement_end + 1
+            continue
+        prelude = css[i:brace]
+        end = _block_end(css, brace)
+        body = css[brace + 1:end]
+        head = prelude.strip()
+        if head.startswith(_GROUP_RULES):
+            inner = purge_css(body, words)
+            if inner.strip():
+                out.append(f'{prelude}{{{inner}}}')
+        elif head.startswith('@') or not head:
+            out.append(css[i:end + 1])
+        else:
+            selectors = [s for s in _split_top(prelude, ',') if _selector_used(s, words)]
+            if selectors:
+                out.append(f'{",".join(selectors)}{{{body}}}')
+        i = end + 1
+    return ''.join(out)
+
+
+def used_words(*roots):
+    """템플릿/JS/파이썬 소스에 나오는 단어들 (클래스 이름 후보)"""
+    words = set()
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            for name in filenames:
+                if name.endswith(_CLASS_SOURCES):
+                    with open(os.path.join(dirpath, name), encoding='utf-8', errors='ignore') as f:
+                        words.update(_WORD.findall(f.read()))
+    return words
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _compressed_variants(data):
+    """(확장자, 압축한 내용) - 원본보다 작을 때만"""
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data, quality=11)))
+    return [(ext, packed) for ext, packed in variants if len(packed) < len(data)]
+
+
+def build(static_folder, output_dir, purge_words=None):
+    """static_folder 의 파일을 내용 해시 이름으로 output_dir 에 복사하고 .gz/.br 과 manifest.json 을 쓴다.
+
+    purge_words 를 주면 CSS 에서 그 단어들에 없는 클래스의 규칙을 뺀다. 이전 빌드 파일은 지우지 않는다
+    (캐시된 페이지나 아직 배포 전인 워커가 옛 이름을 참조할 수 있다). {원래 이름: 해시 이름} 을 반환.
+    """
+    output_dir = os.path.abspath(output_dir)
+    manifest = {}
+    for dirpath, dirnames, filenames in os.walk(static_folder):
+        dirnames[:] = sorted(d for d in dirnames if os.path.abspath(os.path.join(dirpath, d)) != output_dir)
+        for name in sorted(filenames):
+            source = os.path.join(dirpath, name)
+            filename = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+            if purge_words is not None and name.endswith('.css'):
+                data = purge_css(data.decode('utf-8'), purge_words).encode('utf-8')
+            target = fingerprinted(filename, data)
+            path = os.path.join(output_dir, target)
+            if not os.path.exists(path):
+                _write(path, data)
+                if name.endswith(COMPRESSIBLE):
+                    for ext, packed in _compressed_variants(data):
+                        _write(path + ext, packed)
+            manifest[filename] = target
+
+    # 다른 워커가 반쯤 쓴 매니페스트를 읽지 않도록 임시 파일에 쓰고 바꾼다
+    temp = os.path.join(output_dir, MANIFEST + '.tmp')
+    with open(temp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp, os.path.join(output_dir, MANIFEST))
+    return manifest
+
+
+class StaticAssets:
+    """flask assets-build 로 만든 매니페스트를 읽어 asset_url() 이 해시 이름 주소를 돌려주게 한다.
+
+    - 해시 이름 파일은 /assets/ 에서 Accept-Encoding 에 맞는 .br/.gz 로, immutable 캐시 헤더와 함께 보낸다.
+      내용이 바뀌면 이름이 바뀌므로 재방문 시 브라우저는 CSS/JS 를 다시 요청하지 않는다.
+    - 매니페스트가 없거나(빌드 전) 목록에 없는 파일은 기존 /static/ 주소로 보낸다.
+    - 디버그 모드에서는 매니페스트가 바뀌면 다시 읽는다.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._lock = threading.Lock()
+        self._manifest = {}
+        self._mtime = None
+
+    def init_app(self, app):
+        app.config.setdefault('STATIC_ASSETS_DIR', os.path.join(app.static_folder, 'dist'))
+        app.config.setdefault('STATIC_ASSETS_MAX_AGE', 365 * 24 * 3600)
+        app.extensions['static_assets'] = self
+        self.app = app
+        self._mtime = None
+        self.reload()
+        app.add_template_global(self.url, 'asset_url')
+
+    @property
+    def directory(self):
+        return self.app.config['STATIC_ASSETS_DIR']
+
+    def reload(self):
+        """manifest.json 이 바뀌었으면 다시 읽는다."""
+        path = os.path.join(self.directory, MANIFEST)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        manifest = {}
+        if mtime is not None:
+            with open(path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        with self._lock:
+            self._manifest, self._mtime = manifest, mtime
+
+    def lookup(self, filename):
+        """filename 의 해시 이름 (빌드되지 않았으면 None)"""
+        if self.app.debug:
+            self.reload()
+        return self._manifest.get(filename)
+
+    def url(self, filename):
+        """템플릿의 url_for('static', filename=...) 대신 쓰는 주소"""
+        target = self.lookup(filename)
+        if target is None:
+            return url_for('static', filename=filename)
+        return url_for('asset.serve', filename=target)
+
+
+static_assets = StaticAssets()
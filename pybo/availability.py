@@ -0,0 +1,155 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, func
+
+from pybo import db, verification
+from pybo.models import User, UnverifiedUser
+
+
+class BloomFilter:
+    """값이 "확실히 없음" 또는 "있을 수도 있음" 만 답하는 비트 배열 (삭제는 지원하지 않는다)."""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        # 128비트 해시 하나를 둘로 나누어 hashes 개의 위치를 만든다 (double hashing)
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class AvailabilityIndex:
+    """User/UnverifiedUser 의 사용자ID·이메일(소문자)을 담은 프로세스 내 블룸 필터.
+
+    필터에 없으면 DB 를 보지 않고 "사용 가능" 으로 답하고, 있을 수도 있으면 DB 로 확인한다.
+    가입/인증/OAuth 가입 시 add() 로 바로 반영하고, 다른 워커에서 생긴 항목은
+    AVAILABILITY_REFRESH_INTERVAL 초마다 새로 생긴 행만 읽어 반영한다.
+    삭제된 항목은 필터에 남지만 DB 확인으로 걸러지며, 항목 수가 용량을 넘으면 다시 만든다.
+
+    다른 워커의 새 행이 반영되기 전이나 바뀐 행은 필터에 없을 수 있으므로 답은 참고용이다.
+    입력 중 확인(check_username) 에만 쓰고, 실제로 만들기 전에는 username_in_use() 처럼 DB 로 확인한다.
+    """
+
+    KINDS = ('username', 'email')
+
+    def __init__(self):
+        self.app = None
+        self._lock = threading.Lock()
+        self._filters = None
+        self._last_user_id = 0
+        self._pending_since = None
+        self._refreshed_at = 0.0
+
+    def init_app(self, app):
+        app.config.setdefault('AVAILABILITY_CAPACITY', 100000)
+        app.config.setdefault('AVAILABILITY_ERROR_RATE', 0.01)
+        app.config.setdefault('AVAILABILITY_REFRESH_INTERVAL', 10)
+        app.extensions['availability'] = self
+        self.app = app
+
+    def add(self, username=None, email=None):
+        """새로 생긴 사용자ID/이메일을 반영한다."""
+        with self._lock:
+            if self._filters is None:
+                return
+            for kind, value in (('username', username), ('email', email)):
+                if value:
+                    self._filters[kind].add(value.lower())
+
+    def maybe_taken(self, kind, value):
+        """False 면 DB 에 확실히 없다."""
+        self._ensure_fresh()
+        with self._lock:
+            return value.lower() in self._filters[kind]
+
+    def username_available(self, username):
+        """대소문자 구분 없이 User/UnverifiedUser 어디에도 없는 사용자ID 인지 (참고용 - check_username 에서 쓴다)"""
+        return not self.maybe_taken('username', username) or not self.username_in_use(username)
+
+    @staticmethod
+    def username_in_use(username):
+        """DB 에서 확인한다 (필터를 거치지 않는다). 대소문자 구분 없이 User 나 만료되지 않은 UnverifiedUser 에 있으면 True."""
+        for model in (User, UnverifiedUser):
+            query = db.session.query(model.id).filter(db.func.lower(model.username) == db.func.lower(username))
+            if model is UnverifiedUser:
+                # 만료된 인증 대기 가입은 사용자ID 를 잡고 있지 않다 (가입 시 verification.release 로 지운다)
+                query = verification.live(query)
+            if query.first():
+                return True
+        return False
+
+    def _ensure_fresh(self):
+        config = self.app.config
+        now = time.monotonic()
+        with self._lock:
+            filters = self._filters
+            due = now - self._refreshed_at >= config['AVAILABILITY_REFRESH_INTERVAL']
+        if filters is None or any(f.count > f.capacity for f in filters.values()):
+            self._rebuild()
+        elif due:
+            self._refresh()
+
+    def _rows(self, last_user_id, pending_since):
+        """(사용자ID, 이메일) - last_user_id 이후의 User 와 pending_since 이후에 생성/갱신된 UnverifiedUser"""
+        users = db.session.execute(
+            select(User.username, User.email).where(User.id > last_user_id).execution_options(yield_per=5000)
+        )
+        yield from users
+        pending = select(UnverifiedUser.username, UnverifiedUser.email)
+        if pending_since is not None:
+            pending = pending.where(UnverifiedUser.create_date >= pending_since)
+        yield from db.session.execute(pending)
+
+    def _watermarks(self):
+        # 워커 사이의 시계 차이를 감안해 조금 앞에서부터 다시 읽는다
+        return (db.session.scalar(select(func.max(User.id))) or 0,
+                datetime.utcnow() - timedelta(seconds=self.app.config['AVAILABILITY_REFRESH_INTERVAL'] + 5))
+
+    def _rebuild(self):
+        config = self.app.config
+        last_user_id, pending_since = self._watermarks()
+        total = db.session.scalar(select(func.count(User.id))) + db.session.scalar(select(func.count(UnverifiedUser.id)))
+        capacity = max(config['AVAILABILITY_CAPACITY'], total * 2)
+        filters = {kind: BloomFilter(capacity, config['AVAILABILITY_ERROR_RATE']) for kind in self.KINDS}
+        for username, email in self._rows(0, None):
+            filters['username'].add(username.lower())
+            if email:
+                filters['email'].add(email.lower())
+        with self._lock:
+            self._filters = filters
+            self._last_user_id, self._pending_since = last_user_id, pending_since
+            self._refreshed_at = time.monotonic()
+
+    def _refresh(self):
+        with self._lock:
+            last_user_id, pending_since = self._last_user_id, self._pending_since
+            self._refreshed_at = time.monotonic()
+        next_user_id, next_pending_since = self._watermarks()
+        rows = list(self._rows(last_user_id, pending_since))
+        with self._lock:
+            for username, email in rows:
+                self._filters['username'].add(username.lower())
+                if email:
+                    self._filters['email'].add(email.lower())
+            self._last_user_id, self._pending_since = next_user_id, next_pending_since
+
+
+availability = AvailabilityIndex()
@@ -0,0 +1,253 @@
+import hashlib
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from flask import current_app, request, session, make_response
+from flask_wtf.csrf import generate_csrf
+from markupsafe import Markup
+from werkzeug.utils import import_string
+
+
+class NullCache:
+    """아무것도 저장하지 않는 백엔드 (캐시 비활성화)"""
+
+    def get(self, key):
+        return None
+
+    def get_many(self, keys):
+        return [None] * len(keys)
+
+    def set(self, key, value, timeout=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class LRUCache:
+    """프로세스 내 LRU 캐시. 항목 수와 대략적인 크기(바이트)로 제한한다."""
+
+    def __init__(self, max_entries=1000, max_bytes=32 * 1024 * 1024, default_timeout=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_timeout = default_timeout
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+
+    @staticmethod
+    def _sizeof(value):
+        if isinstance(value, CacheEntry):
+            return len(value.html) + 256
+        if isinstance(value, (str, bytes)):
+            return len(value)
+        return 64
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, size, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def get_many(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, timeout=None):
+        timeout = timeout if timeout is not None else self.default_timeout
+        expires_at = time.monotonic() + timeout if timeout else None
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._data[key] = (value, size, expires_at)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._data)))
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+
+class CacheEntry:
+    """렌더링된 공용 HTML 조각과 생성 당시의 태그 버전"""
+
+    def __init__(self, html, tag_versions, meta=None):
+        self.html = html
+        self.tag_versions = tag_versions
+        self.meta = meta or {}
+        self.etag = hashlib.sha1(html.encode()).hexdigest()
+
+
+class PageCache:
+    """태그 기반 무효화를 지원하는 렌더링 결과 캐시.
+
+    항목은 저장 시점의 태그 버전을 함께 기록하고, invalidate() 는 태그의 버전을 바꾸기만 한다.
+    따라서 태그에 연결된 키 목록을 따로 관리하지 않아도 되고 어떤 key-value 백엔드에서도 동작한다.
+    (프로세스 내 LRU 백엔드는 워커마다 따로 유지되므로, 다른 워커의 변경은 PAGE_CACHE_TIMEOUT 후에 반영된다)
+    """
+
+    def __init__(self):
+        self.backend = NullCache()
+        self.timeout = None
+
+    def init_app(self, app):
+        app.config.setdefault('PAGE_CACHE_BACKEND', 'lru')
+        app.config.setdefault('PAGE_CACHE_MAX_ENTRIES', 1000)
+        app.config.setdefault('PAGE_CACHE_MAX_BYTES', 32 * 1024 * 1024)
+        app.config.setdefault('PAGE_CACHE_TIMEOUT', 60)
+        self.timeout = app.config['PAGE_CACHE_TIMEOUT']
+
+        backend = app.config['PAGE_CACHE_BACKEND']
+        if not backend or backend == 'null':
+            self.backend = NullCache()
+        elif backend == 'lru':
+            self.backend = LRUCache(app.config['PAGE_CACHE_MAX_ENTRIES'], app.config['PAGE_CACHE_MAX_BYTES'])
+        else:
+            # 'package.module:factory' 또는 'package.module.Class' 형태 - 호출 시 app 을 넘긴다
+            self.backend = import_string(backend.replace(':', '.'))(app)
+        app.extensions['page_cache'] = self
+
+    def _tag_versions(self, tags):
+        """태그들의 현재 버전. 목록 화면은 태그가 질문 수만큼 있으므로 백엔드에서 한 번에 읽는다."""
+        tags = list(tags)
+        get_many = getattr(self.backend, 'get_many', None)
+        keys = [f'tag:{tag}' for tag in tags]
+        versions = get_many(keys) if get_many is not None else [self.backend.get(key) for key in keys]
+        result = {}
+        for tag, key, version in zip(tags, keys, versions):
+            if version is None:
+                # 버전이 없거나 밀려났으면 새 버전을 만든다 -> 이전 항목은 모두 무효
+                version = uuid.uuid4().hex
+                self.backend.set(key, version, timeout=0)
+            result[tag] = version
+        return result
+
+    def get(self, key):
+        entry = self.backend.get(f'page:{key}')
+        if entry is None:
+            return None
+        if self._tag_versions(entry.tag_versions) != entry.tag_versions:
+            return None
+        return entry
+
+    def set(self, key, html, tags, meta=None):
+        entry = CacheEntry(html, self._tag_versions(tags), meta)
+        self.backend.set(f'page:{key}', entry, timeout=self.timeout)
+        return entry
+
+    def get_or_render(self, key, tags, render):
+        """캐시된 항목을 반환하고, 없으면 render() -> (html, meta) 로 만들어 저장한다.
+
+        meta 의 'tags' 는 렌더링 결과에 따라 정해지는 태그(예: 화면에 나온 질문)로, tags 에 더해 저장한다.
+        """
+        entry = self.get(key)
+        if entry is None:
+            html, meta = render()
+            entry = self.set(key, html, [*tags, *meta.pop('tags', ())], meta)
+        return entry
+
+    def get_or_compute(self, key, tags, compute):
+        """렌더링 결과가 아닌 작은 값(개수 등)을 같은 태그 방식으로 캐시한다."""
+        item = self.backend.get(f'value:{key}')
+        if item is not None:
+            value, tag_versions = item
+            if self._tag_versions(tag_versions) == tag_versions:
+                return value
+        # 계산하는 동안 무효화되면 다음 조회에서 다시 계산하도록 버전을 먼저 읽어 둔다
+        tag_versions = self._tag_versions(tags)
+        value = compute()
+        self.backend.set(f'value:{key}', (value, tag_versions), timeout=self.timeout)
+        return value
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            self.backend.set(f'tag:{tag}', uuid.uuid4().hex, timeout=0)
+
+    def respond(self, entry, render_page, *personal):
+        """공용 조각의 ETag 와 사용자별 값으로 ETag 를 붙이고 조건부 요청이면 304.
+
+        화면이 사용자마다 다르므로 Last-Modified 는 쓰지 않는다 (시각만으로는 사용자별 표시가 같은지 알 수 없다).
+        폼이 있는 화면은 form_token_state() 도 personal 에 넣어야 오래된 CSRF 토큰이 남지 않는다.
+        """
+        digest = hashlib.sha1(entry.etag.encode())
+        for part in personal:
+            digest.update(repr(part).encode())
+        etag = digest.hexdigest()
+
+        # 표시할 flash 메시지가 남아 있으면 반드시 새로 렌더링한다
+        if not session.get('_flashes'):
+            # 압축된 응답의 ETag 는 약한 ETag(W/) 로 바뀌므로 약한 비교를 한다
+            if request.if_none_match and request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+                response.set_etag(etag)
+                return response
+
+        response = make_response(render_page())
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+
+
+def form_token_state():
+    """ETag 에 넣을 CSRF 토큰 상태.
+
+    폼의 CSRF 토큰은 WTF_CSRF_TIME_LIMIT 가 지나면 거절되므로, 304 로 예전 페이지(예전 토큰)를 계속 쓰지 않도록
+    세션의 토큰과 제한 시간의 절반 단위 시각을 넣는다. 304 로 다시 쓴 토큰도 제한 시간의 절반 이상 남는다.
+    """
+    config = current_app.config
+    if not config.get('WTF_CSRF_ENABLED', True):
+        return None
+    generate_csrf()  # 세션에 토큰이 없으면 만든다
+    limit = config.get('WTF_CSRF_TIME_LIMIT', 3600)
+    window = int(time.time() // (limit / 2)) if limit else 0
+    return session.get(config.get('WTF_CSRF_FIELD_NAME', 'csrf_token')), window
+
+
+_PERSONAL_MARKER = re.compile(r'<!--@if (\w+) (\d+)-->(.*?)<!--@else-->(.*?)<!--@endif-->', re.S)
+_VALUE_MARKER = re.compile(r'<!--@value (\w+)-->')
+
+
+def personalize(html, values=None, **id_sets):
+    """공용 조각의 사용자별 표시를 채운다.
+
+    <!--@if liked_question 12-->A<!--@else-->B<!--@endif--> 는 12 가 id_sets['liked_question'] 에
+    있으면 A, 아니면 B 가 되고, <!--@value name--> 는 values['name'] 로 바뀐다.
+    사용자 입력은 자동 이스케이프되므로('<' -> '&lt;') 이 표시를 만들어낼 수 없다.
+    """
+    values = values or {}
+
+    def choose(match):
+        return match.group(3) if int(match.group(2)) in id_sets.get(match.group(1), ()) else match.group(4)
+
+    html = _PERSONAL_MARKER.sub(choose, html)
+    html = _VALUE_MARKER.sub(lambda match: str(values.get(match.group(1), '')), html)
+    return Markup(html)
+
+
+page_cache = PageCache()
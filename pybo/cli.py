@@ -0,0 +1,200 @@
+import warnings
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func, select, inspect
+from sqlalchemy.exc import SAWarning
+
+from pybo import assets, db, ranking, search, verification
+from pybo.email_utils import mail_queue
+from pybo.view_tracker import compact_views
+from pybo.models import Question, Answer, QuestionLike, QuestionBookmark, AnswerLike, AnswerBookmark, EmailDelivery
+
+
+def _count_of(model, fk_column, parent_id):
+    return select(func.count(model.id)).where(fk_column == parent_id).scalar_subquery()
+
+
+def recount_counters():
+    """반응/답변 테이블에서 카운터 컬럼을 다시 계산한다. (질문 수, 답변 수) 를 반환."""
+    question_updates = {
+        Question.like_count: _count_of(QuestionLike, QuestionLike.question_id, Question.id),
+        Question.bookmark_count: _count_of(QuestionBookmark, QuestionBookmark.question_id, Question.id),
+        Question.answer_count: _count_of(Answer, Answer.question_id, Question.id),
+    }
+    answer_updates = {
+        Answer.like_count: _count_of(AnswerLike, AnswerLike.answer_id, Answer.id),
+        Answer.bookmark_count: _count_of(AnswerBookmark, AnswerBookmark.answer_id, Answer.id),
+    }
+    questions = Question.query.update(question_updates, synchronize_session=False)
+    answers = Answer.query.update(answer_updates, synchronize_session=False)
+    db.session.commit()
+    return questions, answers
+
+
+@click.command('recount')
+@with_appcontext
+def recount_command():
+    """Recompute like/bookmark/answer counter columns from the reaction tables."""
+    questions, answers = recount_counters()
+    click.echo(f'Recounted {questions} questions and {answers} answers.')
+
+
+def _index_names(conn):
+    # SQLite 리플렉션은 식 인덱스(lower(...))를 건너뛰므로 sqlite_master 에서 직접 읽는다
+    if conn.dialect.name == 'sqlite':
+        return set(conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'").scalars())
+    inspector = inspect(conn)
+    return {index['name'] for table in inspector.get_table_names() for index in inspector.get_indexes(table)}
+
+
+def _index_columns(inspector, table_name):
+    """컬럼 인덱스의 이름 -> 컬럼 이름 목록 (식 인덱스는 리플렉션되지 않으므로 빠진다)"""
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', 'Skipped unsupported reflection', SAWarning)
+        indexes = inspector.get_indexes(table_name)
+    return {index['name']: list(index['column_names']) for index in indexes if None not in index['column_names']}
+
+
+@click.command('create-indexes')
+@with_appcontext
+def create_indexes_command():
+    """Create any model index missing from an existing database, and recreate ones whose columns changed."""
+    created = recreated = 0
+    with db.engine.begin() as conn:
+        inspector = inspect(conn)
+        tables = set(inspector.get_table_names())
+        existing = _index_names(conn)
+        for table in db.metadata.sorted_tables:
+            if table.name not in tables:
+                continue
+            columns = _index_columns(inspector, table.name)
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if index.name not in existing:
+                    index.create(conn)
+                    click.echo(f'Created {index.name}')
+                    created += 1
+                elif index.name in columns and columns[index.name] != [column.name for column in index.columns]:
+                    index.drop(conn)
+                    index.create(conn)
+                    click.echo(f'Recreated {index.name}')
+                    recreated += 1
+    click.echo(f'Created {created} indexes, recreated {recreated}.')
+
+
+@click.command('check-indexes')
+@with_appcontext
+def check_indexes_command():
+    """Check with EXPLAIN QUERY PLAN that the hot queries use their indexes."""
+    # 테스트 도우미는 이 명령에서만 쓰므로 다른 명령/앱 시작 때는 불러오지 않는다
+    from pybo import testing
+
+    if db.engine.dialect.name != 'sqlite':
+        raise click.ClickException('EXPLAIN QUERY PLAN check requires SQLite.')
+    failed = 0
+    for name, statement, index in testing.hot_queries():
+        try:
+            testing.assert_uses_index(statement, index)
+        except testing.MissingIndex as e:
+            failed += 1
+            click.echo(f'FAIL {name}: {e}')
+        else:
+            click.echo(f'ok   {name} ({index})')
+    if failed:
+        raise click.ClickException(f'{failed} queries do not use their index.')
+
+
+@click.command('search-reindex')
+@with_appcontext
+def search_reindex_command():
+    """Create the full-text search index and rebuild it from the question table."""
+    if db.engine.dialect.name != 'sqlite':
+        raise click.ClickException('Full-text search index requires SQLite FTS5.')
+    total = search.rebuild_index()
+    click.echo(f'Indexed {total} questions.')
+
+
+@click.command('sweep-signups')
+@click.option('--batch-size', type=int, default=500, show_default=True, help='Rows per transaction.')
+@click.option('--max-batches', type=int, default=None, help='Stop after this many batches.')
+@click.option('--pause', type=float, default=0.0, show_default=True, help='Seconds to sleep between batches.')
+@with_appcontext
+def sweep_signups_command(batch_size, max_batches, pause):
+    """Delete pending (unverified) signups older than SIGNUP_TOKEN_MAX_AGE."""
+    total, batches = verification.sweep_expired(batch_size=batch_size, max_batches=max_batches, pause=pause)
+    click.echo(f'Deleted {total} expired signups in {batches} batches.')
+
+
+@click.command('mail-requeue')
+@with_appcontext
+def mail_requeue_command():
+    """Send emails left queued (failed attempts, or lost when a worker process stopped)."""
+    redacted = mail_queue.redact_finished()
+    if redacted:
+        click.echo(f'Redacted the body of {redacted} sent or failed emails.')
+    delivery_ids = mail_queue.requeue(deliver=True)
+    sent = EmailDelivery.query.filter(EmailDelivery.id.in_(delivery_ids), EmailDelivery.status == 'sent').count()
+    click.echo(f'Sent {sent} of {len(delivery_ids)} queued emails.')
+
+
+@click.command('hot-refresh')
+@click.option('--batch-size', type=int, default=1000, show_default=True, help='Questions per transaction.')
+@with_appcontext
+def hot_refresh_command(batch_size):
+    """Recompute the "hot" sort score of every question from views, likes, bookmarks and answers."""
+    total = ranking.refresh(batch_size=batch_size)
+    click.echo(f'Scored {total} questions.')
+
+
+@click.command('assets-build')
+@click.option('--purge/--no-purge', default=False, show_default=True,
+              help='Drop CSS rules for classes the templates and scripts never use.')
+@with_appcontext
+def assets_build_command(purge):
+    """Write content-hashed copies of the static files with .gz/.br variants and a manifest."""
+    app = current_app
+    words = assets.used_words(app.root_path) if purge else None
+    manifest = assets.build(app.static_folder, app.config['STATIC_ASSETS_DIR'], purge_words=words)
+    if assets.brotli is None:
+        click.echo('brotli is not installed; wrote .gz variants only (pip install brotli).')
+    app.extensions['static_assets'].reload()
+    for filename, target in sorted(manifest.items()):
+        click.echo(f'{filename} -> {target}')
+    click.echo(f'Built {len(manifest)} assets.')
+
+
+@click.command('compact-views')
+@click.option('--older-than', type=int, default=None,
+              help='Roll up views older than this many seconds (default: VIEW_DEDUP_WINDOW).')
+@click.option('--batch-size', type=int, default=1000, show_default=True, help='Rows per transaction.')
+@click.option('--max-batches', type=int, default=None, help='Stop after this many batches.')
+@click.option('--pause', type=float, default=0.0, show_default=True, help='Seconds to sleep between batches.')
+@with_appcontext
+def compact_views_command(older_than, batch_size, max_batches, pause):
+    """Roll up old question_view rows into per-day counts and delete them."""
+    if older_than is None:
+        older_than = current_app.config['VIEW_DEDUP_WINDOW']
+    total, batches = compact_views(older_than, batch_size=batch_size, max_batches=max_batches, pause=pause)
+    click.echo(f'Compacted {total} views in {batches} batches.')
+
+
+def init_app(app):
+    app.cli.add_command(recount_command)
+    app.cli.add_command(create_indexes_command)
+    app.cli.add_command(check_indexes_command)
+    app.cli.add_command(search_reindex_command)
+    app.cli.add_command(compact_views_command)
+    app.cli.add_command(hot_refresh_command)
+    app.cli.add_command(sweep_signups_command)
+    app.cli.add_command(mail_requeue_command)
+    app.cli.add_command(assets_build_command)
+
+    # 벤치마크 도구 (소스 트리에서 실행할 때만 있음)
+    try:
+        from benchmarks.cli import bench_command
+    except ModuleNotFoundError as e:
+        if e.name != 'benchmarks':
+            raise
+        return
+    app.cli.add_command(bench_command)
@@ -0,0 +1,141 @@
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pip install brotli 가 없으면 gzip 만 쓴다
+    brotli = None
+
+
+class GzipStream:
+    def __init__(self, level):
+        # wbits 31 = gzip 헤더/트레일러
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliStream:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def compressor(encoding, level):
+    return BrotliStream(level) if encoding == 'br' else GzipStream(level)
+
+
+def compress(encoding, level, data):
+    stream = compressor(encoding, level)
+    return stream.compress(data) + stream.finish()
+
+
+def compress_iter(encoding, level, chunks):
+    """스트리밍 응답을 조각마다 압축해 바로 내보낸다 (본문 전체를 모으지 않는다).
+
+    조각마다 flush 하므로 조각을 나눈 뜻(먼저 보여줄 부분)이 유지된다. 원래 응답의 close() 는 끝나면 부른다.
+    """
+    stream = compressor(encoding, level)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            if chunk:
+                yield stream.compress(chunk) + stream.flush()
+        yield stream.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+class Compression:
+    """동적 응답(HTML/JSON 등)을 요청의 Accept-Encoding 에 맞춰 brotli 또는 gzip 으로 압축한다.
+
+    - COMPRESS_MIMETYPES 의 응답만, 본문이 COMPRESS_MIN_SIZE 바이트 이상일 때만 압축한다.
+      스트리밍 응답은 크기를 미리 알 수 없으므로 항상 조각 단위로 압축한다.
+    - 이미 Content-Encoding 이 있는 응답(/assets/ 의 미리 압축한 파일), 파일 응답, 206/304,
+      Cache-Control: no-transform 은 건드리지 않는다.
+    - 압축하면 바이트가 달라지므로 ETag 는 약한(W/) ETag 로 바꾼다. 조건부 요청은 약한 비교로 처리한다.
+    - 압축 수준은 요청마다 CPU 를 쓰므로 flask bench compression 결과로 정한다 (COMPRESS_GZIP_LEVEL, COMPRESS_BR_LEVEL).
+    """
+
+    def __init__(self):
+        self.app = None
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_ALGORITHMS', ('br', 'gzip'))
+        app.config.setdefault('COMPRESS_GZIP_LEVEL', 6)
+        app.config.setdefault('COMPRESS_BR_LEVEL', 4)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+        app.config.setdefault('COMPRESS_MIMETYPES', (
+            'text/html', 'text/css', 'text/plain', 'text/javascript', 'application/javascript',
+            'application/json', 'image/svg+xml',
+        ))
+        app.extensions['compression'] = self
+        self.app = app
+        if app.config['COMPRESS_ENABLED']:
+            app.after_request(self._compress)
+
+    def algorithms(self):
+        return [name for name in self.app.config['COMPRESS_ALGORITHMS'] if name != 'br' or brotli is not None]
+
+    def level(self, encoding):
+        config = self.app.config
+        return config['COMPRESS_BR_LEVEL'] if encoding == 'br' else config['COMPRESS_GZIP_LEVEL']
+
+    def choose(self, accept_encodings):
+        """받을 수 있다고 한 인코딩 중 품질값이 가장 높은 것 (같으면 COMPRESS_ALGORITHMS 순서), 없으면 None"""
+        best, best_quality = None, 0
+        for name in self.algorithms():
+            quality = accept_encodings[name]
+            if quality > best_quality:
+                best, best_quality = name, quality
+        return best
+
+    def _compress(self, response):
+        if response.status_code < 200 or response.status_code in (204, 206, 304) \
+                or response.direct_passthrough or 'Content-Encoding' in response.headers \
+                or response.mimetype not in self.app.config['COMPRESS_MIMETYPES'] \
+                or response.cache_control.no_transform:
+            return response
+        streamed = response.is_streamed
+        if not streamed and len(response.get_data()) < self.app.config['COMPRESS_MIN_SIZE']:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = self.choose(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        level = self.level(encoding)
+        if streamed:
+            response.response = compress_iter(encoding, level, response.response)
+            response.headers.pop('Content-Length', None)
+        else:
+            response.set_data(compress(encoding, level, response.get_data()))
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag is not None and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+compression = Compression()
@@ -0,0 +1,77 @@
+import math
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from pybo import db
+
+
+def _profile(app):
+    profile = app.config['DATABASE_PROFILE']
+    if profile == 'auto':
+        backend = make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name()
+        profile = 'sqlite' if backend == 'sqlite' else 'server'
+    return profile
+
+
+def configure(app):
+    """DB 종류에 맞는 엔진 옵션을 채운다. db.init_app() 보다 먼저 호출해야 한다.
+
+    SQLALCHEMY_ENGINE_OPTIONS 에 직접 지정한 값이 우선한다.
+    """
+    app.config.setdefault('DATABASE_PROFILE', 'auto')
+    app.config.setdefault('SQLITE_PRAGMAS', {})
+    app.config.setdefault('DB_POOL_SIZE', 5)
+    app.config.setdefault('DB_MAX_OVERFLOW', 10)
+    app.config.setdefault('DB_POOL_TIMEOUT', 30)
+    app.config.setdefault('DB_POOL_RECYCLE', 1800)
+    app.config.setdefault('DB_POOL_PRE_PING', True)
+
+    if _profile(app) == 'server':
+        options = {
+            'pool_size': app.config['DB_POOL_SIZE'],
+            'max_overflow': app.config['DB_MAX_OVERFLOW'],
+            'pool_timeout': app.config['DB_POOL_TIMEOUT'],
+            'pool_recycle': app.config['DB_POOL_RECYCLE'],
+            'pool_pre_ping': app.config['DB_POOL_PRE_PING'],
+        }
+        options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def init_app(app):
+    """SQLite 프로필이면 새 연결마다 SQLITE_PRAGMAS 를 적용하고 수학 함수를 준비한다."""
+    if _profile(app) != 'sqlite':
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name != 'sqlite':
+                continue
+            # 연결할 때 읽으므로 엔진마다 따로 복사한다 (메모리 DB 에서 뺀 값이 다른 엔진에 영향을 주지 않도록)
+            pragmas = dict(app.config['SQLITE_PRAGMAS'])
+            if engine.url.database in (None, '', ':memory:'):
+                # 메모리 DB 는 WAL 을 쓸 수 없다
+                pragmas.pop('journal_mode', None)
+            event.listen(engine, 'connect', _sqlite_pragmas(pragmas))
+            event.listen(engine, 'connect', _sqlite_math_functions)
+
+
+def _sqlite_pragmas(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
+    return set_pragmas
+
+
+def _sqlite_math_functions(dbapi_connection, connection_record):
+    # exp()/ln() (pybo.ranking) 은 SQLITE_ENABLE_MATH_FUNCTIONS 로 빌드된 SQLite 에만 있다
+    try:
+        dbapi_connection.execute('SELECT exp(0), ln(1)')
+    except sqlite3.OperationalError:
+        dbapi_connection.create_function('exp', 1, math.exp, deterministic=True)
+        dbapi_connection.create_function('ln', 1, math.log, deterministic=True)
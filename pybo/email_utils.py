@@ -1,46 +1,282 @@
 import smtplib
 import os
+import queue
+import threading
+from datetime import datetime, timedelta
 from email.mime.text import MIMEText
 from flask import current_app
+from sqlalchemy import select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from pybo import db
+from pybo.models import EmailDelivery
+
+
+# 보냈거나 포기한 메일의 본문 대신 남기는 값 (인증 링크 등 비밀 값이 DB 에 남지 않도록)
+REDACTED_BODY = '[redacted]'
+
+
+def _smtp_settings(app_cfg):
+    """SMTP 설정을 모은다. 서버/포트/계정이 하나라도 없으면 None."""
+    settings = {
+        'server': app_cfg.get('MAIL_SERVER') or os.environ.get('MAIL_SERVER'),
+        'port': int(app_cfg.get('MAIL_PORT') or os.environ.get('MAIL_PORT') or 0),
+        'username': app_cfg.get('MAIL_USERNAME') or os.environ.get('MAIL_USERNAME'),
+        'password': app_cfg.get('MAIL_PASSWORD') or os.environ.get('MAIL_PASSWORD'),
+        'use_tls': bool(app_cfg.get('MAIL_USE_TLS') or os.environ.get('MAIL_USE_TLS')),
+    }
+    if not settings['server'] or not settings['port'] or not settings['username'] or not settings['password']:
+        return None
+    settings['from_addr'] = app_cfg.get('MAIL_DEFAULT_SENDER') or settings['username'] \
+        or f"no-reply@{os.environ.get('HOSTNAME','localhost')}"
+    return settings
+
+
+class MailQueue:
+    """메일 발송 대기열.
+
+    요청 처리 중에는 email_delivery 에 기록하고 대기열에 넣기만 한다. 워커 스레드(MAIL_QUEUE_WORKERS 개)가
+    각자 로그인된 SMTP 연결을 유지하면서 최대 MAIL_BATCH_SIZE 개씩 묶어 보내고, 실패하면
+    MAIL_RETRY_BACKOFF * 2^n 초 뒤 MAIL_MAX_RETRIES 번까지 다시 시도한다.
+    MAIL_QUEUE_WORKERS 가 0 이면 호출한 스레드에서 바로 한 번만 보낸다 (요청 스레드에서 기다리지 않는다).
+    실패한 메일은 queued 로 남아 flask mail-requeue 로 다시 보낸다.
+
+    - 보내기 전에 queued -> sending 으로 바꾸는 UPDATE 로 메일을 가져가므로, 여러 프로세스가 같은
+      메일을 대기열에 넣어도 한 번만 보낸다.
+    - 프로세스가 재시작되면 메모리의 대기열/재시도 타이머는 사라진다. 워커 모드에서는 재시작 후 첫 요청 때
+      백그라운드 스레드가 queued 로 남은 메일과 MAIL_CLAIM_TIMEOUT 초 넘게 sending 인 메일(보내는 중에 죽은 프로세스)을
+      다시 대기열에 넣는다 (requeue).
+    - 본문(인증 링크의 토큰 등)은 보내는 데만 필요하므로 sent/failed 가 되면 REDACTED_BODY 로 지운다.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._queue = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._resumed = False
+
+    def init_app(self, app):
+        app.config.setdefault('MAIL_QUEUE_WORKERS', 2)
+        app.config.setdefault('MAIL_BATCH_SIZE', 20)
+        app.config.setdefault('MAIL_MAX_RETRIES', 5)
+        app.config.setdefault('MAIL_RETRY_BACKOFF', 2.0)
+        app.config.setdefault('MAIL_TIMEOUT', 10)
+        # 이 시간(초) 동안 보낼 메일이 없으면 SMTP 연결을 닫는다
+        app.config.setdefault('MAIL_CONNECTION_IDLE', 60)
+        # sending 상태로 이 시간(초)이 지나면 보내던 프로세스가 죽은 것으로 보고 다시 보낸다
+        app.config.setdefault('MAIL_CLAIM_TIMEOUT', 600)
+        app.config.setdefault('MAIL_QUEUE_RESUME', True)
+        app.extensions['mail_queue'] = self
+        self.app = app
+        self._resumed = False
+        # CLI 명령(flask db upgrade 등)에서는 테이블이 아직 없을 수 있으므로 첫 요청에서 한다
+        if app.config['MAIL_QUEUE_WORKERS'] > 0 and app.config['MAIL_QUEUE_RESUME']:
+            app.before_request(self._resume)
+
+    def enqueue(self, to_email, subject, body):
+        """메일을 기록하고 대기열에 넣는다. EmailDelivery 를 반환."""
+        delivery = EmailDelivery(to_email=to_email, subject=subject, body=body, status='queued',
+                                 create_date=datetime.utcnow())
+        db.session.add(delivery)
+        db.session.commit()
+
+        if self.app.config['MAIL_QUEUE_WORKERS'] <= 0:
+            self.deliver_now([delivery.id])
+        else:
+            self._queue.put(delivery.id)
+            self._ensure_workers()
+        return delivery
+
+    def deliver_now(self, delivery_ids):
+        """호출한 스레드에서 묶음 단위로 한 번씩 보낸다 (재시도는 하지 않는다)."""
+        connection = None
+        try:
+            for i in range(0, len(delivery_ids), self.app.config['MAIL_BATCH_SIZE']):
+                connection = self._deliver(delivery_ids[i:i + self.app.config['MAIL_BATCH_SIZE']], connection)
+        finally:
+            self._close(connection)
+
+    def requeue(self, deliver=False):
+        """보내지 못하고 남은 메일(queued, 오래된 sending)을 다시 보낸다. 메일 id 목록을 반환.
+
+        워커 모드에서는 대기열에 넣고, 워커가 없거나 deliver=True 이면 호출한 스레드에서 바로 보낸다.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.app.config['MAIL_CLAIM_TIMEOUT'])
+        db.session.execute(
+            update(EmailDelivery)
+            .where(EmailDelivery.status == 'sending', EmailDelivery.claimed_at < cutoff)
+            .values(status='queued')
+        )
+        db.session.commit()
+        delivery_ids = list(db.session.scalars(
+            select(EmailDelivery.id).where(EmailDelivery.status == 'queued').order_by(EmailDelivery.id)
+        ))
+        if deliver or self.app.config['MAIL_QUEUE_WORKERS'] <= 0:
+            self.deliver_now(delivery_ids)
+        elif delivery_ids:
+            for delivery_id in delivery_ids:
+                self._queue.put(delivery_id)
+            self._ensure_workers()
+        return delivery_ids
+
+    def redact_finished(self):
+        """보냈거나 포기한 메일 중 본문이 남아 있는 것(이전 버전이 남긴 행)의 본문을 지운다. 지운 수를 반환."""
+        result = db.session.execute(
+            update(EmailDelivery)
+            .where(EmailDelivery.status.in_(('sent', 'failed')), EmailDelivery.body != REDACTED_BODY)
+            .values(body=REDACTED_BODY)
+        )
+        db.session.commit()
+        return result.rowcount
+
+    def _resume(self):
+        """프로세스의 첫 요청에서 한 번, 남은 메일을 백그라운드 스레드에서 다시 대기열에 넣는다."""
+        if self._resumed:
+            return
+        with self._lock:
+            if self._resumed:
+                return
+            self._resumed = True
+        threading.Thread(target=self._requeue_pending, name='mail-queue-resume', daemon=True).start()
+
+    def _requeue_pending(self):
+        with self.app.app_context():
+            try:
+                delivery_ids = self.requeue()
+            except SQLAlchemyError:
+                db.session.rollback()
+                self.app.logger.exception('Could not requeue undelivered emails')
+                return
+            if delivery_ids:
+                self.app.logger.info(f'Requeued {len(delivery_ids)} undelivered emails')
+
+    def _ensure_workers(self):
+        with self._lock:
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            for i in range(len(self._workers), self.app.config['MAIL_QUEUE_WORKERS']):
+                worker = threading.Thread(target=self._run, name=f'mail-queue-{i}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _run(self):
+        connection = None
+        while True:
+            try:
+                delivery_id = self._queue.get(timeout=self.app.config['MAIL_CONNECTION_IDLE'])
+            except queue.Empty:
+                self._close(connection)
+                connection = None
+                continue
+
+            batch = [delivery_id]
+            while len(batch) < self.app.config['MAIL_BATCH_SIZE']:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with self.app.app_context():
+                    connection = self._deliver(batch, connection)
+            except Exception:
+                self.app.logger.exception('Mail queue worker failed')
+                self._close(connection)
+                connection = None
+
+    def _connect(self, settings):
+        server = smtplib.SMTP(settings['server'], settings['port'], timeout=self.app.config['MAIL_TIMEOUT'])
+        if settings['use_tls']:
+            server.starttls()
+        server.login(settings['username'], settings['password'])
+        return server
+
+    @staticmethod
+    def _close(connection):
+        if connection is None:
+            return
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.close()
+
+    def _deliver(self, delivery_ids, connection):
+        """한 연결로 묶음을 보내고 상태를 기록한다. 다음 묶음에 쓸 연결을 반환."""
+        config = self.app.config
+        settings = _smtp_settings(config)
+        # 다른 워커/프로세스가 이미 가져간(보내는 중이거나 보낸) 메일은 건너뛴다
+        claimed = db.session.scalars(
+            update(EmailDelivery)
+            .where(EmailDelivery.id.in_(delivery_ids), EmailDelivery.status == 'queued')
+            .values(status='sending', claimed_at=datetime.utcnow(), attempts=EmailDelivery.attempts + 1)
+            .returning(EmailDelivery.id)
+        ).all()
+        db.session.commit()
+        deliveries = EmailDelivery.query.filter(EmailDelivery.id.in_(claimed)).order_by(EmailDelivery.id).all()
+        retry = []
+        for delivery in deliveries:
+            try:
+                if settings is None:
+                    raise smtplib.SMTPException('SMTP is not configured')
+                if connection is None:
+                    connection = self._connect(settings)
+                msg = MIMEText(delivery.body)
+                msg['Subject'] = delivery.subject
+                msg['From'] = settings['from_addr']
+                msg['To'] = delivery.to_email
+                connection.sendmail(settings['from_addr'], [delivery.to_email], msg.as_string())
+            except (smtplib.SMTPException, OSError) as e:
+                # 연결 문제일 수 있으므로 다음 메일은 새 연결로 보낸다
+                self._close(connection)
+                connection = None
+                delivery.last_error = str(e)[:500]
+                if delivery.attempts >= config['MAIL_MAX_RETRIES']:
+                    delivery.status = 'failed'
+                    delivery.body = REDACTED_BODY
+                    current_app.logger.error(f'Giving up on email {delivery.id} to {delivery.to_email}: {e}')
+                else:
+                    delivery.status = 'queued'
+                    retry.append((delivery.id, config['MAIL_RETRY_BACKOFF'] * 2 ** (delivery.attempts - 1)))
+            else:
+                delivery.status = 'sent'
+                delivery.sent_at = datetime.utcnow()
+                delivery.last_error = None
+                delivery.body = REDACTED_BODY
+        db.session.commit()
+
+        if config['MAIL_QUEUE_WORKERS'] <= 0:
+            # 요청 스레드에서 기다리지 않는다 - queued 로 남겨 두고 flask mail-requeue 로 다시 보낸다
+            for delivery_id, _ in retry:
+                current_app.logger.warning(f'Email {delivery_id} was not sent; run flask mail-requeue to retry')
+            return connection
+        for delivery_id, delay in retry:
+            timer = threading.Timer(delay, self._queue.put, args=(delivery_id,))
+            timer.daemon = True
+            timer.start()
+        return connection
+
+
+mail_queue = MailQueue()
 
 
 def send_verification_email(to_email: str, verify_url: str) -> bool:
-    """Send verification email. Returns True if email was sent, False otherwise.
+    """Queue verification email. Returns True if the email was queued, False otherwise.
 
     If mail server settings are not configured, the verify URL is printed to the app logger
     and returned as False so the caller can fall back to developer-friendly behavior.
     """
-    app_cfg = current_app.config
-    mail_server = app_cfg.get('MAIL_SERVER') or os.environ.get('MAIL_SERVER')
-    mail_port = int(app_cfg.get('MAIL_PORT') or os.environ.get('MAIL_PORT') or 0)
-    mail_user = app_cfg.get('MAIL_USERNAME') or os.environ.get('MAIL_USERNAME')
-    mail_pass = app_cfg.get('MAIL_PASSWORD') or os.environ.get('MAIL_PASSWORD')
-    mail_use_tls = bool(app_cfg.get('MAIL_USE_TLS') or os.environ.get('MAIL_USE_TLS'))
-    from_addr = app_cfg.get('MAIL_DEFAULT_SENDER') or mail_user or f"no-reply@{os.environ.get('HOSTNAME','localhost')}"
-
     subject = '계정 인증 안내'
     body = f'안녕하세요. 아래 링크를 클릭하여 이메일 인증을 완료해주세요.\n\n{verify_url}\n\n(이 링크은 24시간 동안 유효합니다.)'
 
     # If SMTP is not configured, log/print the link and return False
-    if not mail_server or not mail_port or not mail_user or not mail_pass:
+    if _smtp_settings(current_app.config) is None:
         current_app.logger.info(f'Email verification link for {to_email}: {verify_url}')
         print(f'Email verification link for {to_email}: {verify_url}')
         return False
 
-    msg = MIMEText(body)
-    msg['Subject'] = subject
-    msg['From'] = from_addr
-    msg['To'] = to_email
-
     try:
-        server = smtplib.SMTP(mail_server, mail_port, timeout=10)
-        if mail_use_tls:
-            server.starttls()
-        server.login(mail_user, mail_pass)
-        server.sendmail(from_addr, [to_email], msg.as_string())
-        server.quit()
+        mail_queue.enqueue(to_email, subject, body)
         return True
     except Exception as e:
-        current_app.logger.exception('Failed to send verification email')
-        print('Failed to send verification email:', e)
+        current_app.logger.exception('Failed to queue verification email')
+        print('Failed to queue verification email:', e)
         return False
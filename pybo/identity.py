@@ -0,0 +1,99 @@
+import threading
+import time
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from pybo import db
+from pybo.models import User
+from pybo.routing import RoutingSession
+
+
+class IdentityCache:
+    """로그인 사용자 정보를 요청 사이에 잠시(IDENTITY_CACHE_TTL 초) 보관한다.
+
+    컬럼 값만 보관하고, 요청마다 SELECT 없이 현재 세션에 붙인 User 객체를 돌려준다.
+    세션으로 User 를 바꾸거나 지우면 커밋할 때 그 사용자의 항목을 지운다
+    (session.execute(update(User)...) 처럼 flush 를 거치지 않으면 전부 지운다).
+    """
+
+    def __init__(self):
+        self.ttl = 0
+        self.max_entries = 10000
+        self._lock = threading.Lock()
+        self._data = {}  # user_id -> (만료 시각, 컬럼 값)
+
+    def init_app(self, app):
+        app.config.setdefault('IDENTITY_CACHE_TTL', 30)
+        app.config.setdefault('IDENTITY_CACHE_MAX_ENTRIES', 10000)
+        self.ttl = app.config['IDENTITY_CACHE_TTL']
+        self.max_entries = app.config['IDENTITY_CACHE_MAX_ENTRIES']
+        app.extensions['identity_cache'] = self
+        self.clear()
+
+    def load_user(self, user_id):
+        """user_id 의 User 를 반환한다 (없으면 None)."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._data.get(user_id)
+        if cached is not None and cached[0] > now:
+            user = User(**cached[1])
+            make_transient_to_detached(user)
+            return db.session.merge(user, load=False)
+
+        user = db.session.get(User, user_id)
+        if user is not None and self.ttl > 0:
+            values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+            with self._lock:
+                if len(self._data) >= self.max_entries:
+                    self._data = {key: item for key, item in self._data.items() if item[0] > now}
+                    if len(self._data) >= self.max_entries:
+                        self._data.clear()
+                self._data[user_id] = (now + self.ttl, values)
+        return user
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+identity_cache = IdentityCache()
+
+# 커밋 전에 지우면 다른 요청이 아직 커밋되지 않은 옛 값을 다시 캐시할 수 있으므로 커밋한 뒤에 지운다
+_CHANGED = 'identity_cache_changed'
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    changed = {obj.id for obj in (*session.dirty, *session.deleted) if isinstance(obj, User)}
+    if changed and session.info.get(_CHANGED, ()) is not None:
+        session.info.setdefault(_CHANGED, set()).update(changed)
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _collect_bulk_changes(orm_execute_state):
+    state = orm_execute_state
+    if (state.is_update or state.is_delete) and state.bind_mapper is not None \
+            and state.bind_mapper.class_ is User:
+        state.session.info[_CHANGED] = None  # 어떤 사용자가 바뀌었는지 모른다
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _invalidate_changed_users(session):
+    if _CHANGED not in session.info:
+        return
+    changed = session.info.pop(_CHANGED)
+    if changed is None:
+        identity_cache.clear()
+    else:
+        for user_id in changed:
+            identity_cache.invalidate(user_id)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_changed_users(session):
+    session.info.pop(_CHANGED, None)
@@ -0,0 +1,143 @@
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, request, jsonify, current_app, has_request_context, before_render_template, template_rendered
+from sqlalchemy import event
+
+from pybo import db
+
+# 응답 시간 히스토그램 구간 상한 (ms)
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q):
+        """구간 상한으로 근사한 분위수 (마지막 구간이면 '+Inf')"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS[:-1], self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return '+Inf'
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum_ms': round(self.total, 3),
+            'buckets': {('+Inf' if bound == float('inf') else str(bound)): count
+                        for bound, count in zip(BUCKETS, self.counts)},
+            'p50_ms': self.quantile(0.5),
+            'p95_ms': self.quantile(0.95),
+            'p99_ms': self.quantile(0.99),
+        }
+
+
+class Instrumentation:
+    """요청별 SQL 문 수/시간 측정, 느린 쿼리 로그, Server-Timing 헤더, 엔드포인트별 지연 시간 히스토그램.
+
+    SQL_INSTRUMENTATION 이 꺼져 있으면 아무 훅도 등록하지 않는다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}  # endpoint -> {'latency': Histogram, 'db': Histogram, 'queries': int}
+        self.slow_query_ms = 0
+
+    def init_app(self, app):
+        app.config.setdefault('SQL_INSTRUMENTATION', False)
+        app.config.setdefault('SQL_SLOW_QUERY_MS', 100)
+        app.config.setdefault('METRICS_URL', '/metrics/')
+        if not app.config['SQL_INSTRUMENTATION']:
+            return
+        self.slow_query_ms = app.config['SQL_SLOW_QUERY_MS']
+        app.extensions['instrumentation'] = self
+
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule(app.config['METRICS_URL'], 'metrics', self.metrics_view)
+
+    def _start_request(self):
+        g.timing = {'start': time.perf_counter(), 'cpu': time.thread_time(), 'queries': 0, 'db': 0.0, 'render': 0.0,
+                    'render_stack': []}
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = (time.perf_counter() - conn.info['query_start'].pop()) * 1000
+        if not has_request_context() or 'timing' not in g:
+            return
+        g.timing['queries'] += 1
+        g.timing['db'] += elapsed
+        if elapsed >= self.slow_query_ms:
+            current_app.logger.warning(f'Slow query ({elapsed:.1f} ms) in {request.endpoint}: {statement}')
+
+    def _before_render(self, sender, template, context, **extra):
+        if 'timing' in g:
+            g.timing['render_stack'].append(time.perf_counter())
+
+    def _after_render(self, sender, template, context, **extra):
+        if 'timing' in g and g.timing['render_stack']:
+            started = g.timing['render_stack'].pop()
+            # 바깥 템플릿 시간에 안쪽 템플릿 시간이 포함되므로 가장 바깥 것만 더한다
+            if not g.timing['render_stack']:
+                g.timing['render'] += (time.perf_counter() - started) * 1000
+
+    def _finish_request(self, response):
+        timing = g.pop('timing', None)
+        if timing is None:
+            return response
+        total = (time.perf_counter() - timing['start']) * 1000
+        # 요청 스레드가 쓴 CPU 시간 (응답 압축 포함, 스트리밍 응답의 본문 생성은 빠진다)
+        cpu = (time.thread_time() - timing['cpu']) * 1000
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={timing["db"]:.2f};desc="{timing["queries"]} queries", '
+            f'render;dur={timing["render"]:.2f}, cpu;dur={cpu:.2f}, total;dur={total:.2f}',
+        )
+        endpoint = request.endpoint or 'unknown'
+        if endpoint != 'metrics':
+            with self._lock:
+                metrics = self._metrics.setdefault(endpoint, {'latency': Histogram(), 'db': Histogram(), 'queries': 0})
+                metrics['latency'].observe(total)
+                metrics['db'].observe(timing['db'])
+                metrics['queries'] += timing['queries']
+        return response
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    'latency': metrics['latency'].to_dict(),
+                    'db': metrics['db'].to_dict(),
+                    'queries': metrics['queries'],
+                    'queries_per_request': round(metrics['queries'] / metrics['latency'].count, 2),
+                }
+                for endpoint, metrics in self._metrics.items()
+            }
+
+    def metrics_view(self):
+        return jsonify(self.snapshot())
+
+
+instrumentation = Instrumentation()
@@ -1,11 +1,12 @@
 from functools import wraps
-from flask import session, redirect, url_for
+from flask import g, redirect, url_for
 
 
 def login_required(view_func):
     @wraps(view_func)
     def wrapped_view(*args, **kwargs):
-        if not session.get('user_id'):
+        # g.user 는 create_app 의 load_logged_in_user 가 요청마다 채운다
+        if g.user is None:
             return redirect(url_for('auth.login'))
         return view_func(*args, **kwargs)
 
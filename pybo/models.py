@@ -9,6 +9,23 @@ class Question(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
     user = db.relationship('User', backref=db.backref('question_set'))
     view_count = db.Column(db.Integer, nullable=False, default=0)
+    # 반응 수 캐시 (like/bookmark/answer 테이블을 매번 집계하지 않도록 유지)
+    like_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    bookmark_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    answer_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # 인기순 정렬 점수 (시간 감쇠를 적용한 조회/좋아요/즐겨찾기/답변 합, pybo.ranking 참고)
+    hot_score = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    __table_args__ = (
+        # 목록 정렬 (최신순/오래된순, 좋아요/즐겨찾기/조회수/인기순). 커서 정렬 키와 같은 (…, create_date, id) 순서라
+        # 같은 값이 많아도 정렬 없이 인덱스 순서대로 읽는다
+        db.Index('ix_question_create_date', 'create_date', 'id'),
+        db.Index('ix_question_like_count', 'like_count', 'create_date', 'id'),
+        db.Index('ix_question_bookmark_count', 'bookmark_count', 'create_date', 'id'),
+        db.Index('ix_question_view_count', 'view_count', 'create_date', 'id'),
+        db.Index('ix_question_hot_score', 'hot_score', 'create_date', 'id'),
+        # 작성자별 질문 (사용자 삭제 시 CASCADE 포함)
+        db.Index('ix_question_user_id', 'user_id', 'create_date'),
+    )
 
 
 class Answer(db.Model):
@@ -19,6 +36,14 @@ class Answer(db.Model):
     create_date = db.Column(db.DateTime(), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
     user = db.relationship('User', backref=db.backref('answer_set'))
+    like_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    bookmark_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    __table_args__ = (
+        # 질문 상세의 답변 목록 (좋아요순/최신순)
+        db.Index('ix_answer_question_like_count', 'question_id', 'like_count', 'create_date'),
+        db.Index('ix_answer_question_create_date', 'question_id', 'create_date'),
+        db.Index('ix_answer_user_id', 'user_id', 'create_date'),
+    )
 
 
 class QuestionView(db.Model):
@@ -29,6 +54,23 @@ class QuestionView(db.Model):
     created_at = db.Column(db.DateTime(), nullable=False, default=datetime.utcnow)
     question = db.relationship('Question', backref=db.backref('view_set'))
     user = db.relationship('User', backref=db.backref('question_view_set'))
+    __table_args__ = (
+        # 중복 조회 확인 (question_id, user_id, created_at > ?)
+        db.Index('ix_question_view_question_user_created', 'question_id', 'user_id', 'created_at'),
+        # 보존 기간이 지난 기록 정리
+        db.Index('ix_question_view_created_at', 'created_at'),
+    )
+
+
+class QuestionViewDaily(db.Model):
+    """보존 기간이 지난 question_view 기록을 질문별/일별 조회수로 합친 테이블"""
+    __tablename__ = 'question_view_daily'
+    id = db.Column(db.Integer, primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id', ondelete='CASCADE'), nullable=False)
+    day = db.Column(db.Date(), nullable=False)
+    view_count = db.Column(db.Integer, nullable=False, default=0)
+    question = db.relationship('Question', backref=db.backref('daily_view_set'))
+    __table_args__ = (db.UniqueConstraint('question_id', 'day', name='question_view_daily_unique'),)
 
 
 class User(db.Model):
@@ -44,6 +86,16 @@ class User(db.Model):
     # Email verification
     email_verified = db.Column(db.Boolean(), nullable=False, default=False)
     verified_at = db.Column(db.DateTime(), nullable=True)
+    __table_args__ = (
+        # 대부분 OAuth 계정이 아니므로(NULL) 연결된 계정만 인덱싱한다
+        db.Index('ix_user_oauth', 'oauth_provider', 'oauth_id',
+                 sqlite_where=db.text('oauth_id IS NOT NULL'), postgresql_where=db.text('oauth_id IS NOT NULL')),
+    )
+
+
+# 사용자ID/이메일은 대소문자 구분 없이 찾으므로(lower(...) = lower(?)) 식 인덱스가 필요하다
+db.Index('ix_user_username_lower', db.func.lower(User.username))
+db.Index('ix_user_email_lower', db.func.lower(User.email))
 
 
 class UnverifiedUser(db.Model):
@@ -53,8 +105,34 @@ class UnverifiedUser(db.Model):
     # store hashed password until verification
     password = db.Column(db.String(200), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    token = db.Column(db.String(300), unique=True, nullable=False)
+    # 인증 링크 토큰의 SHA-256 hex (pybo.verification.hash_token) - 원래 토큰은 저장하지 않는다
+    token = db.Column(db.String(64), unique=True, nullable=False)
+    create_date = db.Column(db.DateTime(), nullable=False, default=datetime.utcnow)
+    __table_args__ = (
+        # 만료된 가입 정리 (flask sweep-signups)
+        db.Index('ix_unverified_user_create_date', 'create_date'),
+    )
+
+
+db.Index('ix_unverified_user_username_lower', db.func.lower(UnverifiedUser.username))
+db.Index('ix_unverified_user_email_lower', db.func.lower(UnverifiedUser.email))
+
+
+class EmailDelivery(db.Model):
+    """발송 대기열(pybo.email_utils.mail_queue)에 들어간 메일과 발송 상태"""
+    __tablename__ = 'email_delivery'
+    id = db.Column(db.Integer, primary_key=True)
+    to_email = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text(), nullable=False)
+    # queued -> sending -> sent / failed (다시 보낼 메일은 queued 로 돌아간다)
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.String(500), nullable=True)
     create_date = db.Column(db.DateTime(), nullable=False, default=datetime.utcnow)
+    # sending 으로 바꾼 시각 (오래되면 보내던 프로세스가 죽은 것)
+    claimed_at = db.Column(db.DateTime(), nullable=True)
+    sent_at = db.Column(db.DateTime(), nullable=True)
 
 
 class QuestionLike(db.Model):
@@ -65,7 +143,11 @@ class QuestionLike(db.Model):
     create_date = db.Column(db.DateTime(), nullable=False, default=datetime.utcnow)
     question = db.relationship('Question', backref=db.backref('like_set'))
     user = db.relationship('User', backref=db.backref('question_like_set'))
-    __table_args__ = (db.UniqueConstraint('question_id', 'user_id', name='question_like_unique'),)
+    __table_args__ = (
+        db.UniqueConstraint('question_id', 'user_id', name='question_like_unique'),
+        # 사용자별 좋아요/즐겨찾기 목록 (최근 순)
+        db.Index('ix_question_like_user_created', 'user_id', 'create_date'),
+    )
 
 
 class QuestionBookmark(db.Model):
@@ -76,7 +158,10 @@ class QuestionBookmark(db.Model):
     create_date = db.Column(db.DateTime(), nullable=False, default=datetime.utcnow)
     question = db.relationship('Question', backref=db.backref('bookmark_set'))
     user = db.relationship('User', backref=db.backref('question_bookmark_set'))
-    __table_args__ = (db.UniqueConstraint('question_id', 'user_id', name='question_bookmark_unique'),)
+    __table_args__ = (
+        db.UniqueConstraint('question_id', 'user_id', name='question_bookmark_unique'),
+        db.Index('ix_question_bookmark_user_created', 'user_id', 'create_date'),
+    )
 
 
 class AnswerLike(db.Model):
@@ -87,7 +172,10 @@ class AnswerLike(db.Model):
     create_date = db.Column(db.DateTime(), nullable=False, default=datetime.utcnow)
     answer = db.relationship('Answer', backref=db.backref('like_set'))
     user = db.relationship('User', backref=db.backref('answer_like_set'))
-    __table_args__ = (db.UniqueConstraint('answer_id', 'user_id', name='answer_like_unique'),)
+    __table_args__ = (
+        db.UniqueConstraint('answer_id', 'user_id', name='answer_like_unique'),
+        db.Index('ix_answer_like_user_created', 'user_id', 'create_date'),
+    )
 
 
 class AnswerBookmark(db.Model):
@@ -98,5 +186,8 @@ class AnswerBookmark(db.Model):
     create_date = db.Column(db.DateTime(), nullable=False, default=datetime.utcnow)
     answer = db.relationship('Answer', backref=db.backref('bookmark_set'))
     user = db.relationship('User', backref=db.backref('answer_bookmark_set'))
-    __table_args__ = (db.UniqueConstraint('answer_id', 'user_id', name='answer_bookmark_unique'),)
+    __table_args__ = (
+        db.UniqueConstraint('answer_id', 'user_id', name='answer_bookmark_unique'),
+        db.Index('ix_answer_bookmark_user_created', 'user_id', 'create_date'),
+    )
     
\ No newline at end of file
@@ -0,0 +1,160 @@
+import base64
+import binascii
+import json
+import math
+from datetime import datetime
+
+from sqlalchemy import and_, or_, func
+
+from pybo import db
+
+# 뒤에서부터 읽을 때 사용하는 특수 커서 (마지막 페이지)
+LAST = 'last'
+
+# 실제 커서는 200자 이하 - 더 길면 풀어 보지 않는다 (깊게 중첩된 JSON 등)
+MAX_CURSOR_LENGTH = 512
+
+
+def _dump(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+# SQLite 정수 범위 (넘으면 바인딩할 때 OverflowError)
+_INT_RANGE = (-2 ** 63, 2 ** 63 - 1)
+
+
+def _load(value):
+    """_dump 가 만든 값만 받는다. 그 밖의 값(목록, null, 잘못된 날짜 등)이면 ValueError."""
+    if isinstance(value, dict) and list(value) == ['dt'] and isinstance(value['dt'], str):
+        return datetime.fromisoformat(value['dt'])
+    if isinstance(value, bool):
+        raise ValueError('Invalid cursor value')
+    if isinstance(value, str) \
+            or isinstance(value, int) and _INT_RANGE[0] <= value <= _INT_RANGE[1] \
+            or isinstance(value, float) and math.isfinite(value):
+        return value
+    raise ValueError('Invalid cursor value')
+
+
+def encode_cursor(sort, keys, item):
+    """item 의 정렬 키 값을 불투명한 URL-safe 토큰으로 만든다."""
+    values = [_dump(getattr(item, column.key)) for column, _ in keys]
+    raw = json.dumps({'s': sort, 'k': values}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(sort, keys, token):
+    """토큰을 정렬 키 값 목록으로 되돌린다. 형식이 맞지 않거나 다른 정렬의 토큰이면 None.
+
+    토큰은 사용자가 마음대로 바꿀 수 있으므로 값의 형식까지 확인한다 (잘못된 값으로 쿼리가 실패하지 않도록).
+    """
+    if len(token) > MAX_CURSOR_LENGTH:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        data = json.loads(raw)
+        if not isinstance(data, dict) or data.get('s') != sort \
+                or not isinstance(data.get('k'), list) or len(data['k']) != len(keys):
+            return None
+        return [_load(value) for value in data['k']]
+    except (binascii.Error, ValueError, RecursionError):
+        return None
+
+
+def seek_condition(keys, values, reverse):
+    """(k1, k2, ..., id) 가 커서 위치보다 뒤에 오는 행의 조건.
+
+    정렬 방향이 섞여 있으므로 row-value 비교 대신 OR 로 펼친다:
+    k1 > v1 OR (k1 = v1 AND k2 > v2) OR ...
+    """
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        if descending != reverse:
+            step = column < values[i]
+        else:
+            step = column > values[i]
+        equal = [keys[j][0] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, step))
+    return or_(*clauses)
+
+
+def order_by(keys, reverse=False):
+    return [column.asc() if descending == reverse else column.desc() for column, descending in keys]
+
+
+def approximate_total(query, cap):
+    """최대 cap 개까지만 센다. (total, exact) 를 반환."""
+    limited = query.enable_eagerloads(False).order_by(None).limit(cap + 1).subquery()
+    total = db.session.query(func.count()).select_from(limited).scalar()
+    if total > cap:
+        return cap, False
+    return total, True
+
+
+class KeysetPage:
+    """OFFSET/COUNT 없이 커서(after/before)로 이동하는 페이지.
+
+    템플릿에서 flask_sqlalchemy 의 Pagination 과 같은 방식으로 쓸 수 있도록
+    items, per_page, has_prev, has_next, total 을 제공한다 (page 는 None).
+    """
+    page = None
+    pages = None
+
+    def __init__(self, items, per_page, has_prev, has_next, prev_cursor, next_cursor, total=None, total_exact=True):
+        self.items = items
+        self.per_page = per_page
+        self.has_prev = has_prev
+        self.has_next = has_next
+        self.prev_cursor = prev_cursor
+        self.next_cursor = next_cursor
+        self.total = total
+        self.total_exact = total_exact
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+def keyset_paginate(query, sort, keys, per_page, after=None, before=None, count_cap=None):
+    """keys 는 (컬럼, 내림차순 여부) 목록이며 유일한 컬럼(id)으로 끝나야 한다.
+
+    after 가 주어지면 커서 다음 페이지를, before 가 주어지면 커서 이전 페이지를
+    (before=LAST 이면 마지막 페이지를) 반환한다. 커서가 잘못되었으면 첫 페이지.
+    """
+    reverse = False
+    filtered = query
+    if before:
+        reverse = True
+        if before != LAST:
+            values = decode_cursor(sort, keys, before)
+            if values is None:
+                reverse = False
+            else:
+                filtered = query.filter(seek_condition(keys, values, reverse=True))
+    elif after:
+        values = decode_cursor(sort, keys, after)
+        if values is not None:
+            filtered = query.filter(seek_condition(keys, values, reverse=False))
+        else:
+            after = None
+
+    rows = filtered.order_by(*order_by(keys, reverse)).limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    items = rows[:per_page]
+    if reverse:
+        items.reverse()
+        has_prev, has_next = has_more, before != LAST
+    else:
+        has_prev, has_next = bool(after), has_more
+
+    total, total_exact = None, True
+    if count_cap:
+        total, total_exact = approximate_total(query, count_cap)
+
+    return KeysetPage(
+        items, per_page, has_prev, has_next,
+        prev_cursor=encode_cursor(sort, keys, items[0]) if items and has_prev else None,
+        next_cursor=encode_cursor(sort, keys, items[-1]) if items and has_next else None,
+        total=total, total_exact=total_exact,
+    )
@@ -0,0 +1,119 @@
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHashingBusy(Exception):
+    """해시 작업이 PASSWORD_HASH_WAIT 초 안에 자리를 얻지 못했다 (503 으로 답한다)."""
+
+
+def _hash(password, method, salt_length):
+    return generate_password_hash(password, method=method, salt_length=salt_length)
+
+
+def _check(stored, password):
+    return check_password_hash(stored, password)
+
+
+class PasswordHasher:
+    """비밀번호 해시/확인을 요청 스레드 대신 프로세스 풀(PASSWORD_HASH_WORKERS 개)에서 실행한다.
+
+    - 해시는 일부러 느린 CPU 작업이므로 요청 스레드에서 하면 GIL 을 잡고 같은 워커의 다른 요청을 멈추게 한다.
+    - 동시에 처리 중이거나 기다리는 작업은 PASSWORD_HASH_MAX_PENDING 개까지만 받고, 자리가 나기를
+      PASSWORD_HASH_WAIT 초 기다려도 없으면 PasswordHashingBusy 를 낸다 (로그인 폭주가 대기열을 무한히 늘리지 않도록).
+    - PASSWORD_HASH_WORKERS 가 0 이면 호출한 스레드에서 바로 계산한다.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._lock = threading.Lock()
+        self._pool = None
+        self._slots = None
+        self._current_method = None
+
+    def init_app(self, app):
+        app.config.setdefault('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+        app.config.setdefault('PASSWORD_SALT_LENGTH', 16)
+        app.config.setdefault('PASSWORD_HASH_WORKERS', 2)
+        app.config.setdefault('PASSWORD_HASH_MAX_PENDING', 16)
+        app.config.setdefault('PASSWORD_HASH_WAIT', 5)
+        app.extensions['passwords'] = self
+        if self.app is None:
+            atexit.register(self.shutdown)
+        self.app = app
+        self._slots = threading.BoundedSemaphore(max(1, app.config['PASSWORD_HASH_MAX_PENDING']))
+        self._current_method = None
+
+    def hash(self, password):
+        """PASSWORD_HASH_METHOD 로 만든 해시"""
+        config = self.app.config
+        return self._run(_hash, password, config['PASSWORD_HASH_METHOD'], config['PASSWORD_SALT_LENGTH'])
+
+    def check(self, stored, password):
+        return self._run(_check, stored, password)
+
+    def needs_rehash(self, stored):
+        """저장된 해시의 방식/비용이 현재 설정과 다른지 (로그인 성공 시 다시 해시한다)"""
+        return stored.split('$', 1)[0] != self.current_method()
+
+    def current_method(self):
+        """설정의 방식을 werkzeug 가 해시에 기록하는 형태로 (예: 'pbkdf2' -> 'pbkdf2:sha256:1000000')"""
+        if self._current_method is None:
+            # 빈 문자열을 한 번 해시해 기본값이 채워진 방식 문자열을 얻는다
+            sample = generate_password_hash('', method=self.app.config['PASSWORD_HASH_METHOD'], salt_length=1)
+            self._current_method = sample.split('$', 1)[0]
+        return self._current_method
+
+    def _run(self, fn, *args):
+        if self.app.config['PASSWORD_HASH_WORKERS'] <= 0:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.app.config['PASSWORD_HASH_WAIT']):
+            raise PasswordHashingBusy()
+        try:
+            pool = self._executor()
+            try:
+                future = pool.submit(fn, *args)
+            except BrokenProcessPool:
+                # 작업 프로세스가 죽었으면 풀을 다시 만든다
+                self._reset(pool)
+                pool = self._executor()
+                future = pool.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            self._reset(pool)
+            raise
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                # fork 는 스레드(조회수/메일 워커)가 있는 프로세스에서 안전하지 않으므로 spawn 을 쓴다.
+                # spawn 은 실행한 스크립트를 다시 import 하므로 직접 만든 실행 스크립트는
+                # if __name__ == '__main__': 로 감싸야 한다 (flask run, gunicorn 은 이미 그렇다)
+                self._pool = ProcessPoolExecutor(max_workers=self.app.config['PASSWORD_HASH_WORKERS'],
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def _reset(self, pool):
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+passwords = PasswordHasher()
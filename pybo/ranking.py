@@ -0,0 +1,127 @@
+import math
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import bindparam, case, func, select, update
+
+from pybo import db
+from pybo.models import Question, Answer, QuestionLike, QuestionBookmark, QuestionView, QuestionViewDaily
+
+# 점수의 시간 기준점. 바꾸면 flask hot-refresh 로 다시 계산해야 한다
+HOT_EPOCH = datetime(2024, 1, 1)
+
+# 뺀 뒤 남는 비율이 이보다 작으면 부동소수점 정밀도로 계산할 수 없으므로 남은 값의 상한(점수 × 이 값)으로 둔다
+_MIN_RESIDUAL = 1e-6
+
+
+def _tau():
+    """감쇠 시간 상수(초) - HOT_HALF_LIFE_HOURS 가 지나면 기여분이 절반이 된다"""
+    return current_app.config['HOT_HALF_LIFE_HOURS'] * 3600 / math.log(2)
+
+
+def event_score(kind, when, count=1):
+    """이벤트 count 개가 when(로컬 시각, create_date 와 같은 기준)에 일어났을 때의 기여분 (로그값).
+
+    Question.hot_score = ln(Σ 가중치 · exp((이벤트 시각 - HOT_EPOCH) / τ)) 이다.
+    현재 점수 Σ 가중치 · exp(-(지금 - 이벤트 시각) / τ) 와 순서가 같으므로 시간이 지나도 다시 계산할 필요가 없고,
+    이벤트가 생길 때 그 기여분만 더하면 된다. 가중치가 0 이하인 이벤트는 None.
+    """
+    weight = current_app.config['HOT_WEIGHTS'].get(kind, 0) * count
+    if weight <= 0:
+        return None
+    return math.log(weight) + (when - HOT_EPOCH).total_seconds() / _tau()
+
+
+def added(column, score):
+    """ln(exp(column) + exp(score)) 을 계산하는 SQL 식 (큰 쪽을 밖으로 빼서 overflow 를 막는다)"""
+    return case(
+        (column >= score, column + func.ln(1 + func.exp(score - column))),
+        else_=score + func.ln(1 + func.exp(column - score)),
+    )
+
+
+def removed(column, score):
+    """ln(exp(column) - exp(score)) 을 계산하는 SQL 식.
+
+    빼는 기여분이 점수의 거의 전부면 남은 값의 상한으로 두므로 점수는 항상 충분히 내려간다
+    (정확한 값은 refresh() 에서 다시 계산된다).
+    """
+    return case(
+        (column - score > -math.log1p(-_MIN_RESIDUAL), column + func.ln(1 - func.exp(score - column))),
+        else_=column + math.log(_MIN_RESIDUAL),
+    )
+
+
+def record(question_id, kind, when=None, count=1):
+    """질문의 점수에 이벤트를 더한다 (커밋은 호출한 쪽에서)."""
+    score = event_score(kind, when or datetime.now(), count)
+    if score is not None:
+        db.session.execute(
+            update(Question).where(Question.id == question_id).values(hot_score=added(Question.hot_score, score))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def retract(question_id, kind, when, count=1):
+    """record() 로 더한 이벤트(같은 when)를 뺀다 (커밋은 호출한 쪽에서)."""
+    score = event_score(kind, when, count)
+    if score is not None:
+        db.session.execute(
+            update(Question).where(Question.id == question_id).values(hot_score=removed(Question.hot_score, score))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _logaddexp(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    high, low = (a, b) if a >= b else (b, a)
+    return high + math.log1p(math.exp(low - high))
+
+
+def _events():
+    """(질문 id, 종류, 로컬 시각, 개수) - 점수를 처음부터 계산할 때의 모든 이벤트"""
+    # question_view 는 UTC 로 기록되므로 다른 테이블(로컬 시각)에 맞춘다
+    utc_offset = timedelta(minutes=round((datetime.now() - datetime.utcnow()).total_seconds() / 60))
+    sources = [
+        ('question', select(Question.id, Question.create_date)),
+        ('answer', select(Answer.question_id, Answer.create_date).where(Answer.question_id.is_not(None))),
+        ('like', select(QuestionLike.question_id, QuestionLike.create_date)),
+        ('bookmark', select(QuestionBookmark.question_id, QuestionBookmark.create_date)),
+    ]
+    for kind, statement in sources:
+        for question_id, when in db.session.execute(statement.execution_options(yield_per=5000)):
+            yield question_id, kind, when, 1
+    views = select(QuestionView.question_id, QuestionView.created_at).execution_options(yield_per=5000)
+    for question_id, when in db.session.execute(views):
+        yield question_id, 'view', when + utc_offset, 1
+    # 일별로 합쳐진 조회는 그날 정오에 일어난 것으로 본다
+    daily = select(QuestionViewDaily.question_id, QuestionViewDaily.day, QuestionViewDaily.view_count)
+    for question_id, day, count in db.session.execute(daily.execution_options(yield_per=5000)):
+        if count > 0:
+            yield question_id, 'view', datetime.combine(day, datetime.min.time()) + timedelta(hours=12) + utc_offset, \
+                count
+
+
+def refresh(batch_size=1000):
+    """모든 질문의 점수를 이벤트 테이블에서 다시 계산한다. 갱신한 질문 수를 반환.
+
+    가중치나 반감기를 바꾼 뒤, 또는 주기적으로(누적된 반올림 오차와 취소 시 어림한 값 정리) 실행한다.
+    계산하는 동안 생긴 이벤트는 덮어쓸 수 있으나 다음 실행에서 반영된다.
+    """
+    scores = {}
+    for question_id, kind, when, count in _events():
+        score = event_score(kind, when, count)
+        if score is not None:
+            scores[question_id] = _logaddexp(scores.get(question_id), score)
+
+    table = Question.__table__
+    statement = update(table).where(table.c.id == bindparam('b_id')).values(hot_score=bindparam('b_score'))
+    items = list(scores.items())
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        db.session.execute(statement, [{'b_id': question_id, 'b_score': score} for question_id, score in batch])
+        db.session.commit()
+    return len(items)
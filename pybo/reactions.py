@@ -0,0 +1,226 @@
+import hashlib
+from datetime import datetime
+
+from sqlalchemy import delete, exists, false, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from pybo import db, ranking
+from pybo.models import Question, Answer, QuestionLike, QuestionBookmark, AnswerLike, AnswerBookmark
+
+# (대상 종류, 반응 종류) -> (반응 모델, 대상 모델, 반응 모델의 대상 FK 이름, 대상의 카운터 컬럼 이름)
+REACTIONS = {
+    ('question', 'like'): (QuestionLike, Question, 'question_id', 'like_count'),
+    ('question', 'bookmark'): (QuestionBookmark, Question, 'question_id', 'bookmark_count'),
+    ('answer', 'like'): (AnswerLike, Answer, 'answer_id', 'like_count'),
+    ('answer', 'bookmark'): (AnswerBookmark, Answer, 'answer_id', 'bookmark_count'),
+}
+
+
+class ReactionTargetNotFound(Exception):
+    pass
+
+
+def _reacted_ids(model, fk_column, user_id, ids):
+    """Return the subset of ``ids`` the user has reacted to, with one IN (...) query."""
+    ids = list(ids)
+    if user_id is None or not ids:
+        return set()
+    rows = db.session.query(fk_column).filter(model.user_id == user_id, fk_column.in_(ids))
+    return {row[0] for row in rows}
+
+
+def question_reactions(user_id, question_ids):
+    """현재 사용자가 좋아요/즐겨찾기한 질문 id 집합"""
+    question_ids = list(question_ids)
+    return {
+        'liked_question_ids': _reacted_ids(QuestionLike, QuestionLike.question_id, user_id, question_ids),
+        'bookmarked_question_ids': _reacted_ids(QuestionBookmark, QuestionBookmark.question_id, user_id, question_ids),
+    }
+
+
+def answer_reactions(user_id, answer_ids):
+    """현재 사용자가 좋아요/즐겨찾기한 답변 id 집합"""
+    answer_ids = list(answer_ids)
+    return {
+        'liked_answer_ids': _reacted_ids(AnswerLike, AnswerLike.answer_id, user_id, answer_ids),
+        'bookmarked_answer_ids': _reacted_ids(AnswerBookmark, AnswerBookmark.answer_id, user_id, answer_ids),
+    }
+
+
+# 대상 종류 -> (대상 모델, 내려주는 카운터 컬럼 이름)
+STATE_COUNTERS = {
+    'question': (Question, ('like_count', 'bookmark_count', 'answer_count', 'view_count')),
+    'answer': (Answer, ('like_count', 'bookmark_count')),
+}
+
+
+def _states(target_type, ids, user_id):
+    """대상 테이블 한 번의 조회로 카운터와 사용자의 좋아요/즐겨찾기 여부를 읽는다 (EXISTS 는 유니크 인덱스를 쓴다)."""
+    target, counter_names = STATE_COUNTERS[target_type]
+    flags = []
+    for action in ('like', 'bookmark'):
+        reaction, _, fk_name, _ = REACTIONS[(target_type, action)]
+        if user_id is None:
+            flags.append(false().label(action))
+        else:
+            flags.append(exists().where(getattr(reaction, fk_name) == target.id, reaction.user_id == user_id)
+                         .label(action))
+    rows = db.session.execute(
+        select(target.id, *(getattr(target, name) for name in counter_names), *flags).where(target.id.in_(ids))
+    )
+    states = {}
+    for row in rows:
+        state = dict(zip(counter_names, row[1:len(counter_names) + 1]))
+        state['is_liked'], state['is_bookmarked'] = bool(row[-2]), bool(row[-1])
+        states[row[0]] = state
+    return states
+
+
+def item_version(state):
+    """항목 하나의 버전 - 카운터나 사용자의 반응이 바뀌면 달라진다"""
+    return '.'.join(str(int(value)) for _, value in sorted(state.items()))
+
+
+def reaction_states(user_id, question_ids=(), answer_ids=()):
+    """질문/답변의 반응 수와 사용자의 반응 여부 -> {'question': {id: state}, 'answer': {id: state}}
+
+    대상 종류마다 쿼리 하나. 없는 id 는 결과에서 빠진다.
+    """
+    result = {}
+    for target_type, ids in (('question', question_ids), ('answer', answer_ids)):
+        ids = sorted(set(ids))
+        result[target_type] = _states(target_type, ids, user_id) if ids else {}
+    return result
+
+
+def states_etag(user_id, states):
+    """항목별 버전으로 만든 ETag (사용자마다 반응 여부가 다르므로 사용자 id 도 포함)"""
+    digest = hashlib.sha1(str(user_id).encode())
+    for target_type in sorted(states):
+        for target_id in sorted(states[target_type]):
+            digest.update(f'|{target_type}:{target_id}:{item_version(states[target_type][target_id])}'.encode())
+    return digest.hexdigest()
+
+
+def _insert_ignore(model):
+    """이미 있으면(유니크 제약 충돌) 아무것도 하지 않는 INSERT. ON CONFLICT 를 지원하지 않는 DB 면 None"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(model).on_conflict_do_nothing()
+    if dialect == 'sqlite':
+        return sqlite.insert(model).on_conflict_do_nothing()
+    return None
+
+
+def _toggle(target_type, action, target_id, user_id):
+    reaction, target, fk_name, counter_name = REACTIONS[(target_type, action)]
+    fk_column = getattr(reaction, fk_name)
+
+    # 있으면 지우고(취소), 없으면 넣는다. 동시에 같은 요청이 들어와도 유니크 제약으로 한 번만 반영된다.
+    # 문 하나로 합치지 않는 이유: SQLite 에는 쓰기 CTE(WITH ... DELETE/INSERT) 가 없어서 "지우거나 넣고 카운터를
+    # 고치는" 일을 한 문장으로 할 수 없고, INSERT OR REPLACE 는 지우기를 대신하지 못한다. 조회 없이 최대 세 문장
+    # (취소는 DELETE + UPDATE 두 문장) 을 한 트랜잭션에서 실행하며, 카운터는 실제로 지우거나 넣은 행 수만큼만 바뀐다.
+    removed = db.session.execute(
+        delete(reaction).where(fk_column == target_id, reaction.user_id == user_id)
+        .returning(reaction.id, reaction.create_date)
+    ).first()
+    if removed is not None:
+        active, delta, created = False, -1, removed[1]
+    else:
+        created = datetime.now()
+        values = {fk_name: target_id, 'user_id': user_id, 'create_date': created}
+        statement = _insert_ignore(reaction)
+        if statement is not None:
+            try:
+                added = db.session.execute(statement.values(values).returning(reaction.id)).first()
+            except IntegrityError:
+                # 유니크 충돌은 무시되므로 외래 키 검사를 하는 DB 에서 대상이 없는 경우
+                raise ReactionTargetNotFound(f'{target_type} {target_id} does not exist')
+        else:
+            # ON CONFLICT 가 없는 DB: 세이브포인트 안에서 넣고, 실패하면 동시에 들어온 같은 토글이 먼저 넣은 것으로
+            # 보고 이미 켜진 상태를 돌려준다. 대상이 없어서 실패했다면 아래 UPDATE 가 행을 찾지 못한다.
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(reaction).values(values))
+                added = True
+            except IntegrityError:
+                added = None
+        active, delta = True, (1 if added is not None else 0)
+
+    counter = getattr(target, counter_name)
+    values = {counter_name: counter + delta}
+    if target is Question and delta:
+        # 인기순 점수도 같은 UPDATE 에서 반영한다 (취소하면 그 반응이 더했던 만큼 뺀다)
+        score = ranking.event_score(action, created)
+        if score is not None:
+            values['hot_score'] = (ranking.added if delta > 0 else ranking.removed)(Question.hot_score, score)
+    question_id = target.id if target is Question else target.question_id
+    row = db.session.execute(
+        update(target).where(target.id == target_id).values(values)
+        .returning(counter, question_id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        raise ReactionTargetNotFound(f'{target_type} {target_id} does not exist')
+    return {'type': target_type, 'id': target_id, 'action': action, 'active': active,
+            'count': row[0], 'question_id': row[1]}
+
+
+# 질문의 반응 수가 바뀌면 순서가 바뀌는 목록 정렬 (인기순 점수도 함께 바뀐다)
+LIST_SORTS = {
+    'like': ('likes_desc', 'likes_asc', 'hot'),
+    'bookmark': ('bookmarks_desc', 'bookmarks_asc', 'hot'),
+}
+
+
+def invalidation_tags(results):
+    """토글 결과로 무효화해야 하는 렌더링 캐시 태그.
+
+    질문 상세와 그 질문이 나온 목록 화면(question:{id}), 질문 반응이면 그 반응 수로 정렬한 목록만 무효화한다.
+    """
+    tags = set()
+    for result in results:
+        tags.add(f'question:{result["question_id"]}')
+        if result['type'] == 'question':
+            tags.update(f'question-list:{sort}' for sort in LIST_SORTS[result['action']])
+    return tags
+
+
+def toggle(target_type, action, target_id, user_id):
+    """반응을 뒤집고 커밋한다. 새 상태(active)와 카운터 값(count)을 담은 dict 를 반환.
+
+    DELETE ... RETURNING, (없었으면) INSERT ... ON CONFLICT DO NOTHING, UPDATE ... RETURNING 으로
+    조회 없이 한 트랜잭션에서 처리한다. 대상이 없으면 ReactionTargetNotFound.
+    """
+    try:
+        result = _toggle(target_type, action, target_id, user_id)
+    except Exception:
+        db.session.rollback()
+        raise
+    db.session.commit()
+    return result
+
+
+def toggle_many(toggles, user_id):
+    """[(대상 종류, 반응 종류, 대상 id)] 를 순서대로 한 트랜잭션에서 뒤집는다.
+
+    없는 대상은 건너뛰고 {'error': 'not_found'} 로 표시한다. 결과 목록을 반환.
+    """
+    existing = {}
+    for target_type, model in (('question', Question), ('answer', Answer)):
+        ids = {target_id for kind, _, target_id in toggles if kind == target_type}
+        existing[target_type] = set(db.session.scalars(select(model.id).where(model.id.in_(ids)))) if ids else set()
+
+    results = []
+    try:
+        for target_type, action, target_id in toggles:
+            if target_id not in existing[target_type]:
+                results.append({'type': target_type, 'id': target_id, 'action': action, 'error': 'not_found'})
+                continue
+            results.append(_toggle(target_type, action, target_id, user_id))
+    except Exception:
+        db.session.rollback()
+        raise
+    db.session.commit()
+    return results
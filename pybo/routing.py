@@ -0,0 +1,114 @@
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, session, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+
+# db.engines 에서 레플리카 엔진의 키
+REPLICA = 'replica'
+
+
+class ReplicaRouting:
+    """@read_only 화면의 조회(SELECT)를 레플리카(DATABASE_REPLICA_URL)로 보낸다.
+
+    - 쓰기(flush, INSERT/UPDATE/DELETE)와 @read_only 가 아닌 화면은 항상 기본 DB 를 쓴다.
+    - 사용자가 무언가를 쓰면 DB_REPLICA_STICKY_SECONDS 초 동안 그 사용자의 조회도 기본 DB 로 보낸다
+      (복제 지연 동안 자기가 쓴 내용이 안 보이는 것을 막는다. 다른 사용자에게는 지연이 보일 수 있다).
+    - 레플리카 오류가 나면 그 요청은 기본 DB 로 다시 실행하고 DB_REPLICA_RETRY_SECONDS 초 동안 레플리카를 쓰지 않는다.
+    DATABASE_REPLICA_URL 이 없으면 아무것도 하지 않는다.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.sticky_seconds = 0
+        self.retry_seconds = 0
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+
+    def init_app(self, app):
+        """레플리카 엔진을 만들어 db.engines[REPLICA] 로 등록한다. db.init_app() 다음에 호출해야 한다.
+
+        SQLALCHEMY_BINDS 로 등록하면 create_all()/drop_all() 이 레플리카에도 실행되므로 직접 만든다.
+        """
+        app.config.setdefault('DATABASE_REPLICA_URL', None)
+        app.config.setdefault('DB_REPLICA_STICKY_SECONDS', 5)
+        app.config.setdefault('DB_REPLICA_RETRY_SECONDS', 30)
+        self.enabled = bool(app.config['DATABASE_REPLICA_URL'])
+        self.sticky_seconds = app.config['DB_REPLICA_STICKY_SECONDS']
+        self.retry_seconds = app.config['DB_REPLICA_RETRY_SECONDS']
+        app.extensions['replica_routing'] = self
+        if not self.enabled:
+            return
+        engine = create_engine(app.config['DATABASE_REPLICA_URL'], **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        with app.app_context():
+            app.extensions['sqlalchemy'].engines[REPLICA] = engine
+        app.after_request(self._remember_write)
+
+    def use_replica(self):
+        return self.enabled and has_request_context() and g.get('db_read_only', False) \
+            and self._down_until <= time.monotonic()
+
+    def is_sticky(self):
+        """현재 사용자가 최근에 쓴 적이 있어 기본 DB 를 써야 하는지"""
+        return session.get('db_primary_until', 0) > time.time()
+
+    def mark_down(self):
+        with self._lock:
+            self._down_until = time.monotonic() + self.retry_seconds
+
+    def _remember_write(self, response):
+        if g.pop('db_wrote', False) and self.sticky_seconds > 0 and session.get('user_id'):
+            session['db_primary_until'] = time.time() + self.sticky_seconds
+        return response
+
+
+routing = ReplicaRouting()
+
+
+class RoutingSession(Session):
+    """routing.use_replica() 인 동안 조회를 레플리카 엔진으로 보내는 세션"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and getattr(clause, 'is_select', False) and routing.use_replica():
+            engine = self._db.engines.get(REPLICA)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session_, flush_context):
+    if has_request_context():
+        g.db_wrote = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _after_dml(orm_execute_state):
+    # session.execute(insert/update/delete(...)) 는 flush 를 거치지 않는다
+    state = orm_execute_state
+    if has_request_context() and (state.is_insert or state.is_update or state.is_delete):
+        g.db_wrote = True
+
+
+def read_only(view):
+    """화면의 조회를 레플리카로 보낸다 (login_required 아래에 둔다)."""
+    @wraps(view)
+    def wrapped_view(*args, **kwargs):
+        if not routing.enabled or routing.is_sticky():
+            return view(*args, **kwargs)
+        g.db_read_only = True
+        try:
+            return view(*args, **kwargs)
+        except OperationalError:
+            # 레플리카 연결/조회 실패 - 조회만 하는 화면이므로 기본 DB 로 한 번 더 실행한다
+            current_app.extensions['sqlalchemy'].session.rollback()
+            current_app.logger.exception('Replica query failed, falling back to primary')
+            routing.mark_down()
+            g.db_read_only = False
+            return view(*args, **kwargs)
+        finally:
+            g.db_read_only = False
+    return wrapped_view
@@ -0,0 +1,130 @@
+import re
+import weakref
+
+from sqlalchemy import text, func
+
+from pybo import db
+from pybo.models import Question
+
+# SQLite FTS5 인덱스 (trigram 토크나이저: 한국어도 형태소 분석 없이 부분 문자열 검색 가능)
+FTS_TABLE = 'question_fts'
+# trigram 토크나이저는 3글자 미만의 MATCH 질의를 처리하지 못한다
+MIN_MATCH_LENGTH = 3
+
+_WHITESPACE = re.compile(r'\s+')
+
+# 엔진별 FTS 인덱스 존재 여부 (검색/질문 저장마다 sqlite_master 를 조회하지 않도록).
+# 다른 프로세스에서 flask search-reindex 로 처음 만들었으면 서버를 다시 시작해야 반영된다
+_enabled = weakref.WeakKeyDictionary()
+
+
+def normalize(value):
+    """공백을 제거해 띄어쓰기와 무관하게 검색되도록 한다."""
+    return _WHITESPACE.sub('', value or '')
+
+
+def is_enabled():
+    """FTS 인덱스를 사용할 수 있는지 (SQLite이고 인덱스 테이블이 생성되어 있는지). 엔진마다 한 번만 확인한다."""
+    engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return False
+    enabled = _enabled.get(engine)
+    if enabled is None:
+        found = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': FTS_TABLE},
+        ).first()
+        enabled = _enabled[engine] = found is not None
+    return enabled
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Alembic autogenerate에서 FTS 가상 테이블과 그 보조 테이블을 무시한다."""
+    if type_ == 'table' and reflected and name.startswith(FTS_TABLE):
+        return False
+    return True
+
+
+def create_index():
+    db.session.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+        f"USING fts5(subject, content, tokenize = 'trigram')"
+    ))
+
+
+def rebuild_index(batch_size=1000):
+    """인덱스를 비우고 모든 질문을 다시 색인한다. 색인한 질문 수를 반환."""
+    create_index()
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    total = 0
+    last_id = 0
+    while True:
+        rows = db.session.query(Question.id, Question.subject, Question.content)\
+            .filter(Question.id > last_id).order_by(Question.id).limit(batch_size).all()
+        if not rows:
+            break
+        db.session.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, subject, content) VALUES (:id, :subject, :content)"),
+            [{'id': row.id, 'subject': normalize(row.subject), 'content': normalize(row.content)} for row in rows],
+        )
+        total += len(rows)
+        last_id = rows[-1].id
+    db.session.commit()
+    _enabled.pop(db.engine, None)
+    return total
+
+
+def index_question(question):
+    """질문 생성/수정 시 호출. 커밋은 호출한 뷰의 트랜잭션에서 함께 이루어진다."""
+    if not is_enabled():
+        return
+    db.session.flush()
+    remove_question(question.id)
+    db.session.execute(
+        text(f"INSERT INTO {FTS_TABLE} (rowid, subject, content) VALUES (:id, :subject, :content)"),
+        {'id': question.id, 'subject': normalize(question.subject), 'content': normalize(question.content)},
+    )
+
+
+def remove_question(question_id):
+    if not is_enabled():
+        return
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {'id': question_id})
+
+
+def _match_phrase(keyword):
+    # FTS5 문자열 구문: 큰따옴표로 감싸고 내부 큰따옴표는 두 번 쓴다
+    return '"{}"'.format(keyword.replace('"', '""'))
+
+
+def filter_questions(query, keyword):
+    """검색어로 질문 쿼리를 필터링한다.
+
+    (query, rank) 를 반환하며, rank 는 관련도 정렬에 쓸 컬럼(작을수록 관련도 높음)이다.
+    관련도를 계산할 수 없는 경우(FTS 미사용, 짧은 검색어) rank 는 None.
+
+    MIN_MATCH_LENGTH(3)글자 미만의 검색어와 FTS 인덱스가 없을 때는 인덱스를 쓸 수 없어
+    LIKE '%...%' 로 전체를 훑으므로 질문 수에 비례해 느려진다 (trigram 은 3글자 단위로만 색인한다).
+    """
+    keyword = normalize(keyword)
+    if not is_enabled():
+        pattern = f'%{keyword}%'
+        query = query.filter(
+            (func.replace(Question.subject, ' ', '').ilike(pattern)) |
+            (func.replace(Question.content, ' ', '').ilike(pattern))
+        )
+        return query, None
+
+    if len(keyword) < MIN_MATCH_LENGTH:
+        matches = text(f"SELECT rowid FROM {FTS_TABLE} WHERE subject LIKE :pattern OR content LIKE :pattern")\
+            .bindparams(pattern=f'%{keyword}%')\
+            .columns(rowid=db.Integer)
+        return query.filter(Question.id.in_(matches)), None
+
+    matches = text(
+        f"SELECT rowid AS question_id, bm25({FTS_TABLE}) AS rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :phrase"
+    ).bindparams(phrase=_match_phrase(keyword))\
+        .columns(question_id=db.Integer, rank=db.Float)\
+        .subquery('search_match')
+    query = query.join(matches, matches.c.question_id == Question.id)
+    return query, matches.c.rank
@@ -0,0 +1,69 @@
+// 화면을 다시 그리지 않고 좋아요/즐겨찾기/답변/조회 수를 갱신한다 (GET /reaction/state/).
+// 응답에 ETag 가 있으므로 브라우저가 If-None-Match 로 다시 확인하고, 바뀐 것이 없으면 304 만 받는다.
+(function () {
+    const script = document.currentScript;
+    const stateUrl = script.dataset.stateUrl;
+    const interval = parseInt(script.dataset.interval || '30', 10) * 1000;
+
+    function ids(selector, key) {
+        return [...new Set([...document.querySelectorAll(selector)].map(el => el.dataset[key]))];
+    }
+
+    function setText(selector, value) {
+        document.querySelectorAll(selector).forEach(el => { el.textContent = value; });
+    }
+
+    function setIcon(button, active, on, off) {
+        const icon = button && button.querySelector('i');
+        if (icon) {
+            icon.className = active ? on : off;
+        }
+    }
+
+    function apply(data) {
+        Object.entries(data.question || {}).forEach(([id, state]) => {
+            const likeBtn = document.querySelector(`#like-btn-${id}`);
+            const bookmarkBtn = document.querySelector(`#bookmark-btn-${id}`);
+            setText(`#like-btn-${id} .like-count`, state.like_count);
+            setText(`#bookmark-btn-${id} .bookmark-count`, state.bookmark_count);
+            setText(`.view-count[data-question-id="${id}"]`, state.view_count);
+            setText(`.answer-count[data-question-id="${id}"]`, state.answer_count);
+            setIcon(likeBtn, state.is_liked, 'bi bi-heart-fill', 'bi bi-heart');
+            setIcon(bookmarkBtn, state.is_bookmarked, 'bi bi-star-fill', 'bi bi-star');
+        });
+        Object.entries(data.answer || {}).forEach(([id, state]) => {
+            setText(`#answer-like-btn-${id} .answer-like-count`, state.like_count);
+            setText(`#answer-bookmark-btn-${id} .answer-bookmark-count`, state.bookmark_count);
+            setIcon(document.querySelector(`#answer-like-btn-${id}`), state.is_liked,
+                    'bi bi-heart-fill', 'bi bi-heart');
+            setIcon(document.querySelector(`#answer-bookmark-btn-${id}`), state.is_bookmarked,
+                    'bi bi-bookmark-fill', 'bi bi-bookmark');
+        });
+    }
+
+    function refresh() {
+        const params = new URLSearchParams();
+        const questionIds = ids('.like-btn[data-question-id]', 'questionId');
+        const answerIds = ids('.answer-like-btn[data-answer-id]', 'answerId');
+        if (questionIds.length) params.set('question', questionIds.join(','));
+        if (answerIds.length) params.set('answer', answerIds.join(','));
+        if (!questionIds.length && !answerIds.length) return;
+        fetch(`${stateUrl}?${params}`, {headers: {'Accept': 'application/json'}})
+            .then(response => response.ok ? response.json() : null)
+            .then(data => { if (data) apply(data); })
+            .catch(() => {});
+    }
+
+    // 다른 탭에서 돌아오거나 뒤로 가기로 캐시된 화면이 다시 보일 때, 그리고 보이는 동안 주기적으로
+    document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'visible') refresh();
+    });
+    window.addEventListener('pageshow', event => {
+        if (event.persisted) refresh();
+    });
+    if (interval > 0) {
+        setInterval(() => {
+            if (document.visibilityState === 'visible') refresh();
+        }, interval);
+    }
+})();
@@ -0,0 +1,143 @@
+"""테스트용 도우미: 요청 하나가 실행하는 SQL 문 수를 세고 엔드포인트별 예산을 확인한다.
+
+    from pybo.testing import assert_query_budget
+
+    def test_detail_queries(app, client):
+        assert_query_budget(client, '/question/detail/1/')            # config['QUERY_BUDGETS'] 사용
+        assert_query_budget(client, '/question/list/?per_page=100', budget=6)
+
+    def test_indexes(app):
+        with app.app_context():
+            for name, statement, index in hot_queries():
+                assert_uses_index(statement, index)
+"""
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import event, select, func
+
+from pybo import db
+from pybo.models import (User, UnverifiedUser, Question, Answer, QuestionView, QuestionLike, QuestionBookmark,
+                         AnswerLike, AnswerBookmark)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class MissingIndex(AssertionError):
+    pass
+
+
+@contextmanager
+def count_queries(engine=None):
+    """블록 안에서 이 스레드가 실행한 SQL 문 목록을 모은다 (메일 워커 등 다른 스레드의 쿼리는 세지 않는다)."""
+    engine = engine if engine is not None else db.engine
+    statements = []
+    thread_id = threading.get_ident()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread_id:
+            statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def assert_query_budget(client, url, budget=None, method='get', **kwargs):
+    """client 로 url 을 요청하고 쿼리 수가 budget 이하인지 확인한다. 응답을 반환.
+
+    budget 을 주지 않으면 url 에 해당하는 엔드포인트의 app.config['QUERY_BUDGETS'] 값을 쓴다.
+    렌더링 캐시를 거치지 않도록 요청 동안 캐시를 비운다.
+    """
+    app = client.application
+    with app.app_context():
+        if budget is None:
+            endpoint, _ = app.url_map.bind('localhost').match(url.split('?', 1)[0], method=method.upper())
+            budget = current_app.config['QUERY_BUDGETS'][endpoint]
+        page_cache = app.extensions.get('page_cache')
+        if page_cache is not None:
+            page_cache.backend.clear()
+        with count_queries() as statements:
+            response = getattr(client, method)(url, **kwargs)
+    if len(statements) > budget:
+        raise QueryBudgetExceeded(
+            f'{method.upper()} {url} ran {len(statements)} queries (budget {budget}):\n' + '\n'.join(statements)
+        )
+    return response
+
+
+def explain_query_plan(statement):
+    """SQLite EXPLAIN QUERY PLAN 의 detail 열 목록"""
+    with db.engine.connect() as conn:
+        compiled = statement.compile(conn)
+        params = compiled.construct_params()
+        parameters = tuple(params[name] for name in compiled.positiontup)
+        rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', parameters).all()
+    return [row[-1] for row in rows]
+
+
+def assert_uses_index(statement, index, ordered=False):
+    """statement 의 실행 계획이 index 를 사용하는지 확인한다. 실행 계획을 반환.
+
+    ordered 면 ORDER BY 를 위한 정렬 단계(USE TEMP B-TREE)가 없는지도 확인한다.
+    """
+    plan = explain_query_plan(statement)
+    if not any(f'INDEX {index} ' in f'{detail} ' for detail in plan):
+        raise MissingIndex(f'{index} is not used:\n{statement}\n' + '\n'.join(plan))
+    if ordered and any('USE TEMP B-TREE' in detail for detail in plan):
+        raise MissingIndex(f'{index} does not cover the ORDER BY:\n{statement}\n' + '\n'.join(plan))
+    return plan
+
+
+def hot_queries(user_id=1, question_id=1, username='user', email='user@example.com'):
+    """자주 실행되는 조회와 그 조회가 사용해야 하는 인덱스: [(이름, statement, 인덱스 이름)]"""
+    def recent(model, fk_column, value):
+        return select(model).where(fk_column == value).order_by(model.create_date.desc())
+
+    return [
+        ('question list recent', select(Question).order_by(Question.create_date.desc(), Question.id.desc()).limit(10),
+         'ix_question_create_date'),
+        ('question list likes', select(Question).order_by(
+            Question.like_count.desc(), Question.create_date.desc(), Question.id.desc()).limit(10),
+         'ix_question_like_count'),
+        ('question list bookmarks', select(Question).order_by(
+            Question.bookmark_count.desc(), Question.create_date.desc(), Question.id.desc()).limit(10),
+         'ix_question_bookmark_count'),
+        ('question list views', select(Question).order_by(
+            Question.view_count.desc(), Question.create_date.desc(), Question.id.desc()).limit(10),
+         'ix_question_view_count'),
+        ('question list hot', select(Question).order_by(
+            Question.hot_score.desc(), Question.create_date.desc(), Question.id.desc()).limit(10),
+         'ix_question_hot_score'),
+        ('questions by user', recent(Question, Question.user_id, user_id), 'ix_question_user_id'),
+        ('answers recent', recent(Answer, Answer.question_id, question_id), 'ix_answer_question_create_date'),
+        ('answers likes', select(Answer).where(Answer.question_id == question_id).order_by(
+            Answer.like_count.desc(), Answer.create_date.desc()), 'ix_answer_question_like_count'),
+        ('answers by user', recent(Answer, Answer.user_id, user_id), 'ix_answer_user_id'),
+        ('liked questions', recent(QuestionLike, QuestionLike.user_id, user_id), 'ix_question_like_user_created'),
+        ('bookmarked questions', recent(QuestionBookmark, QuestionBookmark.user_id, user_id),
+         'ix_question_bookmark_user_created'),
+        ('liked answers', recent(AnswerLike, AnswerLike.user_id, user_id), 'ix_answer_like_user_created'),
+        ('bookmarked answers', recent(AnswerBookmark, AnswerBookmark.user_id, user_id),
+         'ix_answer_bookmark_user_created'),
+        ('view dedup', select(QuestionView.id).where(
+            QuestionView.question_id == question_id, QuestionView.user_id == user_id,
+            QuestionView.created_at > datetime(2000, 1, 1)), 'ix_question_view_question_user_created'),
+        ('user by username', select(User).where(func.lower(User.username) == func.lower(username)),
+         'ix_user_username_lower'),
+        ('user by email', select(User).where(func.lower(User.email) == func.lower(email)), 'ix_user_email_lower'),
+        ('user by oauth id', select(User).where(User.oauth_provider == 'google', User.oauth_id == 'sub'),
+         'ix_user_oauth'),
+        ('pending user by username', select(UnverifiedUser).where(
+            func.lower(UnverifiedUser.username) == func.lower(username)), 'ix_unverified_user_username_lower'),
+        ('pending user by email', select(UnverifiedUser).where(
+            func.lower(UnverifiedUser.email) == func.lower(email)), 'ix_unverified_user_email_lower'),
+        ('expired pending users', select(UnverifiedUser.id).where(UnverifiedUser.create_date < datetime(2000, 1, 1))
+         .order_by(UnverifiedUser.create_date).limit(500), 'ix_unverified_user_create_date'),
+    ]
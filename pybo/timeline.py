@@ -0,0 +1,72 @@
+from sqlalchemy import select, literal, union_all, func, null
+
+from pybo import db, pagination
+from pybo.models import Question, Answer, QuestionLike, AnswerLike, QuestionBookmark, AnswerBookmark
+
+# 답변은 내용 전체 대신 이 길이까지만 읽는다 (더 길면 '...' 로 표시)
+EXCERPT_LENGTH = 300
+
+# 종류 -> (반응 모델, 대상 모델, 반응 모델의 대상 FK)
+KINDS = {
+    'question_like': (QuestionLike, Question, QuestionLike.question_id),
+    'answer_like': (AnswerLike, Answer, AnswerLike.answer_id),
+    'question_bookmark': (QuestionBookmark, Question, QuestionBookmark.question_id),
+    'answer_bookmark': (AnswerBookmark, Answer, AnswerBookmark.answer_id),
+}
+# 정렬 키: 반응 시각, 종류, 반응 id (id 는 테이블마다 따로 매겨지므로 종류까지 있어야 유일하다)
+CURSOR_KEYS = ('reacted_at', 'kind', 'reaction_id')
+LIKES = ('question_like', 'answer_like')
+BOOKMARKS = ('question_bookmark', 'answer_bookmark')
+
+
+def _branch(kind, user_id, values, limit):
+    """한 종류의 반응을 최근 순으로 limit 개. values 가 있으면 그 커서 다음부터."""
+    reaction, target, fk_column = KINDS[kind]
+    if target is Question:
+        columns = [Question.id.label('question_id'), null().label('answer_id'),
+                   Question.subject.label('text'), Question.create_date.label('item_date')]
+    else:
+        columns = [Answer.question_id.label('question_id'), Answer.id.label('answer_id'),
+                   func.substr(Answer.content, 1, EXCERPT_LENGTH + 1).label('text'),
+                   Answer.create_date.label('item_date')]
+    stmt = select(literal(kind).label('kind'), reaction.id.label('reaction_id'),
+                  reaction.create_date.label('reacted_at'), *columns)\
+        .join(target, target.id == fk_column)\
+        .where(reaction.user_id == user_id)
+    if values is not None:
+        keys = [(reaction.create_date, True), (literal(kind), True), (reaction.id, True)]
+        # 앞의 범위 조건은 (user_id, create_date) 인덱스에서 커서 위치로 바로 찾아가기 위한 것
+        stmt = stmt.where(reaction.create_date <= values[0], pagination.seek_condition(keys, values, reverse=False))
+    return stmt.order_by(reaction.create_date.desc(), reaction.id.desc()).limit(limit)
+
+
+def reaction_timeline(user_id, kinds, per_page=20, after=None):
+    """사용자의 반응(kinds)을 반응 시각 최근 순으로 합친 페이지 (KeysetPage).
+
+    종류마다 커서 다음 per_page + 1 개만 읽어 UNION ALL 로 합치므로, 반응이 아무리 많아도
+    페이지마다 읽는 행 수가 일정하다. items 는 kind, reaction_id, reacted_at, question_id,
+    answer_id, text(질문 제목 또는 답변 앞부분), item_date 를 가진 행이다.
+    """
+    sort = '+'.join(kinds)
+    values = None
+    if after:
+        values = pagination.decode_cursor(sort, CURSOR_KEYS, after)
+        if values is None:
+            after = None
+
+    branches = [_branch(kind, user_id, values, per_page + 1).subquery() for kind in kinds]
+    if len(branches) == 1:
+        timeline = branches[0]
+    else:
+        timeline = union_all(*[select(branch) for branch in branches]).subquery()
+    keys = [(timeline.c[name], True) for name in CURSOR_KEYS]
+    rows = db.session.execute(
+        select(timeline).order_by(*pagination.order_by(keys)).limit(per_page + 1)
+    ).all()
+
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+    return pagination.KeysetPage(
+        items, per_page, has_prev=bool(after), has_next=has_next, prev_cursor=None,
+        next_cursor=pagination.encode_cursor(sort, keys, items[-1]) if has_next else None,
+    )
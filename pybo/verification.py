@@ -0,0 +1,64 @@
+import hashlib
+import secrets
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, select
+
+from pybo import db
+from pybo.models import UnverifiedUser
+
+
+def new_token():
+    """인증 링크용 토큰 -> (메일로 보낼 토큰, DB 에 저장할 해시)"""
+    token = secrets.token_urlsafe(48)
+    return token, hash_token(token)
+
+
+def hash_token(token):
+    """토큰은 SHA-256 hex(64자)로만 저장한다. 추측할 수 없는 임의 값이므로 솔트는 필요 없다."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def expires_before():
+    """이 시각(UTC) 이전에 만든 인증 대기 가입은 만료된 것이다."""
+    return datetime.utcnow() - timedelta(seconds=current_app.config['SIGNUP_TOKEN_MAX_AGE'])
+
+
+def is_expired(pending):
+    return pending.create_date < expires_before()
+
+
+def live(query):
+    """만료되지 않은 인증 대기 가입만"""
+    return query.filter(UnverifiedUser.create_date >= expires_before())
+
+
+def release(username, email=None):
+    """새 가입이 쓸 수 있도록 이 사용자ID/이메일을 잡고 있는 만료된 인증 대기 가입을 지운다 (커밋은 호출한 쪽에서)."""
+    held = db.func.lower(UnverifiedUser.username) == db.func.lower(username)
+    if email:
+        held = held | (db.func.lower(UnverifiedUser.email) == db.func.lower(email))
+    db.session.execute(delete(UnverifiedUser).where(held, UnverifiedUser.create_date < expires_before()))
+
+
+def sweep_expired(batch_size=500, max_batches=None, pause=0.0):
+    """만료된 인증 대기 가입을 batch_size 개씩 짧은 트랜잭션으로 지운다. (지운 수, 배치 수) 를 반환."""
+    cutoff = expires_before()
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = db.session.scalars(
+            select(UnverifiedUser.id).where(UnverifiedUser.create_date < cutoff)
+            .order_by(UnverifiedUser.create_date).limit(batch_size)
+        ).all()
+        if not ids:
+            break
+        db.session.execute(delete(UnverifiedUser).where(UnverifiedUser.id.in_(ids)))
+        db.session.commit()
+
+        total += len(ids)
+        batches += 1
+        if pause:
+            time.sleep(pause)
+    return total, batches
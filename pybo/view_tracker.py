@@ -0,0 +1,216 @@
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, insert, select, update
+
+from pybo import db, ranking
+from pybo.models import Question, QuestionView, QuestionViewDaily
+
+
+class ViewTracker:
+    """질문 조회수를 메모리에 모았다가 일정 주기/개수마다 한 번에 DB 에 반영한다.
+
+    - 동일 사용자의 중복 조회(VIEW_DEDUP_WINDOW 초 이내)는 크기가 제한된 메모리 TTL 캐시로 거른다.
+    - 누적된 조회는 VIEW_FLUSH_INTERVAL 초마다, 또는 VIEW_FLUSH_MAX_PENDING 개가 쌓이면
+      하나의 트랜잭션으로 Question.view_count 와 question_view 에 기록한다.
+      (프로세스가 비정상 종료되면 최대 VIEW_FLUSH_MAX_PENDING 개의 조회가 유실될 수 있다)
+    - 반영에 실패하면 VIEW_FLUSH_RETRY_BACKOFF 초부터 두 배씩 (최대 VIEW_FLUSH_RETRY_MAX 초) 기다렸다가
+      다시 시도하고, 그동안 버퍼는 VIEW_BUFFER_MAX_ROWS 개까지만 유지하며 오래된 조회부터 버린다.
+    - 중복 조회 캐시는 프로세스(워커)마다 따로 유지된다.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._lock = threading.Lock()
+        self._seen = OrderedDict()  # (question_id, user_id) -> 만료 시각 (monotonic)
+        self._pending = {}          # question_id -> 반영 대기 중인 조회수
+        self._rows = []             # question_view 에 기록할 조회 기록
+        self._worker = None
+        self._failures = 0          # 연속으로 실패한 flush 횟수
+        self._retry_at = 0.0        # 이 시각 (monotonic) 전에는 flush 하지 않는다
+        self._dropped = 0           # 버퍼가 넘쳐 버렸지만 아직 로그에 남기지 않은 조회 수
+
+    def init_app(self, app):
+        app.config.setdefault('VIEW_DEDUP_WINDOW', 3600)
+        app.config.setdefault('VIEW_DEDUP_MAX_ENTRIES', 100000)
+        app.config.setdefault('VIEW_FLUSH_INTERVAL', 5)
+        app.config.setdefault('VIEW_FLUSH_MAX_PENDING', 100)
+        app.config.setdefault('VIEW_FLUSH_RETRY_BACKOFF', 1.0)
+        app.config.setdefault('VIEW_FLUSH_RETRY_MAX', 60.0)
+        app.config.setdefault('VIEW_BUFFER_MAX_ROWS', 10000)
+        app.extensions['view_tracker'] = self
+        if self.app is None:
+            atexit.register(self.flush)
+        self.app = app
+
+    def record(self, question_id, user_id):
+        """조회를 기록한다. 중복 조회 기간 내의 재조회면 False."""
+        config = self.app.config
+        now = time.monotonic()
+        key = (question_id, user_id)
+        with self._lock:
+            expires_at = self._seen.get(key)
+            if expires_at is not None and expires_at > now:
+                return False
+            self._seen[key] = now + config['VIEW_DEDUP_WINDOW']
+            self._seen.move_to_end(key)
+            self._evict(now, config['VIEW_DEDUP_MAX_ENTRIES'])
+
+            self._pending[question_id] = self._pending.get(question_id, 0) + 1
+            self._rows.append({'question_id': question_id, 'user_id': user_id, 'created_at': datetime.utcnow()})
+            self._trim(config['VIEW_BUFFER_MAX_ROWS'])
+            # 직전 flush 가 실패했다면 재시도 시각 전까지는 요청 안에서 다시 시도하지 않는다
+            should_flush = len(self._rows) >= config['VIEW_FLUSH_MAX_PENDING'] and now >= self._retry_at
+
+        if should_flush:
+            self.flush()
+        else:
+            self._ensure_worker()
+        return True
+
+    def pending_for(self, question_id):
+        """아직 DB 에 반영되지 않은 조회수"""
+        with self._lock:
+            return self._pending.get(question_id, 0)
+
+    def _evict(self, now, max_entries):
+        # 만료 시각은 삽입 순서와 같으므로 앞에서부터 만료된 항목을 제거한다
+        while self._seen:
+            key, expires_at = next(iter(self._seen.items()))
+            if expires_at > now and len(self._seen) <= max_entries:
+                break
+            self._seen.popitem(last=False)
+
+    def _trim(self, max_rows):
+        # 버퍼가 넘치면 오래된 조회부터 버리고 대기 중인 조회수에서도 뺀다
+        excess = len(self._rows) - max_rows
+        if excess <= 0:
+            return
+        for row in self._rows[:excess]:
+            qid = row['question_id']
+            self._pending[qid] -= 1
+            if not self._pending[qid]:
+                del self._pending[qid]
+        del self._rows[:excess]
+        self._dropped += excess
+
+    def _ensure_worker(self):
+        interval = self.app.config['VIEW_FLUSH_INTERVAL']
+        if interval <= 0 or (self._worker is not None and self._worker.is_alive()):
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, args=(interval,), name='view-tracker', daemon=True)
+            self._worker.start()
+
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            if time.monotonic() >= self._retry_at:
+                self.flush()
+
+    def flush(self):
+        """쌓인 조회수를 하나의 트랜잭션으로 반영한다. 실패하면 잠시 뒤 다음 flush 에서 다시 시도."""
+        with self._lock:
+            pending, rows = self._pending, self._rows
+            self._pending, self._rows = {}, []
+        if not pending or self.app is None:
+            return 0
+
+        config = self.app.config
+        queued = rows
+
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as conn:
+                    # 그 사이 삭제된 질문의 조회 기록은 버린다
+                    existing = set(conn.scalars(select(Question.id).where(Question.id.in_(list(pending)))))
+                    updates = [{'b_id': qid, 'b_count': count} for qid, count in pending.items() if qid in existing]
+                    rows = [row for row in rows if row['question_id'] in existing]
+                    if updates:
+                        table = Question.__table__
+                        values = {'view_count': table.c.view_count + bindparam('b_count')}
+                        # 인기순 점수에는 반영 시각에 조회수만큼의 조회가 일어난 것으로 더한다
+                        now = datetime.now()
+                        if ranking.event_score('view', now) is not None:
+                            values['hot_score'] = ranking.added(table.c.hot_score, bindparam('b_score', type_=db.Float))
+                            for params in updates:
+                                params['b_score'] = ranking.event_score('view', now, params['b_count'])
+                        conn.execute(update(table).where(table.c.id == bindparam('b_id')).values(values), updates)
+                    if rows:
+                        conn.execute(insert(QuestionView.__table__), rows)
+        except Exception:
+            self.app.logger.exception('Failed to flush question views')
+            with self._lock:
+                for qid, count in pending.items():
+                    self._pending[qid] = self._pending.get(qid, 0) + count
+                self._rows[:0] = queued
+                self._trim(config['VIEW_BUFFER_MAX_ROWS'])
+                dropped, self._dropped = self._dropped, 0
+                self._failures += 1
+                delay = min(config['VIEW_FLUSH_RETRY_BACKOFF'] * 2 ** (self._failures - 1),
+                            config['VIEW_FLUSH_RETRY_MAX'])
+                self._retry_at = time.monotonic() + delay
+            if dropped:
+                self.app.logger.warning('Dropped %d buffered question views (buffer full)', dropped)
+            return 0
+
+        with self._lock:
+            dropped, self._dropped = self._dropped, 0
+            self._failures, self._retry_at = 0, 0.0
+        if dropped:
+            self.app.logger.warning('Dropped %d buffered question views (buffer full)', dropped)
+        return len(rows)
+
+
+def compact_views(older_than, batch_size=1000, max_batches=None, pause=0.0):
+    """older_than 초보다 오래된 question_view 기록을 일별 조회수로 합치고 삭제한다.
+
+    batch_size 개씩 나누어 각각 짧은 트랜잭션으로 처리하므로 쓰기 잠금을 오래 잡지 않는다.
+    처리한 (기록 수, 배치 수) 를 반환한다.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=older_than)
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        rows = db.session.query(QuestionView.id, QuestionView.question_id, QuestionView.created_at)\
+            .filter(QuestionView.created_at < cutoff)\
+            .order_by(QuestionView.created_at).limit(batch_size).all()
+        if not rows:
+            break
+
+        counts = {}
+        for row in rows:
+            key = (row.question_id, row.created_at.date())
+            counts[key] = counts.get(key, 0) + 1
+
+        question_ids = {question_id for question_id, _ in counts}
+        days = {day for _, day in counts}
+        existing = {
+            (daily.question_id, daily.day): daily
+            for daily in QuestionViewDaily.query.filter(
+                QuestionViewDaily.question_id.in_(question_ids), QuestionViewDaily.day.in_(days)
+            )
+        }
+        for (question_id, day), count in counts.items():
+            daily = existing.get((question_id, day))
+            if daily:
+                daily.view_count += count
+            else:
+                db.session.add(QuestionViewDaily(question_id=question_id, day=day, view_count=count))
+
+        QuestionView.query.filter(QuestionView.id.in_([row.id for row in rows]))\
+            .delete(synchronize_session=False)
+        db.session.commit()
+
+        total += len(rows)
+        batches += 1
+        if pause:
+            time.sleep(pause)
+    return total, batches
+
+
+view_tracker = ViewTracker()
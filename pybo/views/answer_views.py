@@ -1,12 +1,15 @@
 from datetime import datetime
 
-from flask import Blueprint, url_for, request, render_template, session, abort, jsonify
+from flask import Blueprint, url_for, request, abort, g
 from werkzeug.utils import redirect
 
-from pybo import db
+from pybo import db, ranking
 from ..forms import AnswerForm
-from pybo.models import Question, Answer, User, AnswerLike, AnswerBookmark
+from pybo.models import Question, Answer
 from pybo.login_required import login_required
+from pybo.cache import page_cache
+from pybo.views.question_views import render_detail
+from pybo.views.reaction_views import toggle_response
 
 bp = Blueprint('answer',__name__, url_prefix='/answer')
 
@@ -16,19 +19,23 @@ def create(question_id):
     form = AnswerForm()
     question = Question.query.get_or_404(question_id)
     if form.validate_on_submit():
-        user = User.query.filter_by(username=session.get('username')).first()
+        user = g.user
         content = request.form['content']
         answer = Answer(content=content, create_date=datetime.now(), user_id=user.id)
         question.answer_set.append(answer)
+        question.answer_count = Question.answer_count + 1
+        ranking.record(question_id, 'answer', answer.create_date)
         db.session.commit()
+        # 인기순 점수가 바뀌므로 인기순 목록도 무효화한다
+        page_cache.invalidate(f'question:{question_id}', 'question-list:hot')
         return redirect(url_for('question.detail', question_id=question_id))
-    return render_template('question/question_detail.html', question=question, form=form)
+    return render_detail(question_id, form)
 
 @bp.route('/modify/<int:answer_id>/', methods=('GET', 'POST'))
 @login_required
 def modify(answer_id):
     answer = Answer.query.get_or_404(answer_id)
-    user = User.query.filter_by(username=session.get('username')).first()
+    user = g.user
     
     # 본인이 작성한 답변이 아니면 접근 불가
     if answer.user_id != user.id:
@@ -37,80 +44,45 @@ def modify(answer_id):
     form = AnswerForm()
     if request.method == 'POST' and form.validate_on_submit():
         form.populate_obj(answer)
+        # 수정 시각이 작성 시각이 되므로 인기순 점수의 답변 시각도 옮긴다
+        ranking.retract(answer.question_id, 'answer', answer.create_date)
         answer.create_date = datetime.now()
+        ranking.record(answer.question_id, 'answer', answer.create_date)
         db.session.commit()
+        page_cache.invalidate(f'question:{answer.question_id}', 'question-list:hot')
         return redirect(url_for('question.detail', question_id=answer.question_id))
     elif request.method == 'GET':
         form.content.data = answer.content
     
-    return render_template('question/question_detail.html', question=answer.question, form=form)
+    return render_detail(answer.question_id, form)
 
 @bp.route('/delete/<int:answer_id>/', methods=('POST',))
 @login_required
 def delete(answer_id):
     answer = Answer.query.get_or_404(answer_id)
-    user = User.query.filter_by(username=session.get('username')).first()
+    user = g.user
     
     # 본인이 작성한 답변이 아니면 접근 불가
     if answer.user_id != user.id:
         abort(403)
     
     question_id = answer.question_id
+    answer.question.answer_count = Question.answer_count - 1
+    ranking.retract(question_id, 'answer', answer.create_date)
     db.session.delete(answer)
     db.session.commit()
+    page_cache.invalidate(f'question:{question_id}', 'question-list:hot')
     return redirect(url_for('question.detail', question_id=question_id))
 
 
 @bp.route('/like/<int:answer_id>/', methods=('POST',))
 @login_required
 def like_answer(answer_id):
-    answer = Answer.query.get_or_404(answer_id)
-    user = User.query.filter_by(username=session.get('username')).first()
-    
     # 이미 좋아요를 눌렀으면 취소
-    existing_like = AnswerLike.query.filter_by(
-        answer_id=answer_id, user_id=user.id
-    ).first()
-    
-    if existing_like:
-        db.session.delete(existing_like)
-    else:
-        like = AnswerLike(answer_id=answer_id, user_id=user.id, create_date=datetime.now())
-        db.session.add(like)
-    
-    db.session.commit()
-    
-    like_count = AnswerLike.query.filter_by(answer_id=answer_id).count()
-    is_liked = AnswerLike.query.filter_by(
-        answer_id=answer_id, user_id=user.id
-    ).first() is not None
-    
-    return jsonify({
-        'success': True,
-        'like_count': like_count,
-        'is_liked': is_liked
-    })
+    return toggle_response('answer', 'like', answer_id)
 
 
 @bp.route('/bookmark/<int:answer_id>/', methods=('POST',))
 @login_required
 def bookmark_answer(answer_id):
-    answer = Answer.query.get_or_404(answer_id)
-    user = User.query.filter_by(username=session.get('username')).first()
-
-    existing = AnswerBookmark.query.filter_by(answer_id=answer_id, user_id=user.id).first()
-    if existing:
-        db.session.delete(existing)
-    else:
-        bm = AnswerBookmark(answer_id=answer_id, user_id=user.id, create_date=datetime.now())
-        db.session.add(bm)
-    db.session.commit()
-
-    bookmark_count = AnswerBookmark.query.filter_by(answer_id=answer_id).count()
-    is_bookmarked = AnswerBookmark.query.filter_by(answer_id=answer_id, user_id=user.id).first() is not None
-
-    return jsonify({
-        'success': True,
-        'bookmark_count': bookmark_count,
-        'is_bookmarked': is_bookmarked
-    })
\ No newline at end of file
+    return toggle_response('answer', 'bookmark', answer_id)
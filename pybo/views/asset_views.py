@@ -0,0 +1,44 @@
+import mimetypes
+import os
+
+from flask import Blueprint, request, abort, send_file, current_app
+from werkzeug.security import safe_join
+
+from pybo.assets import is_fingerprinted, static_assets
+
+bp = Blueprint('asset', __name__, url_prefix='/assets')
+
+# 브라우저가 받는다고 한 인코딩 중 먼저 있는 것을 보낸다
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+@bp.route('/<path:filename>')
+def serve(filename):
+    """flask assets-build 로 만든 파일.
+
+    해시 이름 파일은 이름이 내용에 따라 바뀌므로 immutable 로 캐시한다. 이름이 그대로인 파일(manifest.json)은
+    빌드할 때마다 바뀌므로 매번 ETag 로 확인하게 한다 (no-cache).
+    """
+    path = safe_join(static_assets.directory, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    encoding = None
+    for name, ext in ENCODINGS:
+        if request.accept_encodings[name] > 0 and os.path.isfile(path + ext):
+            encoding, path = name, path + ext
+            break
+
+    immutable = is_fingerprinted(filename)
+    response = send_file(path, mimetype=mimetype, conditional=True,
+                         max_age=current_app.config['STATIC_ASSETS_MAX_AGE'] if immutable else 0)
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    if immutable:
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
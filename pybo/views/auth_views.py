@@ -1,19 +1,40 @@
-from flask import Blueprint, render_template, request, url_for, session, flash, jsonify, current_app
+from flask import Blueprint, render_template, request, url_for, session, flash, jsonify, current_app, g
 from werkzeug.utils import redirect
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 import re
 from sqlalchemy.exc import IntegrityError
 import requests
 
-from pybo import db, oauth
-from pybo.models import User, UnverifiedUser, Question, Answer, QuestionLike, AnswerLike, QuestionBookmark, AnswerBookmark
+from pybo import db, oauth, timeline, verification
+from pybo.models import User, UnverifiedUser
 import secrets
 from pybo.login_required import login_required
+from pybo.routing import read_only
 from pybo.email_utils import send_verification_email
+from pybo.availability import availability
+from pybo.passwords import passwords, PasswordHashingBusy
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
 
+# 좋아요/즐겨찾기 목록 한 페이지의 항목 수
+TIMELINE_PER_PAGE = 20
+
+
+def _hashing_busy(template):
+    """비밀번호 해시 작업이 밀려 있을 때의 응답 (503, 잠시 후 다시 시도)"""
+    flash('로그인 요청이 많습니다. 잠시 후 다시 시도해주세요.')
+    retry_after = max(1, int(current_app.config['PASSWORD_HASH_WAIT']))
+    return render_template(template), 503, {'Retry-After': str(retry_after)}
+
+
+def _rehash(user, password):
+    """해시 방식/비용이 바뀌었으면 입력한 비밀번호로 다시 해시해 둔다 (밀려 있으면 다음 로그인으로 미룬다)."""
+    try:
+        user.password = passwords.hash(password)
+    except PasswordHashingBusy:
+        return
+    db.session.commit()
+
 
 @bp.route('/login/', methods=('GET', 'POST'))
 def login():
@@ -35,11 +56,18 @@ def login():
                 # If the user signed up via OAuth there may be no local password
                 if not user.password:
                     error = '이 계정은 외부 로그인으로 생성되었습니다. 비밀번호로 로그인할 수 없습니다.'
-                elif not check_password_hash(user.password, password):
-                    error = '비밀번호가 올바르지 않습니다.'
-                # If user has an email but hasn't verified it, prevent password login
-                elif user.email and not user.email_verified:
-                    error = '이메일 인증이 필요합니다. 등록하신 이메일을 확인해주세요.'
+                else:
+                    try:
+                        password_ok = passwords.check(user.password, password)
+                    except PasswordHashingBusy:
+                        return _hashing_busy('auth/login.html')
+                    if not password_ok:
+                        error = '비밀번호가 올바르지 않습니다.'
+                    # If user has an email but hasn't verified it, prevent password login
+                    elif user.email and not user.email_verified:
+                        error = '이메일 인증이 필요합니다. 등록하신 이메일을 확인해주세요.'
+                    elif passwords.needs_rehash(user.password):
+                        _rehash(user, password)
             
         if error is None:
             session.clear()
@@ -141,15 +169,21 @@ def authorize_google():
         base_username = email.split('@')[0]
         username_candidate = base_username
         i = 1
-        while User.query.filter(db.func.lower(User.username) == db.func.lower(username_candidate)).first():
+        # 만들 사용자ID 이므로 메모리 인덱스가 아닌 DB 로 확인한다
+        while availability.username_in_use(username_candidate):
             username_candidate = f"{base_username}{i}"
             i += 1
 
-        random_pw = generate_password_hash(secrets.token_urlsafe(16))
+        try:
+            random_pw = passwords.hash(secrets.token_urlsafe(16))
+        except PasswordHashingBusy:
+            flash('로그인 요청이 많습니다. 잠시 후 다시 시도해주세요.')
+            return redirect(url_for('auth.login'))
         user = User(username=username_candidate, password=random_pw, email=email,
                     oauth_provider='google', oauth_id=sub, create_date=datetime.utcnow())
         db.session.add(user)
         db.session.commit()
+        availability.add(username=user.username, email=user.email)
 
     # Log the user in
     session.clear()
@@ -161,8 +195,9 @@ def authorize_google():
 
 @bp.route('/profile/')
 @login_required
+@read_only
 def profile():
-    user = User.query.get(session.get('user_id'))
+    user = g.user
     if not user:
         flash('사용자를 찾을 수 없습니다.')
         return redirect(url_for('auth.login'))
@@ -171,49 +206,40 @@ def profile():
 
 @bp.route('/liked/')
 @login_required
+@read_only
 def liked_items():
-    user = User.query.get(session.get('user_id'))
+    user = g.user
     if not user:
         flash('사용자를 찾을 수 없습니다.')
         return redirect(url_for('auth.login'))
-
-    liked_questions = Question.query.join(QuestionLike, Question.id == QuestionLike.question_id)\
-        .filter(QuestionLike.user_id == user.id)\
-        .order_by(QuestionLike.create_date.desc()).all()
-
-    liked_answers = Answer.query.join(AnswerLike, Answer.id == AnswerLike.answer_id)\
-        .filter(AnswerLike.user_id == user.id)\
-        .order_by(AnswerLike.create_date.desc()).all()
-
-    bookmarked_questions = Question.query.join(QuestionBookmark, Question.id == QuestionBookmark.question_id)\
-        .filter(QuestionBookmark.user_id == user.id)\
-        .order_by(QuestionBookmark.create_date.desc()).all()
-
-    bookmarked_answers = Answer.query.join(AnswerBookmark, Answer.id == AnswerBookmark.answer_id)\
-        .filter(AnswerBookmark.user_id == user.id)\
-        .order_by(AnswerBookmark.create_date.desc()).all()
-
-    return render_template('auth/liked.html', user=user, liked_questions=liked_questions, liked_answers=liked_answers,
-                           bookmarked_questions=bookmarked_questions, bookmarked_answers=bookmarked_answers)
+    return _render_timeline('auth/liked.html', user, timeline.LIKES)
 
 
 @bp.route('/bookmarks/')
 @login_required
+@read_only
 def bookmarked_items():
-    user = User.query.get(session.get('user_id'))
+    user = g.user
     if not user:
         flash('사용자를 찾을 수 없습니다.')
         return redirect(url_for('auth.login'))
-
-    bookmarked_questions = Question.query.join(QuestionBookmark, Question.id == QuestionBookmark.question_id)\
-        .filter(QuestionBookmark.user_id == user.id)\
-        .order_by(QuestionBookmark.create_date.desc()).all()
-
-    bookmarked_answers = Answer.query.join(AnswerBookmark, Answer.id == AnswerBookmark.answer_id)\
-        .filter(AnswerBookmark.user_id == user.id)\
-        .order_by(AnswerBookmark.create_date.desc()).all()
-
-    return render_template('auth/bookmarks.html', user=user, bookmarked_questions=bookmarked_questions, bookmarked_answers=bookmarked_answers)
+    return _render_timeline('auth/bookmarks.html', user, timeline.BOOKMARKS)
+
+
+def _render_timeline(template, user, kinds):
+    # 질문/답변 반응을 반응 시각 순으로 합쳐 한 페이지씩 보여준다 (type=question/answer 이면 한 종류만)
+    item_type = request.args.get('type', 'all', type=str)
+    after = request.args.get('after', '', type=str)
+    question_kind, answer_kind = kinds
+    if item_type == 'question':
+        kinds = (question_kind,)
+    elif item_type == 'answer':
+        kinds = (answer_kind,)
+    else:
+        item_type = 'all'
+    items = timeline.reaction_timeline(user.id, kinds, per_page=TIMELINE_PER_PAGE, after=after)
+    return render_template(template, user=user, timeline=items, item_type=item_type,
+                           excerpt_length=timeline.EXCERPT_LENGTH)
 
 
 @bp.route('/check_username/', methods=['POST'])
@@ -231,17 +257,9 @@ def check_username():
     if not re.match(r'^[a-zA-Z0-9]+$', username):
         return jsonify({'available': False, 'message': '사용자ID는 영문과 숫자만 사용할 수 있습니다.'})
     
-    # 중복 체크 (대소문자 구분 없이)
-    # check existing confirmed users
-    existing_user = User.query.filter(
-        db.func.lower(User.username) == db.func.lower(username)
-    ).first()
-    # check pending unverified users to avoid duplicates
-    pending = UnverifiedUser.query.filter(
-        db.func.lower(UnverifiedUser.username) == db.func.lower(username)
-    ).first()
-    
-    if existing_user or pending:
+    # 중복 체크 (대소문자 구분 없이, 인증 대기 중인 사용자 포함)
+    # 메모리 인덱스에 확실히 없으면 DB 를 조회하지 않는다
+    if not availability.username_available(username):
         return jsonify({'available': False, 'message': '이미 존재하는 사용자ID입니다.'})
     else:
         return jsonify({'available': True, 'message': '사용 가능한 사용자ID입니다.'})
@@ -283,7 +301,7 @@ def signup():
             if existing_user:
                 error = '이미 존재하는 사용자ID입니다.'
             elif email:
-                # 이메일도 대소문자 구분 없이 확인
+                # 이메일도 대소문자 구분 없이 확인 (메모리 인덱스는 다른 워커의 가입을 놓칠 수 있으므로 항상 DB 로)
                 existing_email = User.query.filter(
                     db.func.lower(User.email) == db.func.lower(email)
                 ).first()
@@ -292,31 +310,38 @@ def signup():
         
         # 이메일이 주어진 경우, 바로 User로 저장하지 않고 임시 테이블에 저장한 뒤 인증 완료 시 생성
         if error is None:
+            try:
+                password_hash = passwords.hash(password)
+            except PasswordHashingBusy:
+                return _hashing_busy('auth/signup.html')
             try:
                 if email:
-                    # create or update pending unverified entry
-                    token = secrets.token_urlsafe(48)
+                    # create or update pending unverified entry (DB 에는 토큰의 해시만 저장)
+                    token, token_hash = verification.new_token()
+                    # 만료된 인증 대기 가입이 이 사용자ID/이메일을 잡고 있으면 먼저 지운다
+                    verification.release(username, email)
                     # If there's already a pending entry for this email, update it instead
                     existing_pending = UnverifiedUser.query.filter(
                         db.func.lower(UnverifiedUser.email) == db.func.lower(email)
                     ).first()
                     if existing_pending:
                         existing_pending.username = username
-                        existing_pending.password = generate_password_hash(password)
-                        existing_pending.token = token
+                        existing_pending.password = password_hash
+                        existing_pending.token = token_hash
                         existing_pending.create_date = datetime.utcnow()
                         db.session.commit()
                         pending = existing_pending
                     else:
                         pending = UnverifiedUser(
                             username=username,
-                            password=generate_password_hash(password),
+                            password=password_hash,
                             email=email,
-                            token=token,
+                            token=token_hash,
                             create_date=datetime.utcnow()
                         )
                         db.session.add(pending)
                         db.session.commit()
+                    availability.add(username=username, email=email)
 
                     verify_url = url_for('auth.verify', token=token, _external=True)
                     sent = send_verification_email(email, verify_url)
@@ -325,12 +350,13 @@ def signup():
                     # no email provided -> create user immediately
                     user = User(
                         username=username,
-                        password=generate_password_hash(password),
+                        password=password_hash,
                         email=None,
                         create_date=datetime.utcnow()
                     )
                     db.session.add(user)
                     db.session.commit()
+                    availability.add(username=username)
                     flash('회원가입이 완료되었습니다.')
                     return redirect(url_for('auth.login'))
             except IntegrityError as e:
@@ -362,15 +388,14 @@ def signup():
 
 @bp.route('/verify/<token>')
 def verify(token):
-    # Find pending registration by token
-    pending = UnverifiedUser.query.filter_by(token=token).first()
+    # Find pending registration by token (저장된 해시로 찾는다)
+    pending = UnverifiedUser.query.filter_by(token=verification.hash_token(token)).first()
     if not pending:
         flash('유효하지 않거나 만료된 인증 링크입니다.')
         return redirect(url_for('auth.login'))
 
-    # Optionally enforce token age (e.g., 24h)
-    age_seconds = (datetime.utcnow() - pending.create_date).total_seconds()
-    if age_seconds > 86400:
+    # Enforce token age (SIGNUP_TOKEN_MAX_AGE)
+    if verification.is_expired(pending):
         # expired
         db.session.delete(pending)
         db.session.commit()
@@ -391,6 +416,7 @@ def verify(token):
         # remove pending
         db.session.delete(pending)
         db.session.commit()
+        availability.add(username=user.username, email=user.email)
     except Exception:
         db.session.rollback()
         flash('사용자 생성 중 오류가 발생했습니다. 관리자에게 문의하세요.')
@@ -1,179 +1,251 @@
-from datetime import datetime, timedelta
-from sqlalchemy import func
+from datetime import datetime
+from sqlalchemy.orm import joinedload
 
-from flask import Blueprint, render_template, request, url_for, session, abort, jsonify, g
+from flask import Blueprint, render_template, request, url_for, abort, g, current_app
 from werkzeug.utils import redirect
-from .. import db
+from .. import db, search, pagination, ranking
 
-from pybo.models import Question, User, QuestionLike, QuestionBookmark, Answer, AnswerLike, QuestionView
+from pybo.models import Question, Answer
 
 from pybo.forms import QuestionForm, AnswerForm
 from pybo.login_required import login_required
+from pybo.routing import read_only
+from pybo.reactions import question_reactions, answer_reactions
+from pybo.view_tracker import view_tracker
+from pybo.cache import page_cache, personalize, form_token_state
+from pybo.views.reaction_views import toggle_response
 
 bp = Blueprint('question', __name__, url_prefix='/question')
 
+
+def _pages_to_show(question_list):
+    """현재 페이지 주변 10개 번호와 처음/마지막 페이지 번호 목록"""
+    pages_to_show = []
+    if question_list.pages <= 10:
+        pages_to_show = list(range(1, question_list.pages + 1))
+    else:
+        start_page = max(1, question_list.page - 4)
+        end_page = min(question_list.pages, start_page + 9)
+        if end_page - start_page < 9:
+            start_page = max(1, end_page - 9)
+        
+        if start_page > 1:
+            pages_to_show.append(1)
+            if start_page > 2:
+                pages_to_show.append('...')
+        
+        pages_to_show.extend(range(start_page, end_page + 1))
+        
+        if end_page < question_list.pages:
+            if end_page < question_list.pages - 1:
+                pages_to_show.append('...')
+            pages_to_show.append(question_list.pages)
+    return pages_to_show
+
+
 @bp.route('/list/')
 @login_required
+@read_only
 def _list():
     page = request.args.get('page', type=int, default=1)
     per_page = request.args.get('per_page', type=int, default=10)
     sort = request.args.get('sort', 'recent', type=str)
     keyword = request.args.get('keyword', '', type=str).strip()
+    after = request.args.get('after', '', type=str)
+    before = request.args.get('before', '', type=str)
     
     if per_page not in (10, 30, 50, 100):
         per_page = 10
+
+    # 목록 조각은 사용자와 무관하므로 캐시하고, 좋아요/즐겨찾기 표시만 요청마다 채운다.
+    # 'question-list' 는 질문 등록/수정/삭제, 'question-list:{정렬}' 은 그 정렬 순서가 바뀔 때,
+    # 'question:{id}' 는 화면에 나온 질문의 반응 수가 바뀔 때 무효화된다
+    cache_key = f'question-list:{page}:{per_page}:{sort}:{keyword}:{after}:{before}'
+    entry = page_cache.get_or_render(
+        cache_key, ['question-list'],
+        lambda: _render_list_content(page, per_page, sort, keyword, after, before),
+    )
+
+    # 현재 사용자의 좋아요/즐겨찾기 여부를 페이지 단위로 한 번에 조회
+    user_id = g.user.id if g.user else None
+    reactions = question_reactions(user_id, entry.meta['question_ids'])
+    liked, bookmarked = reactions['liked_question_ids'], reactions['bookmarked_question_ids']
+
+    return page_cache.respond(
+        entry,
+        lambda: render_template('question/question_list.html', content=personalize(
+            entry.html, liked_question=liked, bookmarked_question=bookmarked,
+        )),
+        user_id, sorted(liked), sorted(bookmarked),
+    )
+
+
+def _question_total(query, keyword):
+    """검색 결과 수 -> (개수, 정확한지). QUESTION_LIST_COUNT_CAP 이 있으면 그 수까지만 센다."""
+    def count():
+        cap = current_app.config['QUESTION_LIST_COUNT_CAP']
+        if cap:
+            return pagination.approximate_total(query, cap)
+        return query.order_by(None).count(), True
+
+    return page_cache.get_or_compute(f'question-count:{search.normalize(keyword)}', ['question-count'], count)
+
+
+def _render_list_content(page, per_page, sort, keyword, after, before):
+    # Start with base query (작성자는 함께 로드)
+    base_query = Question.query.options(joinedload(Question.user))
     
-    # Start with base query
-    base_query = Question.query
-    
-    # Apply search filter if keyword is provided
+    # Apply search filter if keyword is provided (FTS 인덱스 사용, 공백 무시)
+    rank = None
     if keyword:
-        # 검색 키워드에서 공백 제거
-        keyword_no_space = keyword.replace(' ', '')
-        base_query = base_query.filter(
-            (func.replace(Question.subject, ' ', '').ilike(f'%{keyword_no_space}%')) | 
-            (func.replace(Question.content, ' ', '').ilike(f'%{keyword_no_space}%'))
-        )
+        base_query, rank = search.filter_questions(base_query, keyword)
     
-    # Determine sorting order
-    if sort == 'likes_desc':
+    # Determine sorting order (반응 수는 Question의 카운터 컬럼으로 정렬)
+    # 정렬 키는 (컬럼, 내림차순 여부) 목록이며, 커서 페이지네이션을 위해 id 로 끝난다
+    if sort == 'relevance' and rank is not None:
+        # Order by search relevance (bm25)
+        order_keys = [(rank, False), (Question.create_date, True)]
+    elif sort == 'likes_desc':
         # Order by number of likes (descending)
-        question_list = db.session.query(Question).filter(
-            base_query.whereclause if hasattr(base_query, 'whereclause') else True
-        ).outerjoin(
-            QuestionLike, Question.id == QuestionLike.question_id
-        ).group_by(Question.id).order_by(
-            func.count(QuestionLike.id).desc(), Question.create_date.desc()
-        ).paginate(page=page, per_page=per_page)
+        order_keys = [(Question.like_count, True), (Question.create_date, True)]
     elif sort == 'likes_asc':
         # Order by number of likes (ascending)
-        question_list = db.session.query(Question).filter(
-            base_query.whereclause if hasattr(base_query, 'whereclause') else True
-        ).outerjoin(
-            QuestionLike, Question.id == QuestionLike.question_id
-        ).group_by(Question.id).order_by(
-            func.count(QuestionLike.id).asc(), Question.create_date.desc()
-        ).paginate(page=page, per_page=per_page)
+        order_keys = [(Question.like_count, False), (Question.create_date, True)]
     elif sort == 'bookmarks_desc':
         # Order by number of bookmarks (descending)
-        question_list = db.session.query(Question).filter(
-            base_query.whereclause if hasattr(base_query, 'whereclause') else True
-        ).outerjoin(
-            QuestionBookmark, Question.id == QuestionBookmark.question_id
-        ).group_by(Question.id).order_by(
-            func.count(QuestionBookmark.id).desc(), Question.create_date.desc()
-        ).paginate(page=page, per_page=per_page)
+        order_keys = [(Question.bookmark_count, True), (Question.create_date, True)]
     elif sort == 'bookmarks_asc':
         # Order by number of bookmarks (ascending)
-        question_list = db.session.query(Question).filter(
-            base_query.whereclause if hasattr(base_query, 'whereclause') else True
-        ).outerjoin(
-            QuestionBookmark, Question.id == QuestionBookmark.question_id
-        ).group_by(Question.id).order_by(
-            func.count(QuestionBookmark.id).asc(), Question.create_date.desc()
-        ).paginate(page=page, per_page=per_page)
+        order_keys = [(Question.bookmark_count, False), (Question.create_date, True)]
     elif sort == 'views_desc':
         # Order by view count (descending)
-        question_list = base_query.order_by(Question.view_count.desc(), Question.create_date.desc()).paginate(page=page, per_page=per_page)
+        order_keys = [(Question.view_count, True), (Question.create_date, True)]
     elif sort == 'views_asc':
         # Order by view count (ascending)
-        question_list = base_query.order_by(Question.view_count.asc(), Question.create_date.desc()).paginate(page=page, per_page=per_page)
+        order_keys = [(Question.view_count, False), (Question.create_date, True)]
+    elif sort == 'hot':
+        # Order by hot score (조회/좋아요/즐겨찾기/답변에 시간 감쇠를 적용해 미리 계산한 점수)
+        order_keys = [(Question.hot_score, True), (Question.create_date, True)]
     elif sort == 'oldest':
         # Order by oldest (create_date ascending)
-        question_list = base_query.order_by(Question.create_date.asc()).paginate(page=page, per_page=per_page)
+        order_keys = [(Question.create_date, False)]
     else:
         # Default: Order by recent (create_date descending)
-        question_list = base_query.order_by(Question.create_date.desc()).paginate(page=page, per_page=per_page)
-    
-    # Calculate pagination range
-    pages_to_show = []
-    if question_list.pages <= 10:
-        pages_to_show = list(range(1, question_list.pages + 1))
+        sort = 'recent'
+        order_keys = [(Question.create_date, True)]
+    order_keys.append((Question.id, order_keys[-1][1]))
+
+    # after/before 커서가 있으면 OFFSET/COUNT 없이 커서 기준으로 조회 (관련도 정렬 제외)
+    cursor_mode = bool(after or before) and sort != 'relevance'
+    if cursor_mode:
+        question_list = pagination.keyset_paginate(base_query, sort, order_keys, per_page, after=after, before=before)
     else:
-        start_page = max(1, question_list.page - 4)
-        end_page = min(question_list.pages, start_page + 9)
-        if end_page - start_page < 9:
-            start_page = max(1, end_page - 9)
-        
-        if start_page > 1:
-            pages_to_show.append(1)
-            if start_page > 2:
-                pages_to_show.append('...')
-        
-        pages_to_show.extend(range(start_page, end_page + 1))
-        
-        if end_page < question_list.pages:
-            if end_page < question_list.pages - 1:
-                pages_to_show.append('...')
-            pages_to_show.append(question_list.pages)
-    
-    return render_template('question/question_list.html', question_list=question_list, current_sort=sort, pages_to_show=pages_to_show, keyword=keyword)
+        question_list = base_query.order_by(*pagination.order_by(order_keys)).paginate(
+            page=page, per_page=per_page, count=False)
+    # 전체 개수는 정렬/페이지와 무관하므로 검색어별로 캐시한다 (질문 등록/수정/삭제 시 무효화)
+    question_list.total, question_list.total_exact = _question_total(base_query, keyword)
+    if not cursor_mode and not question_list.total_exact:
+        # 센 값보다 뒤의 페이지에서도 다음 페이지가 보이도록 적어도 이 페이지까지(가득 찼으면 하나 더)는 있다고 본다
+        seen = (page - 1) * per_page + len(question_list.items)
+        question_list.total = max(question_list.total, seen + (len(question_list.items) == per_page))
+    if cursor_mode:
+        next_cursor = question_list.next_cursor
+    else:
+        next_cursor = None
+        if sort != 'relevance' and question_list.has_next and question_list.items:
+            next_cursor = pagination.encode_cursor(sort, order_keys, question_list.items[-1])
+
+    # Calculate pagination range (커서 모드에서는 번호 목록 없이 이전/다음만 표시)
+    pages_to_show = [] if cursor_mode else _pages_to_show(question_list)
+
+    html = render_template('question/_question_list_content.html', question_list=question_list, current_sort=sort, pages_to_show=pages_to_show, keyword=keyword,
+                           next_cursor=next_cursor, cursor_after_page=current_app.config['QUESTION_LIST_CURSOR_AFTER_PAGE'])
+    question_ids = [question.id for question in question_list.items]
+    tags = [f'question-list:{sort}', *(f'question:{question_id}' for question_id in question_ids)]
+    return html, {'question_ids': question_ids, 'tags': tags}
 
 
 @bp.route('/detail/<int:question_id>/')
 @login_required
+@read_only
 def detail(question_id):
-    form = AnswerForm()
-    question = Question.query.get_or_404(question_id)
+    # 조회수는 캐시하지 않고 매번 읽는다 (존재 여부 확인 겸)
+    view_count = db.session.query(Question.view_count).filter(Question.id == question_id).scalar()
+    if view_count is None:
+        abort(404)
     
-    # 조회수 처리 - 1시간 내 동일 사용자 중복 조회 방지
+    # 조회수 처리 - 1시간 내 동일 사용자 중복 조회 방지 (메모리에서 거르고 주기적으로 일괄 반영)
     if g.user:
-        one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-        recent_view = QuestionView.query.filter_by(
-            question_id=question_id,
-            user_id=g.user.id
-        ).filter(QuestionView.created_at > one_hour_ago).first()
-        
-        # 1시간 내 기록이 없으면 조회수 증가 및 기록 추가
-        if not recent_view:
-            question.view_count += 1
-            view_record = QuestionView(
-                question_id=question_id,
-                user_id=g.user.id,
-                created_at=datetime.utcnow()
-            )
-            db.session.add(view_record)
-            db.session.commit()
+        view_tracker.record(question_id, g.user.id)
     
     # Get answer sort parameter
     answer_sort = request.args.get('answer_sort', 'recent', type=str)
+    return render_detail(question_id, AnswerForm(), answer_sort, view_count)
+
+
+def render_detail(question_id, form, answer_sort='recent', view_count=None):
+    """질문 상세 화면. 질문/답변 조각은 캐시하고 사용자별 표시(좋아요, 수정/삭제 버튼, 조회수)만 채운다."""
+    if answer_sort not in ('recent', 'likes_desc', 'likes_asc'):
+        answer_sort = 'recent'
+    entry = page_cache.get_or_render(
+        f'question-detail:{question_id}:{answer_sort}', [f'question:{question_id}'],
+        lambda: _render_detail_content(question_id, answer_sort),
+    )
+    if view_count is None:
+        view_count = db.session.query(Question.view_count).filter(Question.id == question_id).scalar() or 0
+    view_count += view_tracker.pending_for(question_id)
+
+    user_id = g.user.id if g.user else None
+    reactions = question_reactions(user_id, [question_id])
+    reactions.update(answer_reactions(user_id, entry.meta['answer_ids']))
+    id_sets = {
+        'liked_question': reactions['liked_question_ids'],
+        'bookmarked_question': reactions['bookmarked_question_ids'],
+        'liked_answer': reactions['liked_answer_ids'],
+        'bookmarked_answer': reactions['bookmarked_answer_ids'],
+        'owner': {user_id} if user_id else set(),
+    }
+    return page_cache.respond(
+        entry,
+        lambda: render_template('question/question_detail.html', question_id=question_id, form=form,
+                                content=personalize(entry.html, {'view_count': view_count}, **id_sets)),
+        user_id, view_count, sorted((name, sorted(ids)) for name, ids in id_sets.items()), form_token_state(),
+    )
+
+
+def _render_detail_content(question_id, answer_sort):
+    # 질문/답변 작성자는 함께 로드하고, 반응 수는 카운터 컬럼을 사용하므로 답변 수와 무관하게 쿼리 2개
+    question = Question.query.options(joinedload(Question.user)).filter_by(id=question_id).first_or_404()
+    answer_query = Answer.query.options(joinedload(Answer.user)).filter_by(question_id=question_id)
     
     # Sort answers based on parameter
     if answer_sort == 'likes_desc':
         # Order by number of likes (descending)
-        answers = db.session.query(Answer).filter(
-            Answer.question_id == question_id
-        ).outerjoin(
-            AnswerLike, Answer.id == AnswerLike.answer_id
-        ).group_by(Answer.id).order_by(
-            func.count(AnswerLike.id).desc(), Answer.create_date.desc()
-        ).all()
+        answers = answer_query.order_by(Answer.like_count.desc(), Answer.create_date.desc()).all()
     elif answer_sort == 'likes_asc':
         # Order by number of likes (ascending)
-        answers = db.session.query(Answer).filter(
-            Answer.question_id == question_id
-        ).outerjoin(
-            AnswerLike, Answer.id == AnswerLike.answer_id
-        ).group_by(Answer.id).order_by(
-            func.count(AnswerLike.id).asc(), Answer.create_date.desc()
-        ).all()
+        answers = answer_query.order_by(Answer.like_count.asc(), Answer.create_date.desc()).all()
     else:
         # Default: Order by recent (create_date descending)
-        answers = Answer.query.filter_by(question_id=question_id).order_by(Answer.create_date.desc()).all()
+        answers = answer_query.order_by(Answer.create_date.desc()).all()
     
-    question.answer_set = answers
-    
-    return render_template('question/question_detail.html', question=question, form=form, answer_sort=answer_sort)
+    html = render_template('question/_question_detail_content.html', question=question, answers=answers, answer_sort=answer_sort)
+    return html, {'answer_ids': [answer.id for answer in answers]}
 
 @bp.route('/create/', methods=('GET','POST'))
 @login_required
 def create():
     form = QuestionForm()
     if request.method == 'POST' and form.validate_on_submit():
-        user = User.query.filter_by(username=session.get('username')).first()
-        question = Question(subject=form.subject.data, content=form.content.data, create_date=datetime.now(), user_id=user.id)
+        user = g.user
+        create_date = datetime.now()
+        question = Question(subject=form.subject.data, content=form.content.data, create_date=create_date, user_id=user.id,
+                            hot_score=ranking.event_score('question', create_date) or 0.0)
         db.session.add(question)
+        search.index_question(question)
         db.session.commit()
+        # 새 질문은 모든 정렬의 목록과 전체 개수를 바꾼다
+        page_cache.invalidate('question-list', 'question-count')
         return redirect(url_for('main.index'))
     return render_template('question/question_form.html', form=form)
 
@@ -181,7 +253,7 @@ def create():
 @login_required
 def modify(question_id):
     question = Question.query.get_or_404(question_id)
-    user = User.query.filter_by(username=session.get('username')).first()
+    user = g.user
     
     # 본인이 작성한 게시글이 아니면 접근 불가
     if question.user_id != user.id:
@@ -190,8 +262,14 @@ def modify(question_id):
     form = QuestionForm()
     if request.method == 'POST' and form.validate_on_submit():
         form.populate_obj(question)
+        # 수정 시각이 작성 시각이 되므로 인기순 점수의 질문 시각도 옮긴다 (refresh() 와 같은 값이 되도록)
+        ranking.retract(question.id, 'question', question.create_date)
         question.create_date = datetime.now()
+        ranking.record(question.id, 'question', question.create_date)
+        search.index_question(question)
         db.session.commit()
+        # 수정하면 작성 시각이 바뀌므로 모든 정렬에서 위치가 바뀔 수 있고, 검색 결과 수도 달라질 수 있다
+        page_cache.invalidate('question-list', 'question-count', f'question:{question_id}')
         return redirect(url_for('question.detail', question_id=question_id))
     elif request.method == 'GET':
         form.subject.data = question.subject
@@ -203,74 +281,28 @@ def modify(question_id):
 @login_required
 def delete(question_id):
     question = Question.query.get_or_404(question_id)
-    user = User.query.filter_by(username=session.get('username')).first()
+    user = g.user
     
     # 본인이 작성한 게시글이 아니면 접근 불가
     if question.user_id != user.id:
         abort(403)
     
+    search.remove_question(question.id)
     db.session.delete(question)
     db.session.commit()
+    page_cache.invalidate('question-list', 'question-count', f'question:{question_id}')
     return redirect(url_for('question._list'))
 
 
 @bp.route('/like/<int:question_id>/', methods=('POST',))
 @login_required
 def like_question(question_id):
-    question = Question.query.get_or_404(question_id)
-    user = User.query.filter_by(username=session.get('username')).first()
-    
-    # 이미 좋아요를 눌렀으면 취소
-    existing_like = QuestionLike.query.filter_by(
-        question_id=question_id, user_id=user.id
-    ).first()
-    
-    if existing_like:
-        db.session.delete(existing_like)
-    else:
-        like = QuestionLike(question_id=question_id, user_id=user.id, create_date=datetime.now())
-        db.session.add(like)
-    
-    db.session.commit()
-    
-    like_count = QuestionLike.query.filter_by(question_id=question_id).count()
-    is_liked = QuestionLike.query.filter_by(
-        question_id=question_id, user_id=user.id
-    ).first() is not None
-    
-    return jsonify({
-        'success': True,
-        'like_count': like_count,
-        'is_liked': is_liked
-    })
+    # 이미 좋아요를 눌렀으면 취소 (조회 없이 삭제/추가와 카운터 갱신을 한 번에 처리)
+    return toggle_response('question', 'like', question_id)
 
 
 @bp.route('/bookmark/<int:question_id>/', methods=('POST',))
 @login_required
 def bookmark_question(question_id):
-    question = Question.query.get_or_404(question_id)
-    user = User.query.filter_by(username=session.get('username')).first()
-    
     # 이미 즐겨찾기를 했으면 취소
-    existing_bookmark = QuestionBookmark.query.filter_by(
-        question_id=question_id, user_id=user.id
-    ).first()
-    
-    if existing_bookmark:
-        db.session.delete(existing_bookmark)
-    else:
-        bookmark = QuestionBookmark(question_id=question_id, user_id=user.id, create_date=datetime.now())
-        db.session.add(bookmark)
-    
-    db.session.commit()
-    
-    bookmark_count = QuestionBookmark.query.filter_by(question_id=question_id).count()
-    is_bookmarked = QuestionBookmark.query.filter_by(
-        question_id=question_id, user_id=user.id
-    ).first() is not None
-    
-    return jsonify({
-        'success': True,
-        'bookmark_count': bookmark_count,
-        'is_bookmarked': is_bookmarked
-    })
\ No newline at end of file
+    return toggle_response('question', 'bookmark', question_id)
@@ -0,0 +1,101 @@
+from flask import Blueprint, request, abort, jsonify, g, current_app
+
+from pybo import reactions
+from pybo.login_required import login_required
+from pybo.cache import page_cache
+from pybo.routing import read_only
+from pybo.view_tracker import view_tracker
+
+bp = Blueprint('reaction', __name__, url_prefix='/reaction')
+
+
+def toggle_response(target_type, action, target_id):
+    """좋아요/즐겨찾기 버튼 하나의 토글 응답 ({action}_count, is_liked/is_bookmarked)"""
+    user_id = g.user.id
+    try:
+        result = reactions.toggle(target_type, action, target_id, user_id)
+    except reactions.ReactionTargetNotFound:
+        abort(404)
+    page_cache.invalidate(*reactions.invalidation_tags([result]))
+    state_key = 'is_liked' if action == 'like' else 'is_bookmarked'
+    return jsonify({
+        'success': True,
+        f'{action}_count': result['count'],
+        state_key: result['active'],
+    })
+
+
+@bp.route('/toggle/', methods=('POST',))
+@login_required
+def toggle_many():
+    """여러 토글을 한 트랜잭션으로 반영한다.
+
+    요청: {"toggles": [{"type": "question", "id": 1, "action": "like"}, ...]}
+    응답: {"success": true, "results": [{"type", "id", "action", "active", "count"} 또는 {..., "error"}]}
+    """
+    data = request.get_json(silent=True) or {}
+    toggles = data.get('toggles')
+    if not isinstance(toggles, list) or not toggles:
+        return jsonify({'success': False, 'message': 'toggles 목록이 필요합니다.'}), 400
+    if len(toggles) > current_app.config['REACTION_BULK_MAX']:
+        return jsonify({'success': False,
+                        'message': f'한 번에 최대 {current_app.config["REACTION_BULK_MAX"]}개까지 보낼 수 있습니다.'}), 400
+
+    parsed = []
+    for item in toggles:
+        if not isinstance(item, dict):
+            return jsonify({'success': False, 'message': '잘못된 토글 항목입니다.'}), 400
+        target_type, action, target_id = item.get('type'), item.get('action'), item.get('id')
+        if (target_type, action) not in reactions.REACTIONS or type(target_id) is not int:
+            return jsonify({'success': False, 'message': '잘못된 토글 항목입니다.'}), 400
+        parsed.append((target_type, action, target_id))
+
+    results = reactions.toggle_many(parsed, g.user.id)
+    applied = [result for result in results if 'error' not in result]
+    page_cache.invalidate(*reactions.invalidation_tags(applied))
+    for result in applied:
+        del result['question_id']
+    return jsonify({'success': True, 'results': results})
+
+
+def _id_list(name):
+    """?question=1,2&question=3 -> [1, 2, 3] (숫자가 아니면 None)"""
+    ids = []
+    for value in request.args.getlist(name):
+        for part in filter(None, (part.strip() for part in value.split(','))):
+            if not (part.isascii() and part.isdigit()):
+                return None
+            ids.append(int(part))
+    return ids
+
+
+@bp.route('/state/')
+@login_required
+@read_only
+def state():
+    """질문/답변의 좋아요/즐겨찾기/답변/조회 수와 현재 사용자의 반응 여부.
+
+    요청: GET /reaction/state/?question=1,2,3&answer=4,5
+    응답: {"question": {"1": {"like_count", "bookmark_count", "answer_count", "view_count", "is_liked",
+           "is_bookmarked"}, ...}, "answer": {"4": {"like_count", "bookmark_count", "is_liked", "is_bookmarked"}}}
+    항목별 버전으로 만든 ETag 를 붙이므로 바뀐 것이 없으면 If-None-Match 에 304 로 답한다.
+    """
+    question_ids, answer_ids = _id_list('question'), _id_list('answer')
+    if question_ids is None or answer_ids is None:
+        return jsonify({'success': False, 'message': '잘못된 id 입니다.'}), 400
+    if len(set(question_ids)) + len(set(answer_ids)) > current_app.config['REACTION_STATE_MAX']:
+        return jsonify({'success': False,
+                        'message': f'한 번에 최대 {current_app.config["REACTION_STATE_MAX"]}개까지 조회할 수 있습니다.'}), 400
+
+    user_id = g.user.id
+    states = reactions.reaction_states(user_id, question_ids, answer_ids)
+    for question_id, question_state in states['question'].items():
+        # 상세 화면과 같이 아직 반영되지 않은 조회수를 더한다
+        question_state['view_count'] += view_tracker.pending_for(question_id)
+
+    response = jsonify({target_type: {str(target_id): item for target_id, item in items.items()}
+                        for target_type, items in states.items()})
+    response.set_etag(reactions.states_etag(user_id, states))
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
@@ -0,0 +1,65 @@
+from datetime import datetime
+
+import pytest
+
+from pybo import create_app, db
+from pybo.models import User, Question
+
+
+def make_app(tmp_path, **config):
+    """테스트용 앱 (tmp_path 의 SQLite). config 로 설정을 덮어쓴다."""
+    return create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///{}'.format(tmp_path / 'pybo.db'),
+        'WTF_CSRF_ENABLED': False,
+        # 요청 스레드에서 바로 처리 (프로세스 풀/메일 워커 스레드를 띄우지 않는다)
+        'PASSWORD_HASH_WORKERS': 0,
+        'MAIL_QUEUE_WORKERS': 0,
+        'STATIC_ASSETS_DIR': str(tmp_path / 'dist'),
+        'VIEW_FLUSH_INTERVAL': 0,
+        **config,
+    })
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        db.create_all()
+        yield app
+        # 모듈 전역 객체에 남은 조회수가 다음 테스트의 DB 로 가지 않도록 비운다
+        app.extensions['view_tracker'].flush()
+        db.session.remove()
+
+
+@pytest.fixture
+def users(app):
+    alice = User(username='alice', password='x', email='alice@example.com')
+    bobby = User(username='bobby', password='x', email='bobby@example.com')
+    db.session.add_all([alice, bobby])
+    db.session.commit()
+    return alice, bobby
+
+
+@pytest.fixture
+def questions(app, users):
+    """alice 가 쓴 질문 25개 (1분 간격)"""
+    items = [Question(subject=f'질문 {i} 제목', content=f'내용 본문 {i}', create_date=datetime(2024, 1, 1, 0, i),
+                      user_id=users[0].id) for i in range(25)]
+    db.session.add_all(items)
+    db.session.commit()
+    return items
+
+
+def login(client, user):
+    with client.session_transaction() as session:
+        session['user_id'] = user.id
+        session['username'] = user.username
+
+
+@pytest.fixture
+def client(app, users):
+    """alice 로 로그인한 테스트 클라이언트"""
+    client = app.test_client()
+    login(client, users[0])
+    return client
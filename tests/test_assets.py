@@ -0,0 +1,42 @@
+import pytest
+
+from pybo import assets
+
+
+@pytest.fixture
+def built(app, tmp_path):
+    static = tmp_path / 'static'
+    (static / 'css').mkdir(parents=True)
+    (static / 'css' / 'style.css').write_text('.a{color:red}' * 200)
+    manifest = assets.build(str(static), app.config['STATIC_ASSETS_DIR'])
+    app.extensions['static_assets'].reload()
+    return manifest
+
+
+def test_is_fingerprinted():
+    name = assets.fingerprinted('css/style.css', b'body{}')
+    assert assets.is_fingerprinted(name)
+    assert assets.is_fingerprinted(name + '.gz')
+    assert not assets.is_fingerprinted('css/style.css')
+    assert not assets.is_fingerprinted(assets.MANIFEST)
+
+
+def test_hashed_asset_is_immutable(app, built):
+    response = app.test_client().get(f'/assets/{built["css/style.css"]}', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == app.config['STATIC_ASSETS_MAX_AGE']
+
+
+def test_manifest_is_revalidated(app, built):
+    client = app.test_client()
+    response = client.get(f'/assets/{assets.MANIFEST}')
+    assert response.status_code == 200
+    assert not response.cache_control.immutable
+    assert response.cache_control.no_cache
+    assert not response.cache_control.max_age
+
+    # ETag 로 확인하면 바뀌지 않았을 때 304
+    revalidated = client.get(f'/assets/{assets.MANIFEST}', headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
@@ -0,0 +1,25 @@
+from sqlalchemy import text
+
+from pybo import db
+
+from conftest import make_app
+
+
+def _journal_mode(engine):
+    with engine.connect() as conn:
+        return conn.execute(text('PRAGMA journal_mode')).scalar()
+
+
+def test_memory_bind_keeps_wal_on_file_engine(tmp_path):
+    app = make_app(tmp_path, SQLITE_PRAGMAS={'journal_mode': 'WAL', 'synchronous': 'NORMAL'},
+                   SQLALCHEMY_BINDS={'scratch': 'sqlite://'})
+    try:
+        with app.app_context():
+            assert _journal_mode(db.engines[None]) == 'wal'
+            assert _journal_mode(db.engines['scratch']) == 'memory'
+            with db.engines['scratch'].connect() as conn:
+                # 메모리 DB 에도 journal_mode 밖의 PRAGMA 는 적용된다 (NORMAL = 1)
+                assert conn.execute(text('PRAGMA synchronous')).scalar() == 1
+    finally:
+        # init_app 이 바인드마다 전역 db 에 만든 메타데이터 - 남기면 다음 테스트의 create_all 이 이 바인드를 찾는다
+        db.metadatas.pop('scratch', None)
@@ -0,0 +1,213 @@
+import email
+import socket
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from pybo import db
+from pybo.email_utils import REDACTED_BODY, mail_queue, send_verification_email
+from pybo.models import EmailDelivery
+
+from conftest import make_app
+
+aiosmtpd = pytest.importorskip('aiosmtpd')
+from aiosmtpd.controller import Controller  # noqa: E402
+from aiosmtpd.smtp import AuthResult  # noqa: E402
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Inbox:
+    """받은 메일을 모아 두는 aiosmtpd 핸들러"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.mail_from, envelope.rcpt_tos, envelope.content.decode()))
+        return '250 OK'
+
+
+def _authenticate(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=auth_data.login == b'pybo' and auth_data.password == b'secret')
+
+
+@pytest.fixture
+def smtp_port():
+    return _free_port()
+
+
+@pytest.fixture
+def inbox(smtp_port):
+    inbox = Inbox()
+    controller = Controller(inbox, hostname='127.0.0.1', port=smtp_port,
+                            authenticator=_authenticate, auth_require_tls=False)
+    controller.start()
+    yield inbox
+    controller.stop()
+
+
+def _mail_config(port, **config):
+    return {
+        'MAIL_SERVER': '127.0.0.1',
+        'MAIL_PORT': port,
+        'MAIL_USERNAME': 'pybo',
+        'MAIL_PASSWORD': 'secret',
+        'MAIL_USE_TLS': False,
+        'MAIL_DEFAULT_SENDER': 'no-reply@example.com',
+        'MAIL_TIMEOUT': 2,
+        'MAIL_CONNECTION_IDLE': 1,
+        **config,
+    }
+
+
+@pytest.fixture
+def mail_app(tmp_path, smtp_port):
+    app = make_app(tmp_path, **_mail_config(smtp_port))
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def _status(delivery_id):
+    db.session.expire_all()
+    return db.session.get(EmailDelivery, delivery_id).status
+
+
+def _wait_for(delivery_ids, status='sent', timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(_status(delivery_id) == status for delivery_id in delivery_ids):
+            return
+        time.sleep(0.05)
+    raise AssertionError(f'{delivery_ids} did not reach {status}')
+
+
+def _queued(count):
+    deliveries = [EmailDelivery(to_email=f'user{i}@example.com', subject='제목', body='본문', status='queued')
+                  for i in range(count)]
+    db.session.add_all(deliveries)
+    db.session.commit()
+    return [delivery.id for delivery in deliveries]
+
+
+def test_sync_mode_sends_through_smtp(mail_app, inbox):
+    delivery = mail_queue.enqueue('alice@example.com', '계정 인증 안내', '링크')
+
+    assert _status(delivery.id) == 'sent'
+    assert db.session.get(EmailDelivery, delivery.id).attempts == 1
+    assert len(inbox.messages) == 1
+    mail_from, rcpt_tos, content = inbox.messages[0]
+    assert (mail_from, rcpt_tos) == ('no-reply@example.com', ['alice@example.com'])
+    assert 'To: alice@example.com' in content
+
+
+def test_workers_send_batches(mail_app, inbox):
+    mail_app.config['MAIL_QUEUE_WORKERS'] = 1
+    delivery_ids = [mail_queue.enqueue(f'user{i}@example.com', '제목', '본문').id for i in range(5)]
+
+    _wait_for(delivery_ids)
+    assert sorted(rcpt[0] for _, rcpt, _ in inbox.messages) == sorted(f'user{i}@example.com' for i in range(5))
+
+
+def test_sync_mode_fails_fast_and_requeue_resends(tmp_path, smtp_port):
+    # 아무도 듣지 않는 포트 - 재시도 간격(30초)만큼 요청 스레드가 기다리면 안 된다
+    app = make_app(tmp_path, **_mail_config(smtp_port, MAIL_RETRY_BACKOFF=30.0))
+    with app.app_context():
+        db.create_all()
+        started = time.monotonic()
+        delivery = mail_queue.enqueue('alice@example.com', '제목', '본문')
+        assert time.monotonic() - started < 5
+
+        delivery = db.session.get(EmailDelivery, delivery.id)
+        assert (delivery.status, delivery.attempts) == ('queued', 1)
+        assert delivery.last_error
+
+        inbox = Inbox()
+        controller = Controller(inbox, hostname='127.0.0.1', port=smtp_port,
+                                authenticator=_authenticate, auth_require_tls=False)
+        controller.start()
+        try:
+            result = app.test_cli_runner().invoke(args=['mail-requeue'])
+        finally:
+            controller.stop()
+        assert 'Sent 1 of 1 queued emails.' in result.output
+        assert _status(delivery.id) == 'sent'
+        assert len(inbox.messages) == 1
+        db.session.remove()
+
+
+def test_claimed_email_is_sent_once(mail_app, inbox):
+    delivery_ids = _queued(1)
+    mail_queue.deliver_now(delivery_ids)
+    mail_queue.deliver_now(delivery_ids)
+
+    assert _status(delivery_ids[0]) == 'sent'
+    assert len(inbox.messages) == 1
+
+
+def test_requeue_picks_up_stale_sending(mail_app, inbox):
+    stale, fresh = _queued(2)
+    now = datetime.utcnow()
+    db.session.get(EmailDelivery, stale).status = 'sending'
+    db.session.get(EmailDelivery, stale).claimed_at = now - timedelta(hours=1)
+    db.session.get(EmailDelivery, fresh).status = 'sending'
+    db.session.get(EmailDelivery, fresh).claimed_at = now
+    db.session.commit()
+
+    assert mail_queue.requeue(deliver=True) == [stale]
+    assert (_status(stale), _status(fresh)) == ('sent', 'sending')
+    assert len(inbox.messages) == 1
+
+
+def test_workers_resume_queued_emails_on_first_request(tmp_path, smtp_port, inbox):
+    # 이전 프로세스가 대기열에 넣고 보내지 못한 메일
+    app = make_app(tmp_path, **_mail_config(smtp_port, MAIL_QUEUE_WORKERS=1))
+    with app.app_context():
+        db.create_all()
+        delivery_ids = _queued(3)
+
+        app.test_client().get('/')
+        _wait_for(delivery_ids)
+        assert len(inbox.messages) == 3
+
+        # 한 프로세스에서 한 번만 한다
+        app.test_client().get('/')
+        assert len(inbox.messages) == 3
+        db.session.remove()
+
+
+def test_verification_link_is_not_kept_after_sending(mail_app, inbox):
+    with mail_app.test_request_context():
+        assert send_verification_email('alice@example.com', 'http://localhost/auth/verify/secret-token')
+    delivery = EmailDelivery.query.one()
+
+    assert 'secret-token' in email.message_from_string(inbox.messages[0][2]).get_payload(decode=True).decode()
+    assert (delivery.status, delivery.body) == ('sent', REDACTED_BODY)
+
+
+def test_failed_email_body_is_redacted(tmp_path, smtp_port):
+    app = make_app(tmp_path, **_mail_config(smtp_port, MAIL_MAX_RETRIES=1))
+    with app.app_context():
+        db.create_all()
+        delivery = mail_queue.enqueue('alice@example.com', '제목', 'http://localhost/auth/verify/secret-token')
+        delivery = db.session.get(EmailDelivery, delivery.id)
+        assert (delivery.status, delivery.body) == ('failed', REDACTED_BODY)
+        db.session.remove()
+
+
+def test_mail_requeue_redacts_old_bodies(mail_app, inbox):
+    delivery = EmailDelivery(to_email='alice@example.com', subject='제목', body='secret-token', status='sent')
+    db.session.add(delivery)
+    db.session.commit()
+
+    result = mail_app.test_cli_runner().invoke(args=['mail-requeue'])
+    assert 'Redacted the body of 1 sent or failed emails.' in result.output
+    db.session.expire_all()
+    assert db.session.get(EmailDelivery, delivery.id).body == REDACTED_BODY
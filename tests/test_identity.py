@@ -0,0 +1,72 @@
+from sqlalchemy import text, update
+
+from pybo import db
+from pybo.models import User
+
+
+def _profile(client):
+    return client.get('/auth/profile/').get_data(as_text=True)
+
+
+def _change_behind_cache(user_id, **values):
+    # 세션을 거치지 않고 바꾸면 캐시가 알 수 없다 - 캐시된 값이 쓰이는지 확인하는 용도
+    assignments = ', '.join(f'{name} = :{name}' for name in values)
+    with db.engine.begin() as conn:
+        conn.execute(text(f'UPDATE user SET {assignments} WHERE id = :id'), {'id': user_id, **values})
+
+
+def test_profile_is_served_from_cache(client, users):
+    alice = users[0]
+    assert 'alice@example.com' in _profile(client)
+
+    _change_behind_cache(alice.id, email='hidden@example.com')
+    assert 'alice@example.com' in _profile(client)
+
+
+def test_username_change_invalidates_entry(client, users):
+    alice, bobby = users
+    bobby_client = client.application.test_client()
+    with bobby_client.session_transaction() as session:
+        session['user_id'], session['username'] = bobby.id, bobby.username
+    assert 'alice' in _profile(client)
+    assert 'bobby' in _profile(bobby_client)
+
+    alice.username = 'alice2'
+    db.session.commit()
+    _change_behind_cache(bobby.id, username='bobby2')
+
+    assert 'alice2' in _profile(client)
+    # 바뀌지 않은 사용자의 항목은 그대로 쓴다
+    assert 'bobby2' not in _profile(bobby_client)
+
+
+def test_email_change_invalidates_entry(client, users):
+    alice = users[0]
+    assert 'alice@example.com' in _profile(client)
+
+    db.session.get(User, alice.id).email = 'new@example.com'
+    db.session.commit()
+
+    assert 'new@example.com' in _profile(client)
+
+
+def test_rolled_back_change_keeps_entry(client, users):
+    alice = users[0]
+    assert 'alice@example.com' in _profile(client)
+
+    alice.email = 'rolled-back@example.com'
+    db.session.flush()
+    db.session.rollback()
+    _change_behind_cache(alice.id, email='hidden@example.com')
+
+    assert 'alice@example.com' in _profile(client)
+
+
+def test_bulk_update_clears_cache(client, users):
+    alice = users[0]
+    assert 'alice@example.com' in _profile(client)
+
+    db.session.execute(update(User).where(User.id == alice.id).values(email='bulk@example.com'))
+    db.session.commit()
+
+    assert 'bulk@example.com' in _profile(client)
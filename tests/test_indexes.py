@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy import inspect, select, text
+
+from pybo import db, testing
+from pybo.models import Question
+
+
+def _columns(name):
+    indexes = inspect(db.engine).get_indexes('question')
+    return next(index['column_names'] for index in indexes if index['name'] == name)
+
+
+def test_list_sorts_read_index_in_order(app):
+    # 같은 카운트가 많아도 (카운트, create_date, id) 순서로 읽으므로 정렬 단계가 없어야 한다
+    for name, statement, index in testing.hot_queries():
+        if name.startswith('question list'):
+            testing.assert_uses_index(statement, index, ordered=True)
+
+
+def test_list_sort_indexes_end_with_cursor_keys():
+    # SQLite 는 인덱스 끝에 rowid 를 붙이지만 다른 DB 는 id 가 인덱스에 있어야 정렬 단계가 없다
+    names = {'ix_question_create_date', 'ix_question_like_count', 'ix_question_bookmark_count',
+             'ix_question_view_count', 'ix_question_hot_score'}
+    for index in Question.__table__.indexes:
+        if index.name in names:
+            assert [column.name for column in index.columns][-2:] == ['create_date', 'id'], index.name
+
+
+def test_create_indexes_recreates_changed_index(app):
+    db.session.execute(text('DROP INDEX ix_question_like_count'))
+    db.session.execute(text('CREATE INDEX ix_question_like_count ON question (like_count, create_date)'))
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['create-indexes'])
+    assert result.exit_code == 0, result.output
+    assert 'Recreated ix_question_like_count' in result.output
+    assert _columns('ix_question_like_count') == ['like_count', 'create_date', 'id']
+
+    result = app.test_cli_runner().invoke(args=['create-indexes'])
+    assert 'Created 0 indexes, recreated 0.' in result.output
+
+
+def test_hot_queries_use_their_indexes(app):
+    for name, statement, index in testing.hot_queries():
+        testing.assert_uses_index(statement, index)
+
+
+def test_assert_uses_index_reports_missing_index(app):
+    statement = select(Question).where(Question.content == '내용')
+    with pytest.raises(testing.MissingIndex):
+        testing.assert_uses_index(statement, 'ix_question_create_date')
+
+
+def test_check_indexes_command(app):
+    result = app.test_cli_runner().invoke(args=['check-indexes'])
+    assert result.exit_code == 0, result.output
+    assert result.output.count('ok   ') == len(testing.hot_queries())
@@ -0,0 +1,69 @@
+import re
+import time
+
+from pybo.cache import page_cache
+
+
+def _cached(sort='recent', page=1):
+    return page_cache.get(f'question-list:{page}:10:{sort}:::') is not None
+
+
+def _first_question(html):
+    return re.search(r'/question/detail/(\d+)/', html).group(1)
+
+
+def test_answer_refreshes_hot_list(client, questions):
+    oldest = questions[0]
+    assert _first_question(client.get('/question/list/?sort=hot').get_data(as_text=True)) != str(oldest.id)
+
+    response = client.post(f'/answer/create/{oldest.id}', data={'content': '답변'})
+    assert response.status_code == 302
+    assert _first_question(client.get('/question/list/?sort=hot').get_data(as_text=True)) == str(oldest.id)
+
+
+def test_question_like_invalidates_only_affected_lists(client, questions):
+    for sort in ('recent', 'likes_desc', 'views_desc'):
+        client.get(f'/question/list/?sort={sort}')
+    client.get('/question/list/?sort=recent&page=3')
+
+    # questions[0] 은 최신순 3페이지에만 나온다
+    assert client.post(f'/question/like/{questions[0].id}/').status_code == 200
+    assert _cached('recent') and _cached('views_desc')
+    assert not _cached('likes_desc')
+    assert not _cached('recent', page=3)
+
+
+def test_question_create_invalidates_all_lists(client, questions):
+    client.get('/question/list/?sort=recent')
+    client.get('/question/list/?sort=likes_desc')
+    client.post('/question/create/', data={'subject': '새 질문', 'content': '내용'})
+    assert not _cached('recent') and not _cached('likes_desc')
+
+
+def _csrf(html):
+    return re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', html).group(1)
+
+
+def test_detail_304_expires_before_csrf_token(app, client, questions, monkeypatch):
+    app.config.update(WTF_CSRF_ENABLED=True, WTF_CSRF_TIME_LIMIT=3600)
+    url = f'/question/detail/{questions[0].id}/'
+    client.get(url)  # 조회수 반영
+    first = client.get(url)
+    assert _csrf(first.get_data(as_text=True))
+    assert client.get(url, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    # 토큰 제한 시간의 절반이 지나면 새 토큰으로 다시 렌더링한다
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 1800)
+    later = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+    assert later.status_code == 200
+    assert later.headers['ETag'] != first.headers['ETag']
+
+
+def test_detail_ignores_if_modified_since(client, questions):
+    url = f'/question/detail/{questions[0].id}/'
+    client.get(url)
+    response = client.get(url)
+    assert 'Last-Modified' not in response.headers
+    revisit = client.get(url, headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+    assert revisit.status_code == 200
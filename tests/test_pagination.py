@@ -0,0 +1,78 @@
+import base64
+import json
+
+import pytest
+
+from pybo import pagination, search
+from pybo.models import Question
+
+
+def _token(data):
+    raw = data if isinstance(data, bytes) else json.dumps(data).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+KEYS = [(Question.create_date, True), (Question.id, True)]
+
+JUNK_CURSORS = [
+    'not base64 !!',
+    _token(b'\xff\xfe'),
+    _token([1, 2]),
+    _token({'s': 'recent', 'k': 'ab'}),
+    _token({'s': 'recent', 'k': [{'dt': 'garbage'}, 1]}),
+    _token({'s': 'recent', 'k': [{'dt': 5}, 1]}),
+    _token({'s': 'recent', 'k': [[1], {'a': 1}]}),
+    _token({'s': 'recent', 'k': [None, None]}),
+    _token({'s': 'recent', 'k': [True, 1]}),
+    _token({'s': 'recent', 'k': ['2024-01-01', 2 ** 70]}),
+    '{"s":"recent","k":[NaN,1]}',
+    # json.loads 가 RecursionError 를 내는 깊은 중첩
+    _token(b'[' * 1100),
+    # 길이 제한 안쪽의 중첩 / 제한을 넘는 긴 값
+    _token(b'[' * 300),
+    _token({'s': 'recent', 'k': ['x' * 1000, 1]}),
+]
+
+
+@pytest.mark.parametrize('token', JUNK_CURSORS)
+def test_decode_cursor_rejects_junk(app, token):
+    assert pagination.decode_cursor('recent', KEYS, token) is None
+
+
+def test_decode_cursor_survives_recursion(app, monkeypatch):
+    # 길이 제한을 넘기더라도 RecursionError 는 잡는다
+    monkeypatch.setattr(pagination, 'MAX_CURSOR_LENGTH', 10 ** 6)
+    assert pagination.decode_cursor('recent', KEYS, _token(b'[' * 100000)) is None
+
+
+def test_cursor_round_trip(app, questions):
+    token = pagination.encode_cursor('recent', KEYS, questions[3])
+    assert pagination.decode_cursor('recent', KEYS, token) == [questions[3].create_date, questions[3].id]
+    assert pagination.decode_cursor('oldest', KEYS, token) is None
+
+
+@pytest.mark.parametrize('param', ['after', 'before'])
+@pytest.mark.parametrize('token', JUNK_CURSORS)
+def test_question_list_ignores_junk_cursor(client, questions, param, token):
+    response = client.get('/question/list/', query_string={param: token})
+    assert response.status_code == 200
+
+
+def test_question_list_cursor_pages(client, questions):
+    first = client.get('/question/list/', query_string={'page': 1})
+    token = pagination.encode_cursor('recent', KEYS, questions[15])
+    second = client.get('/question/list/', query_string={'after': token})
+    assert second.status_code == 200
+    html = second.get_data(as_text=True)
+    # questions[15] 다음(더 오래된) 질문부터
+    assert '질문 14 제목' in html and '질문 15 제목' not in html
+    assert '질문 24 제목' in first.get_data(as_text=True)
+
+
+def test_keyword_search_uses_cursor_for_non_relevance_sort(client, questions):
+    search.rebuild_index()
+    token = pagination.encode_cursor('recent', KEYS, questions[15])
+    response = client.get('/question/list/', query_string={'keyword': '질문 1', 'after': token})
+    html = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert '질문 14 제목' in html and '질문 19 제목' not in html and '질문 15 제목' not in html
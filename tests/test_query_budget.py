@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import pytest
+
+from pybo import db
+from pybo.models import User, Answer, AnswerLike, QuestionLike
+from pybo.testing import assert_query_budget, QueryBudgetExceeded
+
+# QUERY_BUDGETS 의 엔드포인트마다 하나 이상
+BUDGET_URLS = [
+    '/question/list/',
+    '/question/list/?per_page=100',
+    '/question/list/?sort=likes_desc',
+    '/question/list/?sort=hot&page=2',
+    '/question/detail/{question_id}/',
+    '/question/detail/{question_id}/?answer_sort=likes_desc',
+]
+
+
+@pytest.fixture
+def crowded(app, questions):
+    """질문 하나에 여러 사용자가 단 답변/좋아요 (사용자/반응을 하나씩 읽으면 예산을 넘는다)"""
+    question = questions[0]
+    people = [User(username=f'user{i}', password='x') for i in range(30)]
+    db.session.add_all(people)
+    db.session.flush()
+    answers = [Answer(question_id=question.id, content=f'답변 {i}', create_date=datetime(2024, 2, 1, 0, i),
+                      user_id=people[i].id) for i in range(30)]
+    db.session.add_all(answers)
+    db.session.flush()
+    db.session.add_all([AnswerLike(answer_id=answer.id, user_id=people[0].id, create_date=datetime(2024, 3, 1))
+                        for answer in answers])
+    db.session.add_all([QuestionLike(question_id=item.id, user_id=people[1].id, create_date=datetime(2024, 3, 1))
+                        for item in questions])
+    db.session.commit()
+    return question
+
+
+def _urls(question_id):
+    return [url.format(question_id=question_id) for url in BUDGET_URLS]
+
+
+def test_budget_urls_cover_every_endpoint(app):
+    adapter = app.url_map.bind('localhost')
+    endpoints = {adapter.match(url.split('?', 1)[0])[0] for url in _urls(1)}
+    assert endpoints == set(app.config['QUERY_BUDGETS'])
+
+
+def test_pages_stay_within_budget(client, crowded):
+    for url in _urls(crowded.id):
+        assert assert_query_budget(client, url).status_code == 200, url
+
+
+def test_budget_exceeded_lists_statements(client, crowded):
+    with pytest.raises(QueryBudgetExceeded) as excinfo:
+        assert_query_budget(client, f'/question/detail/{crowded.id}/', budget=1)
+    assert 'FROM answer' in str(excinfo.value)
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+import pytest
+
+from pybo import db, ranking
+from pybo.models import Question
+
+
+def _scores():
+    db.session.expire_all()
+    return {question.id: question.hot_score for question in Question.query}
+
+
+@pytest.mark.parametrize('with_answer', [False, True])
+def test_modified_question_score_matches_refresh(client, users, with_answer):
+    assert client.post('/question/create/', data={'subject': '제목', 'content': '내용'}).status_code == 302
+    question_id = Question.query.one().id
+    if with_answer:
+        client.post(f'/answer/create/{question_id}', data={'content': '답변'})
+    client.post(f'/question/like/{question_id}/')
+    # 이틀 전에 쓴 질문으로 만들고 점수를 맞춰 둔다
+    question = db.session.get(Question, question_id)
+    question.create_date -= timedelta(days=2)
+    db.session.commit()
+    ranking.refresh()
+
+    response = client.post(f'/question/modify/{question_id}/', data={'subject': '고친 제목', 'content': '고친 내용'})
+    assert response.status_code == 302
+
+    incremental = _scores()
+    ranking.refresh()
+    assert _scores()[question_id] == pytest.approx(incremental[question_id], abs=1e-4)
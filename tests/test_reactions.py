@@ -0,0 +1,61 @@
+import pytest
+
+from pybo import db, reactions
+from pybo.models import Question, QuestionLike
+from pybo.testing import count_queries
+
+
+def _toggle(question_id, user_id):
+    with count_queries() as statements:
+        result = reactions.toggle('question', 'like', question_id, user_id)
+    return result, [statement.split()[0] for statement in statements]
+
+
+def test_toggle_runs_without_reads(app, users, questions):
+    question_id, alice_id = questions[0].id, users[0].id
+
+    result, statements = _toggle(question_id, alice_id)
+    assert (result['active'], result['count']) == (True, 1)
+    # 지울 행 없음 -> 넣기 -> 카운터
+    assert statements == ['DELETE', 'INSERT', 'UPDATE']
+
+    result, statements = _toggle(question_id, alice_id)
+    assert (result['active'], result['count']) == (False, 0)
+    assert statements == ['DELETE', 'UPDATE']
+
+
+def test_toggle_keeps_counter_in_step_with_rows(app, users, questions):
+    question = questions[0]
+    for user in users:
+        reactions.toggle('question', 'like', question.id, user.id)
+    reactions.toggle('question', 'like', question.id, users[0].id)
+
+    db.session.expire_all()
+    assert db.session.get(Question, question.id).like_count == 1
+    assert QuestionLike.query.filter_by(question_id=question.id).count() == 1
+
+
+def test_toggle_missing_target_rolls_back(app, users):
+    with pytest.raises(reactions.ReactionTargetNotFound):
+        reactions.toggle('question', 'like', 999, users[0].id)
+    assert QuestionLike.query.count() == 0
+
+
+def test_toggle_without_on_conflict_treats_duplicate_as_active(app, users, questions, monkeypatch):
+    question_id, alice_id = questions[0].id, users[0].id
+
+    def racing_insert_ignore(model):
+        # DELETE 와 INSERT 사이에 같은 토글이 먼저 행을 넣은 경우 (ON CONFLICT 가 없는 DB)
+        db.session.execute(reactions.insert(model).values(question_id=question_id, user_id=alice_id))
+        return None
+
+    monkeypatch.setattr(reactions, '_insert_ignore', racing_insert_ignore)
+    result = reactions.toggle('question', 'like', question_id, alice_id)
+    assert result['active'] is True
+    assert QuestionLike.query.filter_by(question_id=question_id).count() == 1
+
+    monkeypatch.setattr(reactions, '_insert_ignore', lambda model: None)
+    assert reactions.toggle('question', 'like', question_id, users[1].id)['count'] == 1
+    with pytest.raises(reactions.ReactionTargetNotFound):
+        reactions.toggle('question', 'like', 999, alice_id)
+    assert QuestionLike.query.count() == 2
@@ -0,0 +1,43 @@
+from pybo import db
+from pybo.models import User, UnverifiedUser
+
+
+def _signup(client, username, email):
+    return client.post('/auth/signup/', data={
+        'username': username, 'password': 'password1', 'password2': 'password1', 'email': email,
+    })
+
+
+def _other_worker_creates(username, email):
+    # 이 프로세스의 메모리 인덱스에 add() 되지 않는 가입 (다른 워커에서 생긴 사용자)
+    db.session.add(User(username=username, password='x', email=email))
+    db.session.commit()
+
+
+def test_signup_rejects_email_the_index_has_not_seen(app, users):
+    client = app.test_client()
+    client.post('/auth/check_username/', data={'username': 'warmup'})  # 메모리 인덱스를 만든다
+    _other_worker_creates('carol', 'carol@example.com')
+
+    response = _signup(client, 'carol2', 'Carol@Example.com')
+    assert '이미 등록된 이메일입니다.' in response.get_data(as_text=True)
+    assert UnverifiedUser.query.count() == 0
+
+
+def test_signup_rejects_username_the_index_has_not_seen(app, users):
+    client = app.test_client()
+    client.post('/auth/check_username/', data={'username': 'warmup'})
+    _other_worker_creates('carol', 'carol@example.com')
+
+    response = _signup(client, 'CAROL', 'new@example.com')
+    assert '이미 존재하는 사용자ID입니다.' in response.get_data(as_text=True)
+    assert UnverifiedUser.query.count() == 0
+
+
+def test_username_in_use_ignores_the_index(app, users):
+    availability = app.extensions['availability']
+    availability.maybe_taken('username', 'warmup')
+    _other_worker_creates('carol', 'carol@example.com')
+
+    assert availability.username_available('Carol')  # 참고용 답은 놓칠 수 있다
+    assert availability.username_in_use('Carol')
@@ -0,0 +1,72 @@
+import re
+from datetime import datetime
+
+import pytest
+
+from pybo import db
+from pybo.models import QuestionLike, QuestionBookmark
+
+from test_pagination import JUNK_CURSORS, _token
+
+LIKES = 'question_like+answer_like'
+BOOKMARKS = 'question_bookmark+answer_bookmark'
+
+# 타임라인 정렬 이름과 키 수(3개)가 맞아서 값 검사까지 가는 토큰
+TIMELINE_JUNK = [
+    _token({'s': sort, 'k': values})
+    for sort in (LIKES, BOOKMARKS, 'question_like', 'answer_bookmark')
+    for values in (
+        [{'dt': 'garbage'}, 'question_like', 1],
+        [{'dt': '2024-01-01T00:00:00'}, ['question_like'], 1],
+        [{'dt': '2024-01-01T00:00:00'}, 'question_like', None],
+        [{'dt': '2024-01-01T00:00:00'}, 'question_like', 2 ** 64],
+        [{'dt': '2024-01-01T00:00:00'}, 'question_like', {'a': 1}],
+        [True, False, 1],
+        # 길이 제한을 넘는 값
+        [{'dt': '2024-01-01T00:00:00'}, 'question_like', 'x' * 600],
+    )
+] + [
+    # 타임라인 정렬 이름 뒤에 깊게 중첩된 키 (json.loads 가 RecursionError 를 낸다)
+    _token(f'{{"s":"{sort}","k":'.encode() + b'[' * 1100)
+    for sort in (LIKES, BOOKMARKS)
+]
+
+
+@pytest.fixture
+def reactions(app, users, questions):
+    """alice 가 질문 25개에 좋아요/즐겨찾기 (1분 간격)"""
+    alice = users[0]
+    for i, question in enumerate(questions):
+        reacted_at = datetime(2024, 2, 1, 0, i)
+        db.session.add(QuestionLike(question_id=question.id, user_id=alice.id, create_date=reacted_at))
+        db.session.add(QuestionBookmark(question_id=question.id, user_id=alice.id, create_date=reacted_at))
+    db.session.commit()
+
+
+@pytest.mark.parametrize('path', ['/auth/liked/', '/auth/bookmarks/'])
+@pytest.mark.parametrize('token', JUNK_CURSORS + TIMELINE_JUNK)
+def test_timeline_ignores_junk_cursor(client, reactions, path, token):
+    for item_type in ('all', 'question', 'answer'):
+        response = client.get(path, query_string={'type': item_type, 'after': token})
+        assert response.status_code == 200, item_type
+        if item_type != 'answer':
+            # 잘못된 커서는 버리고 첫 페이지를 보여준다
+            assert '질문 24 제목' in response.get_data(as_text=True), item_type
+
+
+@pytest.mark.parametrize('path, sort', [('/auth/liked/', LIKES), ('/auth/bookmarks/', BOOKMARKS)])
+def test_timeline_survives_mistyped_cursor(client, reactions, path, sort):
+    # 형식은 맞지만 열과 타입이 다른 값 (날짜 자리에 문자열 등) - 빈 페이지여도 오류는 아니어야 한다
+    for values in (['2024-01-01', 5, 'x'], [5, 'question_like', 1], [1.5, 'x', 2.5]):
+        response = client.get(path, query_string={'after': _token({'s': sort, 'k': values})})
+        assert response.status_code == 200, values
+
+
+@pytest.mark.parametrize('path', ['/auth/liked/', '/auth/bookmarks/'])
+def test_timeline_next_cursor_pages(client, reactions, path):
+    first = client.get(path).get_data(as_text=True)
+    assert '질문 24 제목' in first and '질문 4 제목' not in first
+
+    after = re.search(r'after=([A-Za-z0-9_-]+)', first).group(1)
+    second = client.get(path, query_string={'after': after}).get_data(as_text=True)
+    assert '질문 4 제목' in second and '질문 5 제목' not in second
@@ -0,0 +1,37 @@
+import logging
+
+from pybo import view_tracker as tracker_module
+from pybo.view_tracker import view_tracker
+
+
+def _fail(*args, **kwargs):
+    raise RuntimeError('database is down')
+
+
+def test_failed_flush_caps_buffer_and_backs_off(app, users, questions, monkeypatch, caplog):
+    app.config.update(VIEW_FLUSH_MAX_PENDING=2, VIEW_BUFFER_MAX_ROWS=5, VIEW_FLUSH_RETRY_BACKOFF=60.0)
+    user_id = users[0].id
+    # 다른 테스트에서 남은 중복 조회 캐시
+    view_tracker._seen.clear()
+    monkeypatch.setattr(tracker_module, 'select', _fail)
+    flushes = []
+    flush = view_tracker.flush
+    monkeypatch.setattr(view_tracker, 'flush', lambda: flushes.append(1) or flush())
+
+    with caplog.at_level(logging.WARNING):
+        for question in questions[:20]:
+            assert view_tracker.record(question.id, user_id)
+
+    # 첫 실패 뒤로는 재시도 시각 전까지 요청 안에서 다시 flush 하지 않는다
+    assert len(flushes) == 1
+    # 버퍼는 최대 개수만 남기고 오래된 조회부터 버린다
+    assert [row['question_id'] for row in view_tracker._rows] == [question.id for question in questions[15:20]]
+    assert sum(view_tracker.pending_for(question.id) for question in questions) == 5
+
+    monkeypatch.undo()
+    caplog.clear()
+    with caplog.at_level(logging.WARNING):
+        assert view_tracker.flush() == 5
+    assert 'Dropped 15 buffered question views' in caplog.text
+    assert sum(view_tracker.pending_for(question.id) for question in questions) == 0
+    assert view_tracker._retry_at == 0.0